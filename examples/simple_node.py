@@ -4,9 +4,10 @@ This is a simple script to start up a node. To see it in action, open up four
 separate terminals, and in each one, run this script for a different node.
 
 Usage:
-simple_node.py <node_name>
+simple_node.py <node_name> [<event_loop>]
 
-Where <node_name> is one of Alpha, Beta, Gamma, Delta.
+Where <node_name> is one of Alpha, Beta, Gamma, Delta and <event_loop> is
+an event loop to run on if installed, e.g. uvloop.
 
 """
 import sys
@@ -15,6 +16,7 @@ from tempfile import TemporaryDirectory
 
 from plenum.common.looper import Looper
 
+from sovrin_node.server.event_loop import useEventLoop
 from sovrin_node.server.node import Node
 
 
@@ -42,6 +44,7 @@ def run_node():
         print("For example:")
         print("    {} {}".format(sys.argv[0], names[0]))
         return
+    useEventLoop(sys.argv[2] if len(sys.argv) > 2 else None)
 
     with Looper(debug=False) as looper:
         # Nodes persist keys when bootstrapping to other nodes and reconnecting
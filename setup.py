@@ -80,9 +80,11 @@ setup(
              '*.css', '*.ico', '*.png', 'LICENSE', 'LEGAL', '*.sovrin']},
     include_package_data=True,
     install_requires=['sovrin-common', 'python-dateutil'],
+    extras_require={'uvloop': ['uvloop']},
     setup_requires=['pytest-runner'],
     tests_require=['pytest', 'sovrin-client'],
-    scripts=['scripts/start_sovrin_node'],
+    scripts=['scripts/start_sovrin_node', 'scripts/start_sovrin_gateway',
+             'scripts/convert_sovrin_ledger'],
     cmdclass={
         'install': PostInstall,
         'develop': PostInstallDev
@@ -0,0 +1,22 @@
+"""
+The one JSON encoding of the data in replies: keys sorted and datetimes
+encoded with `dateTimeEncoding`, so equal data always gives equal strings.
+
+A single encoder is created once and reused. Python's `json` module already
+encodes with its C accelerator when the encoder has no indent. The faster C
+libraries (orjson, ujson, python-rapidjson) cannot produce the ", " and ": "
+separators which clients and stored hashes expect, so they are not used.
+"""
+from json import JSONEncoder
+
+from sovrin_common.util import dateTimeEncoding
+
+_encoder = JSONEncoder(sort_keys=True, default=dateTimeEncoding)
+
+
+def encodeJson(obj) -> str:
+    """
+    `obj` as JSON with sorted keys, the same as
+    `json.dumps(obj, sort_keys=True, default=dateTimeEncoding)`
+    """
+    return _encoder.encode(obj)
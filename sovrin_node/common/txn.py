@@ -0,0 +1,42 @@
+"""
+Names used in requests and replies which only sovrin-node knows about so far
+"""
+from sovrin_common.txn import TXN_TYPE, GET_NYM, GET_TXNS, GET_ATTR, \
+    GET_CLAIM_DEF, GET_ISSUER_KEY, openTxns
+
+# Proof from the node's state trie which comes with the reply to a read
+STATE_PROOF = "stateProof"
+
+# The node's signature of the state root which a STATE_PROOF is against,
+# along with the domain ledger's root hash at the same seqNo
+SIGNED_STATE_ROOT = "signedStateRoot"
+
+# The payload of the ATTRIB a GET_ATTR reply's value comes from, the key of
+# the reply's STATE_PROOF has its hash
+ATTR_PAYLOAD = "attrPayload"
+
+# Read of the NYM transactions of all the nyms listed in the operation's DATA
+GET_NYMS = "GET_NYMS"
+
+# Write adding every NYM listed in the operation's DATA, all or none of them
+NYMS = "NYMS"
+
+# Transaction types handled by the node in addition to `validTxnTypes`
+nodeTxnTypes = {GET_NYMS, NYMS}
+
+# Transaction types of requests which only read
+readTxnTypes = {GET_NYM, GET_NYMS, GET_TXNS, GET_ATTR, GET_CLAIM_DEF,
+                GET_ISSUER_KEY}
+
+
+def signatureNeeded(operation: dict) -> bool:
+    """
+    Whether a request with `operation` has to be signed
+    """
+    typ = operation.get(TXN_TYPE)
+    if typ in openTxns:
+        return False
+    # A bulk read needs a signature only if a single one does
+    if typ == GET_NYMS and GET_NYM in openTxns:
+        return False
+    return True
@@ -0,0 +1,162 @@
+"""
+Defaults for settings which only sovrin-node uses. They are added to the
+config returned by `getConfig` when a node is created, so each one can be
+overridden in the user's sovrin_config.py like any other setting.
+"""
+
+# File (relative to the node's data directory, or absolute) to which every
+# accepted client request is appended as a line of JSON, disabled when None
+ClientRequestTraceFile = None
+
+# Number of threads building the replies to GET_* requests off the looper,
+# 0 builds them inline on the looper
+ReadWorkerCount = 0
+
+# Connections to the identity graph, each used by a thread of its own so
+# that lookups run alongside each other and off the looper. 1 keeps a single
+# connection used from the looper (and the read workers, under a lock)
+GraphConnections = 1
+
+# Event loop the node runs on, "asyncio" or "uvloop", falling back to
+# asyncio's if the one named is not installed
+EventLoop = "asyncio"
+
+# Seconds a prod cycle of the node should take at most, the number of
+# messages a cycle handles adapts between ProdBudgetMin and ProdBudgetMax to
+# keep to it, e.g. 0.05. None lets every cycle handle as many messages as the
+# looper allows
+ProdCycleTarget = None
+ProdBudgetMin = 20
+ProdBudgetMax = 2000
+
+# Shares of a cycle's budget kept for client writes, client reads, replies
+# from the read workers and background work, such as an observer adding the
+# transactions it caught up with to its graph, however many node messages are
+# waiting, node messages get the rest
+ClientWriteShare = 0.1
+ClientReadShare = 0.1
+ReadReplyShare = 0.1
+BackgroundShare = 0.05
+
+# Seconds between the logged metrics of the prod budget
+ProdBudgetReportInterval = 60
+
+# Requests a second each identifier may send as (reads, writes), by the
+# role of the identifier, None for no limit, e.g.
+# {"trustee": (200, 100), "steward": (200, 100), "sponsor": (100, 50),
+#  "user": (20, 5)}
+# Only signed requests count towards the limits of their identifier, once
+# their signature is verified. No limits at all if None
+ClientRateLimits = None
+
+# Requests a second a single client connection may send as (reads, writes),
+# whatever their identifiers. Requests over the limit are refused before
+# their signature is checked
+ClientConnectionRateLimits = (400, 100)
+
+# Seconds worth of requests a client may send at once within its limits
+ClientRateBurstSeconds = 5
+
+# Seconds the node's looper sleeps after a prod cycle which handled nothing,
+# unless one of the node's timers is due sooner. The stacks are polled, so
+# more saves CPU on an idle node but delays the first message it gets
+IdleProdInterval = 0.01
+
+# Seconds between the ledger statuses an observer node sends to the pool to
+# learn about and catch up with newly ordered transactions
+ObserverSyncInterval = 5
+
+# File (relative to the node's data directory) journaling the state trie from
+# which replies to reads get their state proofs, e.g. "state_trie", no proofs
+# are given if None. A file written before attributes were keyed by their
+# hash in the ledger has to be removed so the state is built again.
+StateTrieFile = None
+
+# Number of the most recent state roots kept to build proofs against
+StateRootHistorySize = 1000
+
+# Number of updates journaled by the state trie, the attribute index or the
+# transaction history index after which it writes a snapshot of its whole
+# content and empties its journal
+IndexSnapshotInterval = 10000
+
+# File (relative to the node's data directory) journaling the index of the
+# latest value of every raw attribute, e.g. "attr_index", GET_ATTR reads the
+# graph if None
+AttributeIndexFile = None
+
+# File (relative to the node's data directory) journaling the index of the
+# transactions GET_TXNS returns to every nym, e.g. "txn_history", the index is
+# built from the ledger at every start if None
+TxnHistoryFile = None
+
+# File (relative to the node's data directory) keeping the payloads of large
+# attributes once each by their sha256, e.g. "attr_blobs", the graph and the
+# attribute index then only refer to them. Attributes stay in the graph if
+# None. Attributes the graph already has stay there, only those added after
+# it is set go to the blob file, which the graph then refers to, so it must
+# not be unset again
+AttributeBlobFile = None
+
+# Size in bytes from which an attribute payload goes to the blob file
+AttributeBlobMinSize = 1024
+
+# File (relative to the node's data directory) keeping the Bloom filter over
+# all nyms which answers most lookups of unknown nyms without the graph,
+# e.g. "nym_filter", every lookup goes to the graph if None
+NymFilterFile = None
+
+# Number of nyms the filter is sized for and its false positive rate at that
+# size, changing either rebuilds the filter from the ledger at startup
+NymFilterCapacity = 1000000
+NymFilterErrorRate = 0.001
+
+# Number of replies to the most recently ordered writes kept in memory to
+# answer clients retrying them, 0 disables it
+RecentReplyCacheSize = 10000
+
+# Format of the files of the domain and config ledgers, "text" or "binary".
+# Binary ledgers are kept in files with a ".bin" suffix and hash to the same
+# Merkle roots, convert the existing ledgers with the convert_sovrin_ledger
+# script before switching, otherwise the node catches up from the pool
+LedgerFormat = "text"
+
+# Number of transactions in each segment of the domain and config ledgers, 0
+# keeps each ledger in one file. Full segments are sealed with the root of
+# their Merkle tree, a power of two makes that a subtree of the ledger's.
+# Changing it needs the ledgers caught up again from the pool
+LedgerSegmentSize = 0
+
+# Whether sealed ledger segments are compressed
+CompressSealedSegments = False
+
+# Largest number of nyms a single GET_NYMS request may ask for
+MaxNymsPerRequest = 100
+
+# Largest number of NYMs a single NYMS request may add
+MaxNymsPerBatch = 1000
+
+# Unix socket (relative to the node's data directory) over which a client
+# gateway, started with start_sovrin_gateway, forwards the requests it
+# authenticated. None if clients only connect to the node itself
+GatewaySocket = None
+
+# Number of clients of gateways the node remembers the gateway connection
+# of, those which sent a request the longest ago are forgotten first and get
+# no reply to requests still in progress
+GatewayClientsSize = 100000
+
+# Seconds a gateway answers a repeated read with the reply the node gave the
+# last time, 0 forwards every read, and how many replies it keeps
+GatewayReadCacheSeconds = 1
+GatewayReadCacheSize = 10000
+
+
+def addNodeDefaults(config):
+    """
+    Set every default of this module on `config` which it does not have yet
+    """
+    for name, value in globals().items():
+        if name[0].isupper() and not hasattr(config, name):
+            setattr(config, name, value)
+    return config
@@ -0,0 +1,202 @@
+"""
+Payloads of attributes kept once each, by their sha256, outside the identity
+graph and the attribute index, which then only hold references to them. The
+digest is the one the ledger already has for the attribute (see
+`Node.hashAttribTxn`), so equal payloads of different identities are stored
+once and the hash of a stored attribute is known without reading it.
+
+A reference replaces the payload of RAW or ENC. Raw attributes stay JSON
+objects with every attribute name mapped to `{"@blob": digest}` so that
+lookups by name still work, an ENC payload becomes the JSON of the
+reference.
+"""
+import json
+import mmap
+import os
+import struct
+from hashlib import sha256
+from typing import Dict, Optional
+
+from plenum.common.log import getlogger
+from plenum.common.txn import RAW, ENC
+
+from sovrin_node.common.json_encoding import encodeJson
+
+logger = getlogger()
+
+BLOB = "@blob"
+
+# sha256 of the payload, then its length
+_header = struct.Struct('>32sI')
+
+
+def blobRef(digest: str) -> Dict[str, str]:
+    return {BLOB: digest}
+
+
+def refDigest(value) -> Optional[str]:
+    """
+    Digest `value` refers to if it is a reference
+    """
+    if isinstance(value, dict) and len(value) == 1 and \
+            isinstance(value.get(BLOB), str):
+        return value[BLOB]
+    return None
+
+
+def storedDigest(payload) -> Optional[str]:
+    """
+    Digest of the payload a RAW or ENC value refers to, None if the value
+    is the payload itself
+    """
+    if not isinstance(payload, str) or BLOB not in payload:
+        return None
+    try:
+        value = json.loads(payload)
+    except ValueError:
+        return None
+    digest = refDigest(value)
+    if digest is None and isinstance(value, dict) and value:
+        digests = set(map(refDigest, value.values()))
+        if len(digests) == 1:
+            digest = digests.pop()
+    return digest
+
+
+def hasBlobRef(payload) -> bool:
+    """
+    Whether a RAW or ENC payload has a reference in it, which clients must
+    not send
+    """
+    if not isinstance(payload, str) or BLOB not in payload:
+        return False
+    try:
+        value = json.loads(payload)
+    except ValueError:
+        return False
+    if refDigest(value):
+        return True
+    return isinstance(value, dict) and any(map(refDigest, value.values()))
+
+
+class AttributeBlobStore:
+    """
+    Append-only file of attribute payloads, each after its digest and
+    length, read through a memory map. Payloads shorter than `minSize`
+    bytes are not worth a reference and stay where they are.
+    """
+
+    def __init__(self, path: str, minSize: int = 1024):
+        self.path = path
+        self.minSize = minSize
+        # digest -> (offset of the payload, its length)
+        self._blobs = {}
+        self._file = open(path, 'a+b')
+        self._size = 0
+        self._map = None
+        self._scan()
+
+    def _scan(self):
+        size = os.fstat(self._file.fileno()).st_size
+        offset = 0
+        self._file.seek(0)
+        while offset + _header.size <= size:
+            digest, length = _header.unpack(self._file.read(_header.size))
+            start = offset + _header.size
+            if start + length > size:
+                break
+            self._blobs[digest] = (start, length)
+            offset = start + length
+            self._file.seek(offset)
+        if offset != size:
+            logger.warning("{} ends in a partly written payload, dropping "
+                           "it".format(self.path))
+            self._file.truncate(offset)
+        self._size = offset
+
+    def __len__(self):
+        return len(self._blobs)
+
+    def __contains__(self, digest: str):
+        return bytes.fromhex(digest) in self._blobs
+
+    def put(self, payload: str) -> str:
+        """
+        Store `payload` if it is not stored yet and give its digest
+        """
+        data = payload.encode()
+        digest = sha256(data).digest()
+        if digest not in self._blobs:
+            self._file.write(_header.pack(digest, len(data)) + data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._blobs[digest] = (self._size + _header.size, len(data))
+            self._size += _header.size + len(data)
+        return digest.hex()
+
+    def get(self, digest: str) -> Optional[memoryview]:
+        """
+        The payload with `digest` as a view of the file, without copying it
+        """
+        blob = self._blobs.get(bytes.fromhex(digest))
+        if blob is None:
+            return None
+        start, length = blob
+        if self._map is None or len(self._map) < start + length:
+            # Views of the previous map keep it open until they are released
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        return memoryview(self._map)[start:start + length]
+
+    def getText(self, digest: str) -> str:
+        view = self.get(digest)
+        if view is None:
+            raise KeyError("no attribute payload with digest {}".
+                           format(digest))
+        return str(view, 'utf-8')
+
+    def stash(self, txn: Dict) -> Dict:
+        """
+        `txn`, copied if changed, with a RAW or ENC payload of at least
+        `minSize` bytes stored and replaced by a reference
+        """
+        if RAW in txn and self._large(txn[RAW]):
+            try:
+                raw = json.loads(txn[RAW])
+            except ValueError:
+                return txn
+            if not isinstance(raw, dict) or not raw:
+                return txn
+            ref = blobRef(self.put(txn[RAW]))
+            return dict(txn, **{RAW: encodeJson(dict.fromkeys(raw, ref))})
+        if ENC in txn and self._large(txn[ENC]):
+            return dict(txn, **{ENC: encodeJson(blobRef(self.put(txn[ENC])))})
+        return txn
+
+    def _large(self, payload) -> bool:
+        return isinstance(payload, str) and len(payload) >= self.minSize
+
+    def restore(self, txn: Dict) -> Dict:
+        """
+        `txn`, copied if changed, with the payloads references stand for
+        """
+        for key in (RAW, ENC):
+            digest = storedDigest(txn.get(key))
+            if digest:
+                txn = dict(txn, **{key: self.getText(digest)})
+        return txn
+
+    def attrValue(self, value, name: str):
+        """
+        Value of raw attribute `name` which is `value` in the graph or the
+        attribute index
+        """
+        digest = refDigest(value)
+        if digest is None:
+            return value
+        return json.loads(self.getText(digest))[name]
+
+    def close(self):
+        self._map = None
+        if not self._file.closed:
+            self._file.close()
@@ -0,0 +1,74 @@
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from ledger.util import F
+from plenum.common.txn import RAW
+from plenum.common.types import f
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, ATTRIB
+from sovrin_node.persistence.journal import JournaledIndex
+from sovrin_node.persistence.txn_index import TxnIndex
+
+
+class AttributeIndex(JournaledIndex, TxnIndex):
+    """
+    The latest value and seqNo of every raw attribute of every nym. The
+    ledger only has hashes of attributes, so every update is appended to a
+    journal, see `SnapshotJournal`, which a flush after `snapshotEvery`
+    updates compacts into a snapshot of every attribute.
+    """
+
+    rebuiltFromLedger = False
+
+    def __init__(self, journalPath: str = None, snapshotEvery: int = 10000):
+        # (nym, attribute name) -> (value, seqNo)
+        self._attrs = {}    # type: Dict[Tuple[str, str], Tuple[Any, int]]
+        self._openJournal(journalPath, snapshotEvery)
+
+    def addTxn(self, txn: Dict):
+        seqNo = txn.get(F.seqNo.name)
+        if not seqNo or seqNo <= self.lastSeqNo:
+            return
+        self.lastSeqNo = seqNo
+        if txn[TXN_TYPE] != ATTRIB or RAW not in txn:
+            return
+        try:
+            raw = json.loads(txn[RAW])
+        except ValueError:
+            # Transactions coming from the ledger only have the hash
+            return
+        if not isinstance(raw, dict):
+            return
+        nym = txn.get(TARGET_NYM) or txn[f.IDENTIFIER.nm]
+        self._replay([seqNo, nym, raw])
+        self._journalAppend([seqNo, nym, raw])
+
+    def get(self, nym, name) -> Optional[Tuple[Any, int]]:
+        return self._attrs.get((nym, name))
+
+    def has(self, nym, name) -> bool:
+        return (nym, name) in self._attrs
+
+    def getRawAttrs(self, nym, *attrNames) -> Dict[str, Tuple[Any, int]]:
+        """
+        Same as `IdentityGraph.getRawAttrs`
+        """
+        return {name: self._attrs[(nym, name)] for name in attrNames
+                if (nym, name) in self._attrs}
+
+    def _replay(self, record):
+        seqNo, nym, raw = record
+        for name, value in raw.items():
+            self._attrs[(nym, name)] = (value, seqNo)
+
+    def _loadSnapshot(self, header, records):
+        for nym, name, value, seqNo in records:
+            self._attrs[(nym, name)] = (value, seqNo)
+        return True
+
+    def _snapshotRecords(self):
+        return ([nym, name, value, seqNo]
+                for (nym, name), (value, seqNo) in self._attrs.items())
+
+    def _clear(self):
+        self._attrs = {}
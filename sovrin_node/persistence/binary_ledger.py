@@ -0,0 +1,261 @@
+"""
+A ledger which keeps its transactions in `BinarySerializer` records while
+its Merkle tree is still built from the leaves of the text format, so a
+ledger converted to binary keeps every root hash, audit path and consistency
+proof it had and nodes using either format agree with each other.
+"""
+import os
+import struct
+from array import array
+from collections import OrderedDict
+from typing import Optional
+
+from ledger.ledger import Ledger
+from ledger.serializers.compact_serializer import CompactSerializer
+from ledger.serializers.json_serializer import JsonSerializer
+from ledger.tree_hasher import TreeHasher
+from plenum.common.log import getlogger
+
+from sovrin_node.persistence.binary_serializer import BinarySerializer
+
+logger = getlogger()
+
+_recordLength = struct.Struct('>I')
+
+ReadChunkSize = 1 << 20
+
+# Value of the `LedgerFormat` setting choosing binary ledgers
+BINARY_FORMAT = "binary"
+
+
+class BinaryFileStore:
+    """
+    Append-only file of length-prefixed records whose keys are their
+    positions starting at 1, usable as the transaction log of a `Ledger` in
+    place of its line-based `TextFileStore`. The offsets of the records are
+    found when the file is opened.
+    """
+
+    def __init__(self, dbDir: str, dbName: str, ensureDurability=True):
+        self.dbPath = os.path.join(dbDir, dbName)
+        self.ensureDurability = ensureDurability
+        self._file = None
+        self._offsets = array('Q')
+        self._size = 0
+        os.makedirs(dbDir, exist_ok=True)
+        self.open()
+
+    def open(self):
+        self._file = open(self.dbPath, 'a+b')
+        self._offsets = array('Q')
+        size = os.fstat(self._file.fileno()).st_size
+        offset = 0
+        self._file.seek(0)
+        while offset + _recordLength.size <= size:
+            length, = _recordLength.unpack(
+                self._file.read(_recordLength.size))
+            end = offset + _recordLength.size + length
+            if end > size:
+                break
+            self._offsets.append(offset)
+            self._file.seek(end)
+            offset = end
+        if offset != size:
+            logger.warning("{} ends in a partly written record, dropping it".
+                           format(self.dbPath))
+            self._file.truncate(offset)
+        self._size = offset
+
+    @property
+    def closed(self):
+        return self._file is None or self._file.closed
+
+    @property
+    def numKeys(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def offsets(self) -> array:
+        """
+        Offset of every record in the file
+        """
+        return array('Q', self._offsets)
+
+    @property
+    def lastKey(self) -> Optional[str]:
+        return str(len(self._offsets)) if self._offsets else None
+
+    def put(self, value: bytes, key=None):
+        if key is not None and int(key) != len(self._offsets) + 1:
+            raise ValueError("{} can only append record {}, not {}".
+                             format(self.dbPath, len(self._offsets) + 1, key))
+        if isinstance(value, str):
+            value = value.encode()
+        self._file.write(_recordLength.pack(len(value)) + value)
+        self._file.flush()
+        if self.ensureDurability:
+            os.fsync(self._file.fileno())
+        self._offsets.append(self._size)
+        self._size += _recordLength.size + len(value)
+
+    def get(self, key) -> Optional[bytes]:
+        index = int(key) - 1
+        if not 0 <= index < len(self._offsets):
+            return None
+        self._file.seek(self._offsets[index])
+        length, = _recordLength.unpack(self._file.read(_recordLength.size))
+        return self._file.read(length)
+
+    def _records(self):
+        """
+        Every record in order, read in large chunks through a file of its
+        own so that lookups while iterating do not move it
+        """
+        count = len(self._offsets)
+        with open(self.dbPath, 'rb') as file:
+            data = b''
+            pos = 0
+            for _ in range(count):
+                if len(data) - pos < _recordLength.size:
+                    data = data[pos:] + file.read(ReadChunkSize)
+                    pos = 0
+                length, = _recordLength.unpack_from(data, pos)
+                start = pos + _recordLength.size
+                end = start + length
+                if end > len(data):
+                    data = data[pos:] + file.read(max(ReadChunkSize,
+                                                      end - len(data)))
+                    start, end, pos = start - pos, end - pos, 0
+                yield data[start:end]
+                pos = end
+
+    def iterator(self, includeKey=True, includeValue=True, prefix=None):
+        for i, value in enumerate(self._records(), 1):
+            key = str(i)
+            if prefix and not key.startswith(prefix):
+                continue
+            if includeKey and includeValue:
+                yield key, value
+            elif includeKey:
+                yield key
+            else:
+                yield value
+
+    def reset(self):
+        self._file.truncate(0)
+        self._offsets = array('Q')
+        self._size = 0
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+
+
+class BinaryLedger(Ledger):
+    """
+    `Ledger` storing its transactions with a `BinarySerializer` over
+    `fields`, the JSON-like pairs format if None. Leaves are hashed as
+    `hashSerializer` serializes them, which must be the serializer the
+    ledger used in text format.
+
+    A transaction is thus serialized twice when it is added, as its record
+    and as the leaf hashed. Hashing the record instead would change every
+    root hash, audit path and consistency proof, so a node with a binary
+    ledger could neither agree with nodes which have text ledgers nor catch
+    up from them, and a converted ledger would not match its pool's.
+    """
+
+    def __init__(self, tree, dataDir, fields: OrderedDict = None,
+                 hashSerializer=None, fileName=None, ensureDurability=True):
+        self.hashSerializer = hashSerializer or JsonSerializer()
+        super().__init__(tree, dataDir=dataDir,
+                         serializer=BinarySerializer(fields),
+                         fileName=fileName,
+                         ensureDurability=ensureDurability)
+
+    def start(self, loop=None, ensureDurability=True):
+        if self._transactionLog and not self._transactionLog.closed:
+            logger.debug("Ledger already started.")
+            return
+        self._transactionLog = BinaryFileStore(
+            self.dataDir, self._transactionLogName,
+            ensureDurability=ensureDurability and self.ensureDurability)
+
+    def serializeLeaf(self, leafData):
+        return self.hashSerializer.serialize(leafData)
+
+
+def binaryFileName(fileName: str) -> str:
+    return fileName + '.bin'
+
+
+def textRecords(path):
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.rstrip('\r\n')
+            if not line:
+                continue
+            # Logs written with keys have the seqNo and a tab first
+            key, sep, value = line.partition('\t')
+            yield value if sep and key.isdigit() else line
+
+
+def merkleRoot(leafHashes, hasher: TreeHasher) -> bytes:
+    """
+    Root of the Merkle tree with the given leaf hashes, which may be an
+    iterator, keeping only the roots of its complete subtrees in memory
+    """
+    # (leaf count, hash) of complete subtrees, the largest first
+    subtrees = []
+    for leafHash in leafHashes:
+        size, h = 1, leafHash
+        while subtrees and subtrees[-1][0] == size:
+            leftSize, left = subtrees.pop()
+            size, h = leftSize + size, hasher.hash_children(left, h)
+        subtrees.append((size, h))
+    if not subtrees:
+        return hasher.hash_empty()
+    root = subtrees[-1][1]
+    for _, left in reversed(subtrees[:-1]):
+        root = hasher.hash_children(left, root)
+    return root
+
+
+def convertLedger(textPath: str, binaryPath: str,
+                  fields: OrderedDict = None) -> bytes:
+    """
+    Write the transactions of the text ledger at `textPath` to a new binary
+    ledger at `binaryPath`, `fields` being those of the `CompactSerializer`
+    the text ledger uses, or None for a JSON ledger. Every record is checked
+    to give back exactly the leaf it came from, so the Merkle root, which is
+    returned, does not change.
+    """
+    if os.path.exists(binaryPath):
+        raise FileExistsError(binaryPath)
+    textSerializer = CompactSerializer(fields) if fields else JsonSerializer()
+    binarySerializer = BinarySerializer(fields)
+    hasher = TreeHasher()
+    dirName, fileName = os.path.split(os.path.abspath(binaryPath))
+    store = BinaryFileStore(dirName, fileName, ensureDurability=False)
+
+    def convert():
+        for seqNo, text in enumerate(textRecords(textPath), 1):
+            txn = textSerializer.deserialize(text)
+            record = binarySerializer.serialize(txn)
+            leaf = textSerializer.serialize(
+                binarySerializer.deserialize(record))
+            if leaf != text.encode():
+                raise ValueError("transaction {} of {} does not survive the "
+                                 "conversion: {}".format(seqNo, textPath,
+                                                         text))
+            store.put(record)
+            yield hasher.hash_leaf(leaf)
+
+    try:
+        root = merkleRoot(convert(), hasher)
+    except Exception:
+        store.close()
+        os.remove(binaryPath)
+        raise
+    store.close()
+    return root
@@ -0,0 +1,192 @@
+"""
+Binary record format for ledger transactions, an alternative to the
+pipe-delimited text of `CompactSerializer`.
+
+With ordered fields a record is one tag byte per field, then a header with
+an entry for every field which is not None, then the values of the fields.
+A value is kept as its type: ints which fit in 64 bits as their header
+entry, lowercase hex strings of up to 64 bytes (hashes) as the raw bytes
+they spell and other strings as UTF-8, their header entry being their
+length. Reading a record is then one struct unpacking and slicing, with no
+splitting or int parsing. Without fields, as for the JSON-serialized config
+ledger, a record is a sequence of (name, value) pairs.
+"""
+import json
+import re
+import struct
+from collections import OrderedDict
+from typing import Dict
+
+from ledger.serializers.mapping_serializer import MappingSerializer
+
+NONE = 0
+STR = 1
+LONG_STR = 2
+HEX = 3
+INT = 4
+JSON = 5
+SMALL_INT = 6
+
+_smallInts = range(-(1 << 63), 1 << 63)
+
+_hexValue = re.compile('^(?:[0-9a-f]{2}){1,64}$')
+_pairCount = struct.Struct('>H')
+_nameLength = struct.Struct('>B')
+_valueHeader = struct.Struct('>BI')
+
+
+def _encodeValue(value):
+    """
+    Tag and bytes of `value`
+    """
+    if value is None:
+        return NONE, b''
+    if isinstance(value, str):
+        if _hexValue.match(value):
+            return HEX, bytes.fromhex(value)
+        encoded = value.encode()
+        return (STR if len(encoded) <= 0xffff else LONG_STR), encoded
+    if isinstance(value, int) and not isinstance(value, bool):
+        return INT, value.to_bytes((value.bit_length() + 8) // 8, 'big',
+                                   signed=True)
+    return JSON, json.dumps(value, sort_keys=True).encode()
+
+
+def _decodeInt(encoded: bytes) -> int:
+    return int.from_bytes(encoded, 'big', signed=True)
+
+
+def _decodeJson(encoded: bytes):
+    return json.loads(encoded.decode())
+
+
+# Tag -> function giving the value from its bytes, None for values which
+# are their header entry
+_decoders = {
+    SMALL_INT: None,
+    STR: bytes.decode,
+    LONG_STR: bytes.decode,
+    HEX: bytes.hex,
+    INT: _decodeInt,
+    JSON: _decodeJson
+}
+
+
+class _Layout:
+    """
+    How to read the records with the same tags: the struct of the header
+    after the tags, and the names and decoders of the fields present
+    """
+    __slots__ = ('header', 'start', 'names', 'decoders', 'absent')
+
+    def __init__(self, fields, tags: bytes):
+        present = [(name, tag) for name, tag in zip(fields, tags)
+                   if tag != NONE]
+        self.header = struct.Struct('>' + ''.join(
+            self.entryFormat(tag) for _, tag in present))
+        self.start = len(tags) + self.header.size
+        self.names = [name for name, _ in present]
+        self.decoders = [_decoders[tag] for _, tag in present]
+        self.absent = [name for name, tag in zip(fields, tags)
+                       if tag == NONE]
+
+    @staticmethod
+    def entryFormat(tag) -> str:
+        if tag == SMALL_INT:
+            return 'q'
+        if tag in (LONG_STR, JSON, INT):
+            return 'I'
+        return 'H'
+
+
+class BinarySerializer(MappingSerializer):
+    """
+    Serializes transactions to the binary records described above, always
+    to bytes. Like `CompactSerializer` it only keeps the given `fields` and
+    gives None for the ones a transaction does not have.
+    """
+
+    def __init__(self, fields: OrderedDict = None):
+        self.fields = fields
+        # Tags -> `_Layout`, records of the same transaction type mostly
+        # share their tags
+        self._layouts = {}
+
+    def _layout(self, fields, tags: bytes) -> _Layout:
+        layout = self._layouts.get(tags)
+        if layout is None:
+            layout = _Layout(fields, tags)
+            if fields is self.fields:
+                self._layouts[tags] = layout
+        return layout
+
+    def serialize(self, data: Dict, fields=None, toBytes=True) -> bytes:
+        fields = fields or self.fields
+        if not fields:
+            return self._serializePairs(data)
+        tags = bytearray(len(fields))
+        entries = []
+        values = []
+        for i, value in enumerate(map(data.get, fields)):
+            # Empty values are None in the text format too
+            if value is None or value == '' or value == {}:
+                continue
+            if type(value) is int and value in _smallInts:
+                tags[i] = SMALL_INT
+                entries.append(value)
+                continue
+            tags[i], encoded = _encodeValue(value)
+            entries.append(len(encoded))
+            values.append(encoded)
+        tags = bytes(tags)
+        header = self._layout(fields, tags).header.pack(*entries)
+        return b''.join([tags, header] + values)
+
+    def deserialize(self, data: bytes, fields=None) -> Dict:
+        fields = fields or self.fields
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        if not fields:
+            return self._deserializePairs(data)
+        layout = self._layout(fields, data[:len(fields)])
+        result = dict.fromkeys(layout.absent)
+        pos = layout.start
+        for name, decode, entry in zip(layout.names, layout.decoders,
+                                       layout.header.unpack_from(
+                                           data, len(fields))):
+            if decode is None:
+                result[name] = entry
+            else:
+                end = pos + entry
+                result[name] = decode(data[pos:end])
+                pos = end
+        return result
+
+    @staticmethod
+    def _serializePairs(data: Dict) -> bytes:
+        parts = [_pairCount.pack(len(data))]
+        for name in sorted(data):
+            encodedName = name.encode()
+            tag, encoded = _encodeValue(data[name])
+            parts.append(_nameLength.pack(len(encodedName)))
+            parts.append(encodedName)
+            parts.append(_valueHeader.pack(tag, len(encoded)))
+            parts.append(encoded)
+        return b''.join(parts)
+
+    @staticmethod
+    def _deserializePairs(data: bytes) -> Dict:
+        count, = _pairCount.unpack_from(data, 0)
+        pos = _pairCount.size
+        result = {}
+        for _ in range(count):
+            nameLength = data[pos]
+            pos += 1
+            name = data[pos:pos + nameLength].decode()
+            pos += nameLength
+            tag, length = _valueHeader.unpack_from(data, pos)
+            pos += _valueHeader.size
+            result[name] = _decoders[tag](data[pos:pos + length]) \
+                if tag != NONE else None
+            pos += length
+        return result
@@ -0,0 +1,123 @@
+import asyncio
+from concurrent.futures import Future
+from queue import Queue
+from threading import Thread
+from typing import Any, Callable, List
+
+
+class GraphPool:
+    """
+    Identity graphs over `size` database connections, each made by
+    `newGraph` and used only by a worker thread of its own. Calls are queued
+    to whichever worker is free, so as many lookups as there are connections
+    are in flight at once.
+
+    Calling a method of the graph on the pool waits for its result, the sync
+    face. `submit` gives a `concurrent.futures.Future` and `callAsync` an
+    asyncio future, the async face. Attributes which are not methods are
+    those of the first graph.
+    """
+
+    def __init__(self, newGraph: Callable[[], Any], size: int):
+        self._graphs = [newGraph() for _ in range(size)]
+        self._wrapped = {}
+        self._queue = Queue()
+        self.stopped = False
+        self._workers = [Thread(target=self._work, args=(graph,),
+                                name="graph{}".format(i), daemon=True)
+                         for i, graph in enumerate(self._graphs)]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def graph(self):
+        return self._graphs[0]
+
+    @property
+    def size(self) -> int:
+        return len(self._graphs)
+
+    def _work(self, graph):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, name, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(getattr(graph, name)(*args, **kwargs))
+            except Exception as ex:
+                future.set_exception(ex)
+
+    def submit(self, name: str, *args, **kwargs) -> Future:
+        """
+        Call the graph method `name` on a free connection
+        """
+        if self.stopped:
+            raise RuntimeError("graph pool is stopped")
+        future = Future()
+        self._queue.put((future, name, args, kwargs))
+        return future
+
+    def call(self, name: str, *args, **kwargs):
+        return self.submit(name, *args, **kwargs).result()
+
+    def callAsync(self, name: str, *args, loop=None, **kwargs) \
+            -> asyncio.Future:
+        return asyncio.wrap_future(self.submit(name, *args, **kwargs),
+                                   loop=loop)
+
+    def gather(self, *calls, returnExceptions=False) -> List:
+        futures = [self.submit(name, *args) for name, *args in calls]
+        results = []
+        for future in futures:
+            ex = future.exception()
+            if ex is not None and not returnExceptions:
+                raise ex
+            results.append(ex if ex is not None else future.result())
+        return results
+
+    def __getattr__(self, item):
+        if item in self._wrapped:
+            return self._wrapped[item]
+        attr = getattr(self._graphs[0], item)
+        if not callable(attr):
+            return attr
+
+        def pooled(*args, **kwargs):
+            return self.call(item, *args, **kwargs)
+
+        self._wrapped[item] = pooled
+        return pooled
+
+    def close(self):
+        """
+        Stop the workers once the calls already queued are done
+        """
+        if self.stopped:
+            return
+        self.stopped = True
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+
+def gather(graph, *calls, returnExceptions=False) -> List:
+    """
+    Results of `calls` to `graph`, each a method name and its arguments,
+    all in flight together if `graph` is a pool. The first call which fails
+    raises, unless `returnExceptions`, when its exception is its result.
+    """
+    if isinstance(graph, GraphPool):
+        return graph.gather(*calls, returnExceptions=returnExceptions)
+    results = []
+    for name, *args in calls:
+        try:
+            results.append(getattr(graph, name)(*args))
+        except Exception as ex:
+            if not returnExceptions:
+                raise
+            results.append(ex)
+    return results
@@ -0,0 +1,53 @@
+from typing import Dict, Optional
+
+from ledger.util import F
+from plenum.common.txn import VERKEY
+from plenum.common.types import f
+
+from sovrin_common.persistence.identity_graph import \
+    IdentityGraph as CommonIdentityGraph, Edges
+from sovrin_common.txn import NYM, TXN_ID, TARGET_NYM, ROLE, TXN_TIME
+
+
+def quoted(value: str) -> str:
+    return "'{}'".format(value.replace("\\", "\\\\").replace("'", "\\'"))
+
+
+class IdentityGraph(CommonIdentityGraph):
+    """
+    The identity graph with the lookups only the node needs
+    """
+
+    def getAddNymTxns(self, *nyms) -> Dict[str, Optional[Dict]]:
+        """
+        The NYM transactions of `nyms` by nym, None for the nyms which were
+        never added. The edges which added the nyms are read with a single
+        query, only nyms without one, those of the genesis transactions,
+        are looked up one by one.
+        """
+        txns = dict.fromkeys(nyms)
+        if not txns:
+            return txns
+        cmd = "select {txnId}, {role}, {seqNo}, {txnTime}, {dest}, " \
+              "out.{nym} as {frm}, in.{verkey} as {verkey} from {edge} " \
+              "where {dest} in [{nyms}]".format(
+                  txnId=TXN_ID, role=ROLE, seqNo=F.seqNo.name,
+                  txnTime=TXN_TIME, dest=TARGET_NYM, nym=NYM,
+                  frm=f.IDENTIFIER.nm, verkey=VERKEY, edge=Edges.AddsNym,
+                  nyms=", ".join(quoted(nym) for nym in txns))
+        for record in self.client.command(cmd):
+            data = record.oRecordData
+            txn = self.makeResult(NYM, data)
+            txn.update({
+                TXN_ID: data.get(TXN_ID),
+                ROLE: data.get(ROLE),
+                TARGET_NYM: data[TARGET_NYM],
+                f.IDENTIFIER.nm: data.get(f.IDENTIFIER.nm)
+            })
+            if data.get(VERKEY) is not None:
+                txn[VERKEY] = data[VERKEY]
+            txns[data[TARGET_NYM]] = txn
+        for nym, txn in txns.items():
+            if txn is None:
+                txns[nym] = self.getAddNymTxn(nym)
+        return txns
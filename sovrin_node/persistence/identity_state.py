@@ -0,0 +1,138 @@
+import json
+from typing import Dict, Optional
+
+from ledger.util import F
+from plenum.common.txn import RAW, ENC, HASH, NAME, VERSION, VERKEY
+from plenum.common.types import f
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, NYM, ATTRIB, ROLE, \
+    CLAIM_DEF, ISSUER_KEY, DATA, REF
+from sovrin_node.common.json_encoding import encodeJson
+from sovrin_node.persistence.state_trie import StateTrie
+from sovrin_node.persistence.txn_index import TxnIndex
+
+SPONSOR_KEY = "sponsor"
+
+
+def nymKey(nym) -> bytes:
+    return "nym:{}".format(nym).encode()
+
+
+def attrKey(nym, attrHash) -> bytes:
+    return "attr:{}:{}".format(nym, attrHash).encode()
+
+
+def claimDefKey(issuer, name, version) -> bytes:
+    return "claimDef:{}:{}:{}".format(issuer, name, version).encode()
+
+
+def issuerKeyKey(issuer, ref) -> bytes:
+    return "issuerKey:{}:{}".format(issuer, ref).encode()
+
+
+def encodeValue(value) -> bytes:
+    return encodeJson(value).encode()
+
+
+def ledgerAttrHash(txn) -> Optional[str]:
+    """
+    What the ledger has of the payload of an ATTRIB: the sha256 of its RAW
+    or ENC value, or its HASH
+    """
+    for kind in (RAW, ENC, HASH):
+        if txn.get(kind):
+            return txn[kind]
+    return None
+
+
+class IdentityState(TxnIndex):
+    """
+    Keeps the domain identity state in a `StateTrie`:
+
+    nym -> verkey, role and sponsor
+    (nym, hash of an attribute's payload as in the ledger) -> RAW, ENC or
+    HASH
+    (issuer, name, version) -> claim definition
+    (issuer, claim definition seqNo) -> issuer key
+    """
+
+    # Persisted, so a node does not replay the whole ledger when it starts
+    rebuiltFromLedger = False
+    # The state only has what is in the ledger, so a node which got a
+    # transaction through catch-up has the same root as one which ordered it
+    ledgerAttrs = True
+
+    def __init__(self, trie: StateTrie):
+        self.trie = trie
+
+    @property
+    def lastSeqNo(self):
+        return self.trie.lastSeqNo
+
+    def addTxn(self, txn: Dict):
+        typ = txn[TXN_TYPE]
+        seqNo = txn.get(F.seqNo.name)
+        if seqNo is not None and seqNo <= self.trie.lastSeqNo:
+            # Already in the state, e.g. replayed from the ledger at startup
+            return
+        if typ == NYM:
+            nym = txn[TARGET_NYM]
+            current = self.trie.get(nymKey(nym))
+            value = json.loads(current.decode()) if current else {
+                SPONSOR_KEY: txn.get(f.IDENTIFIER.nm), ROLE: None,
+                VERKEY: None}
+            if ROLE in txn:
+                value[ROLE] = txn[ROLE]
+            if txn.get(VERKEY) is not None:
+                value[VERKEY] = txn[VERKEY]
+            self.trie.set(nymKey(nym), encodeValue(value), seqNo)
+        elif typ == ATTRIB:
+            nym = txn.get(TARGET_NYM) or txn[f.IDENTIFIER.nm]
+            for kind in (RAW, ENC, HASH):
+                if txn.get(kind):
+                    self.trie.set(attrKey(nym, txn[kind]), kind.encode(),
+                                  seqNo)
+                    break
+        elif typ == CLAIM_DEF:
+            data = txn[DATA]
+            if isinstance(data, str):
+                data = json.loads(data)
+            self.trie.set(claimDefKey(txn[f.IDENTIFIER.nm], data[NAME],
+                                      data[VERSION]),
+                          encodeValue(data), seqNo)
+        elif typ == ISSUER_KEY:
+            data = txn[DATA]
+            if isinstance(data, str):
+                data = json.loads(data)
+            self.trie.set(issuerKeyKey(txn[f.IDENTIFIER.nm], txn[REF]),
+                          encodeValue(data), seqNo)
+        if seqNo is not None:
+            self.trie.recordRoot(seqNo)
+
+    @property
+    def rootHash(self) -> bytes:
+        return self.trie.rootHash
+
+    def proveNym(self, nym, seqNo: int = None):
+        return self.trie.prove(nymKey(nym), seqNo)
+
+    def proveAttr(self, nym, attrHash, seqNo: int = None):
+        return self.trie.prove(attrKey(nym, attrHash), seqNo)
+
+    def proveClaimDef(self, issuer, name, version, seqNo: int = None):
+        return self.trie.prove(claimDefKey(issuer, name, version), seqNo)
+
+    def proveIssuerKey(self, issuer, ref, seqNo: int = None):
+        return self.trie.prove(issuerKeyKey(issuer, ref), seqNo)
+
+    def flush(self, ledgerRoot: str = None):
+        self.trie.flush(ledgerRoot)
+
+    def close(self, ledgerRoot: str = None):
+        self.trie.close(ledgerRoot)
+
+    def ledgerCheckpoint(self):
+        return self.trie.ledgerCheckpoint()
+
+    def reset(self):
+        self.trie.reset()
@@ -0,0 +1,212 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from plenum.common.log import getlogger
+
+logger = getlogger()
+
+# Keys of a snapshot's header
+SEQ_NO = "seqNo"
+LEDGER_ROOT = "ledgerRoot"
+
+
+class SnapshotJournal:
+    """
+    Keeps a persisted index as a snapshot of its whole content plus a
+    journal of the JSON records appended since. Taking a snapshot empties
+    the journal, so starting up reads each record once instead of replaying
+    every update ever made.
+
+    The snapshot starts with a header holding the seqNo of the last
+    transaction in it and the domain ledger's root hash at that seqNo, which
+    the node checks against its ledger. Journal records of transactions the
+    snapshot already has are left behind if the node stops between writing
+    the snapshot and emptying the journal, readers skip them by their seqNo.
+    """
+
+    def __init__(self, path: str, snapshotEvery: int = 10000):
+        self.path = path
+        self.snapshotPath = path + ".snapshot"
+        self.snapshotEvery = snapshotEvery
+        # Records appended since the last snapshot
+        self.pending = 0
+        self._file = None
+
+    @staticmethod
+    def _readRecords(path) -> List:
+        records = []
+        if not os.path.exists(path):
+            return records
+        with open(path) as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # The end of a write cut short by a crash
+                    logger.warning("{} ends with an incomplete record".
+                                   format(path))
+                    break
+        return records
+
+    def load(self) -> Tuple[Optional[Dict], List, List]:
+        """
+        Header and records of the snapshot, None and no records if there is
+        none, and the records of the journal. Opens the journal for
+        appending.
+        """
+        snapshot = self._readRecords(self.snapshotPath)
+        header = snapshot.pop(0) if snapshot else None
+        journal = self._readRecords(self.path)
+        self.pending = len(journal)
+        self._file = open(self.path, mode="a")
+        return header, snapshot, journal
+
+    def append(self, record):
+        self._file.write(json.dumps(record))
+        self._file.write("\n")
+        self.pending += 1
+
+    @property
+    def snapshotDue(self) -> bool:
+        return self.pending >= self.snapshotEvery
+
+    def snapshot(self, header: Dict, records: Iterable):
+        """
+        Replace the snapshot with `header` and `records` and empty the
+        journal, whose records the new snapshot has
+        """
+        tmpPath = self.snapshotPath + ".tmp"
+        with open(tmpPath, mode="w") as file:
+            file.write(json.dumps(header))
+            file.write("\n")
+            for record in records:
+                file.write(json.dumps(record))
+                file.write("\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmpPath, self.snapshotPath)
+        self._file.close()
+        self._file = open(self.path, mode="w")
+        self.pending = 0
+
+    def reset(self):
+        """
+        Remove the snapshot and empty the journal
+        """
+        if os.path.exists(self.snapshotPath):
+            os.remove(self.snapshotPath)
+        if self._file:
+            self._file.close()
+        self._file = open(self.path, mode="w")
+        self.pending = 0
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        if self._file and not self._file.closed:
+            self._file.close()
+
+
+class JournaledIndex:
+    """
+    An index persisted through a `SnapshotJournal`, or only living in memory
+    if it has no journal. Every journal record starts with the seqNo of its
+    transaction, or None if it has none.
+
+    Subclasses supply how a record is applied when the journal is replayed
+    (`_replay`), how the snapshot is written and read back
+    (`_snapshotRecords`, `_loadSnapshot`) and how the index is emptied
+    (`_clear`).
+    """
+
+    # seqNo of the last transaction added
+    lastSeqNo = 0
+
+    def _openJournal(self, journalPath: str, snapshotEvery: int):
+        # seqNo and ledger root hash of the last snapshot
+        self.checkpoint = None  # type: Optional[Tuple[int, str]]
+        self._journal = None
+        if journalPath:
+            self._journal = SnapshotJournal(journalPath, snapshotEvery)
+            self._load()
+
+    def _load(self):
+        header, records, updates = self._journal.load()
+        snapshotSeqNo = 0
+        if header:
+            if not self._loadSnapshot(header, records):
+                self.reset()
+                return
+            snapshotSeqNo = header[SEQ_NO]
+            self.lastSeqNo = snapshotSeqNo
+            self.checkpoint = (snapshotSeqNo, header[LEDGER_ROOT])
+        for record in updates:
+            seqNo = record[0]
+            if seqNo is not None and seqNo <= snapshotSeqNo:
+                continue
+            self._replay(record)
+            if seqNo is not None:
+                self.lastSeqNo = max(self.lastSeqNo, seqNo)
+
+    def _journalAppend(self, record):
+        if self._journal:
+            self._journal.append(record)
+
+    def _replay(self, record):
+        raise NotImplementedError
+
+    def _loadSnapshot(self, header: Dict, records: List) -> bool:
+        """
+        Fill the index from a snapshot, False if the snapshot cannot be
+        trusted and the index has to be built again
+        """
+        raise NotImplementedError
+
+    def _snapshotHeader(self, ledgerRoot: str = None) -> Dict:
+        return {SEQ_NO: self.lastSeqNo, LEDGER_ROOT: ledgerRoot}
+
+    def _snapshotRecords(self) -> Iterable:
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def snapshot(self, ledgerRoot: str = None):
+        """
+        Write the whole index to the snapshot with the domain ledger's root
+        hash at `lastSeqNo`, and empty the journal
+        """
+        self._journal.snapshot(self._snapshotHeader(ledgerRoot),
+                               self._snapshotRecords())
+        self.checkpoint = (self.lastSeqNo, ledgerRoot)
+
+    def ledgerCheckpoint(self) -> Optional[Tuple[int, str]]:
+        return self.checkpoint
+
+    def reset(self):
+        self._clear()
+        self.lastSeqNo = 0
+        self.checkpoint = None
+        if self._journal:
+            self._journal.reset()
+
+    def flush(self, ledgerRoot: str = None):
+        if not self._journal:
+            return
+        if ledgerRoot and self._journal.snapshotDue:
+            self.snapshot(ledgerRoot)
+        else:
+            self._journal.flush()
+
+    def close(self, ledgerRoot: str = None):
+        if not self._journal:
+            return
+        if ledgerRoot and self._journal.pending:
+            self.snapshot(ledgerRoot)
+        self._journal.close()
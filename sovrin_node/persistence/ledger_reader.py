@@ -0,0 +1,219 @@
+"""
+Random access to the transactions of a ledger without loading them all: the
+ledger's file is memory-mapped and the offset of every transaction in it is
+kept in an array, which is also saved next to the file so that it only has
+to be extended with the transactions added since.
+"""
+import mmap
+import operator
+import os
+import struct
+from array import array
+from threading import RLock
+from typing import Dict, Iterator, Optional, Tuple
+
+from ledger.ledger import Ledger
+from plenum.common.log import getlogger
+
+from sovrin_node.persistence.binary_ledger import BinaryFileStore
+
+logger = getlogger()
+
+_recordLength = struct.Struct('>I')
+
+
+def offsetsFileName(path: str) -> str:
+    return path + '.offsets'
+
+
+class LedgerReader:
+    """
+    Reads the transactions of `ledger` from its transaction log file, either
+    the text one of `Ledger` or the binary one of `BinaryLedger`.
+
+    Transactions the ledger has but its file does not show yet, e.g. still
+    in a write buffer, are read through the ledger, as is everything for a
+    ledger which is not kept in a file.
+
+    A reader may be used from several threads at once.
+    """
+
+    def __init__(self, ledger: Ledger):
+        self.ledger = ledger
+        store = getattr(ledger, '_transactionLog', None)
+        self.path = getattr(store, 'dbPath', None)
+        self.binary = isinstance(store, BinaryFileStore)
+        self.serializer = ledger.leafSerializer
+        # Offset of every indexed transaction in the file, and the offset up
+        # to which the file is indexed
+        self._starts = array('Q')
+        self._end = 0
+        self._startsFile = None
+        self._file = None
+        self._map = None
+        # Held while the file is indexed and remapped, and while a record is
+        # read from the map
+        self._lock = RLock()
+        if self.path:
+            self._loadStarts()
+
+    @property
+    def indexed(self) -> int:
+        return len(self._starts)
+
+    def _loadStarts(self):
+        indexPath = offsetsFileName(self.path)
+        if os.path.exists(indexPath) and os.path.exists(self.path):
+            with open(indexPath, 'rb') as file:
+                data = file.read()
+            starts = array('Q')
+            starts.frombytes(data[:len(data) - len(data) % starts.itemsize])
+            self._starts = starts
+            ascending = all(map(operator.lt, starts, starts[1:]))
+            self._end = self._recordEnd(len(starts) - 1) \
+                if starts and ascending else None
+            if self._end is None:
+                logger.info("offsets of {} do not match it, indexing it "
+                            "again".format(self.path))
+                self._starts, self._end = array('Q'), 0
+        self._startsFile = open(indexPath, 'ab' if self._starts else 'wb')
+
+    def _recordEnd(self, index: int) -> Optional[int]:
+        """
+        Offset right after the transaction at `index` as the file has it,
+        None if there is no complete transaction there
+        """
+        size = os.path.getsize(self.path)
+        start = self._starts[index]
+        if start >= size:
+            return None
+        with open(self.path, 'rb') as file:
+            if not self.binary and start > 0:
+                file.seek(start - 1)
+                if file.read(1) != b'\n':
+                    return None
+            file.seek(start)
+            if self.binary:
+                header = file.read(_recordLength.size)
+                if len(header) < _recordLength.size:
+                    return None
+                end = start + _recordLength.size + \
+                    _recordLength.unpack(header)[0]
+                return end if end <= size else None
+            line = file.readline()
+            if not line.endswith(b'\n') or not line.strip():
+                return None
+            return start + len(line)
+
+    def refresh(self):
+        """
+        Index the transactions added to the file since the last call
+        """
+        if not self.path or not os.path.exists(self.path):
+            return
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        size = os.path.getsize(self.path)
+        if size < self._end:
+            logger.info("{} got shorter, indexing it again".format(self.path))
+            self._starts, self._end = array('Q'), 0
+            self._startsFile.seek(0)
+            self._startsFile.truncate()
+        if size == self._end:
+            return
+        if self._map is None or len(self._map) < size:
+            self._remap()
+        added = self._indexBinary(size) if self.binary \
+            else self._indexText(size)
+        if added:
+            self._startsFile.write(added.tobytes())
+            self._startsFile.flush()
+            self._starts.extend(added)
+
+    def _remap(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _indexText(self, size) -> array:
+        added = array('Q')
+        pos = self._end
+        while pos < size:
+            end = self._map.find(b'\n', pos, size)
+            if end < 0:
+                # The last line is still being written
+                break
+            if self._map[pos:end].strip():
+                added.append(pos)
+            pos = self._end = end + 1
+        return added
+
+    def _indexBinary(self, size) -> array:
+        added = array('Q')
+        pos = self._end
+        while pos + _recordLength.size <= size:
+            length, = _recordLength.unpack_from(self._map, pos)
+            end = pos + _recordLength.size + length
+            if end > size:
+                break
+            added.append(pos)
+            pos = self._end = end
+        return added
+
+    def _record(self, index: int):
+        start = self._starts[index]
+        if self.binary:
+            length, = _recordLength.unpack_from(self._map, start)
+            start += _recordLength.size
+            return self._map[start:start + length]
+        end = self._starts[index + 1] if index + 1 < len(self._starts) \
+            else self._end
+        line = self._map[start:end].rstrip(b'\r\n')
+        # Logs written with keys have the seqNo and a tab first
+        key, sep, value = line.partition(b'\t')
+        return (value if sep and key.isdigit() else line).decode()
+
+    def getBySeqNo(self, seqNo: int) -> Optional[Dict]:
+        if seqNo < 1 or seqNo > self.ledger.size:
+            return None
+        if seqNo > self.indexed:
+            self.refresh()
+        if seqNo <= self.indexed:
+            with self._lock:
+                record = self._record(seqNo - 1)
+            return self.serializer.deserialize(record)
+        return self.ledger.getBySeqNo(seqNo)
+
+    def txns(self, frm: int = 1, to: int = None,
+             reverse=False) -> Iterator[Tuple[int, Dict]]:
+        """
+        (seqNo, transaction) for every transaction from `frm` to `to`, both
+        included, read one at a time, from the last one if `reverse`
+        """
+        size = self.ledger.size
+        to = size if to is None else min(to, size)
+        self.refresh()
+        seqNos = range(max(frm, 1), to + 1)
+        for seqNo in (reversed(seqNos) if reverse else seqNos):
+            if seqNo <= self.indexed:
+                with self._lock:
+                    record = self._record(seqNo - 1)
+                yield seqNo, self.serializer.deserialize(record)
+            else:
+                yield seqNo, self.ledger.getBySeqNo(seqNo)
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._startsFile is not None:
+                self._startsFile.close()
+                self._startsFile = None
@@ -0,0 +1,133 @@
+import math
+import os
+import struct
+from hashlib import sha256
+from typing import Dict
+
+from ledger.util import F
+from plenum.common.log import getlogger
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, NYM
+from sovrin_node.persistence.txn_index import TxnIndex
+
+logger = getlogger()
+
+# lastSeqNo, count, bits, hashes, domain ledger root hash at lastSeqNo
+HEADER = struct.Struct('>QQQI64s')
+
+
+class NymBloomFilter(TxnIndex):
+    """
+    Bloom filter over every nym added by a NYM. `mightHave` returning False
+    means the nym definitely does not exist, so such lookups need no graph
+    query.
+
+    The bits are saved to `filePath` together with the seqNo of the last
+    transaction in them and the domain ledger's root hash at that seqNo,
+    after every `saveEvery` new nyms and when closed. A missing file or one
+    made with other parameters is ignored, the node then adds all nyms again
+    from the ledger. So does it when the ledger is shorter or has another
+    root at that seqNo, see `Node._checkIndexesAgainstLedger`.
+    """
+
+    rebuiltFromLedger = False
+
+    def __init__(self, filePath: str = None, capacity: int = 1000000,
+                 errorRate: float = 0.001, saveEvery: int = 1000):
+        self.filePath = filePath
+        self.capacity = capacity
+        self.saveEvery = saveEvery
+        self.bitCount = max(8, int(math.ceil(
+            -capacity * math.log(errorRate) / math.log(2) ** 2)))
+        self.hashCount = max(1, int(round(
+            self.bitCount / capacity * math.log(2))))
+        self.bits = bytearray((self.bitCount + 7) // 8)
+        self.count = 0
+        self.lastSeqNo = 0
+        # seqNo and ledger root hash the bits were last saved with
+        self.checkpoint = None
+        self._unsaved = 0
+        if filePath and os.path.exists(filePath):
+            self._load()
+
+    def _positions(self, nym: str):
+        digest = sha256(nym.encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        for i in range(self.hashCount):
+            yield (h1 + i * h2) % self.bitCount
+
+    def add(self, nym: str):
+        for pos in self._positions(nym):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+        self._unsaved += 1
+        if self.count == self.capacity + 1:
+            logger.warning("nym filter holds more than {} nyms, its false "
+                           "positive rate is going up, raise "
+                           "NymFilterCapacity".format(self.capacity))
+
+    def mightHave(self, nym: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7))
+                   for pos in self._positions(nym))
+
+    def addTxn(self, txn: Dict):
+        seqNo = txn.get(F.seqNo.name)
+        if not seqNo or seqNo <= self.lastSeqNo:
+            return
+        self.lastSeqNo = seqNo
+        if txn[TXN_TYPE] == NYM and not self.mightHave(txn[TARGET_NYM]):
+            self.add(txn[TARGET_NYM])
+
+    def _load(self):
+        with open(self.filePath, 'rb') as file:
+            header = file.read(HEADER.size)
+            bits = file.read()
+        if len(header) == HEADER.size:
+            lastSeqNo, count, bitCount, hashCount, ledgerRoot = \
+                HEADER.unpack(header)
+            if (bitCount, hashCount) == (self.bitCount, self.hashCount) and \
+                    len(bits) == len(self.bits):
+                self.bits = bytearray(bits)
+                self.count = count
+                self.lastSeqNo = lastSeqNo
+                ledgerRoot = ledgerRoot.rstrip(b'\0').decode()
+                if ledgerRoot:
+                    self.checkpoint = (lastSeqNo, ledgerRoot)
+                return
+        logger.info("nym filter {} does not match the configured size, it "
+                    "will be rebuilt from the ledger".format(self.filePath))
+
+    def save(self, ledgerRoot: str = None):
+        if not self.filePath:
+            return
+        tmpPath = self.filePath + '.tmp'
+        with open(tmpPath, 'wb') as file:
+            file.write(HEADER.pack(self.lastSeqNo, self.count, self.bitCount,
+                                   self.hashCount,
+                                   (ledgerRoot or '').encode()))
+            file.write(self.bits)
+        os.replace(tmpPath, self.filePath)
+        self.checkpoint = (self.lastSeqNo, ledgerRoot) if ledgerRoot \
+            else None
+        self._unsaved = 0
+
+    def ledgerCheckpoint(self):
+        return self.checkpoint
+
+    def reset(self):
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+        self.lastSeqNo = 0
+        self.checkpoint = None
+        self._unsaved = 0
+        if self.filePath and os.path.exists(self.filePath):
+            os.remove(self.filePath)
+
+    def flush(self, ledgerRoot: str = None):
+        if self._unsaved >= self.saveEvery:
+            self.save(ledgerRoot)
+
+    def close(self, ledgerRoot: str = None):
+        self.save(ledgerRoot)
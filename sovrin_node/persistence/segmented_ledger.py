@@ -0,0 +1,346 @@
+"""
+A ledger whose transaction log is split into segments of a fixed number of
+transactions, each a file of length-prefixed records like the one of
+`BinaryFileStore`.
+
+Only the last segment is written to. Once full it is sealed: the offsets of
+its records are saved next to it, the root of the Merkle tree over its
+leaves is recorded in the manifest of the ledger and it is optionally
+compressed. Sealed segments never change again, so they can be copied,
+backed up or checked one at a time, and a lookup by seqNo only opens the
+segment holding it. With a segment size which is a power of two the root of
+a sealed segment is the root of a subtree of the ledger's Merkle tree.
+"""
+import json
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from ledger.ledger import Ledger
+from ledger.tree_hasher import TreeHasher
+from plenum.common.log import getlogger
+
+from sovrin_node.persistence.binary_ledger import BinaryFileStore, merkleRoot
+from sovrin_node.persistence.ledger_reader import offsetsFileName
+
+logger = getlogger()
+
+_recordLength = struct.Struct('>I')
+
+# Sealed segments kept open for lookups, the least recently used is closed
+# first
+OpenSegments = 4
+
+SEGMENT_SIZE = "segmentSize"
+SEALED = "sealed"
+ROOT = "root"
+COMPRESSED = "compressed"
+
+
+def segmentFileName(dbName: str, index: int) -> str:
+    return "{}.{:06d}".format(dbName, index)
+
+
+def manifestFileName(dbName: str) -> str:
+    return dbName + ".segments"
+
+
+def compressedFileName(path: str) -> str:
+    return path + ".z"
+
+
+def _writeAtomically(path: str, data: bytes):
+    tmpPath = path + ".tmp"
+    with open(tmpPath, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmpPath, path)
+
+
+class SealedSegment:
+    """
+    The records of a sealed segment, read through a memory map of its file
+    or decompressed in memory, and their saved offsets
+    """
+
+    def __init__(self, path: str, compressed: bool):
+        self.path = path
+        self.offsets = array('Q')
+        with open(offsetsFileName(path), 'rb') as file:
+            self.offsets.frombytes(file.read())
+        self._file = None
+        if compressed:
+            with open(compressedFileName(path), 'rb') as file:
+                self.data = zlib.decompress(file.read())
+        else:
+            self._file = open(path, 'rb')
+            self.data = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get(self, index: int) -> bytes:
+        start = self.offsets[index]
+        length, = _recordLength.unpack_from(self.data, start)
+        start += _recordLength.size
+        return self.data[start:start + length]
+
+    def records(self):
+        for index in range(len(self.offsets)):
+            yield self.get(index)
+
+    def close(self):
+        if self._file is not None:
+            self.data.close()
+            self._file.close()
+            self._file = None
+        self.data = None
+
+
+class SegmentedFileStore:
+    """
+    Transaction log of a `Ledger` kept in segments of `segmentSize` records
+    with keys being their positions starting at 1, like `BinaryFileStore`.
+
+    `leafOf` gives the Merkle leaf of a record, the record itself if None,
+    for the roots of the sealed segments. Sealed segments are compressed
+    with zlib if `compress`, a ledger can switch it on or off at any time
+    as every segment records whether it is compressed.
+    """
+
+    def __init__(self, dbDir: str, dbName: str, segmentSize: int,
+                 leafOf: Callable[[bytes], bytes] = None, compress=False,
+                 ensureDurability=True):
+        if segmentSize < 1:
+            raise ValueError("segment size must be positive, not {}".
+                             format(segmentSize))
+        self.dbDir = dbDir
+        self.dbName = dbName
+        self.segmentSize = segmentSize
+        self.leafOf = leafOf
+        self.compress = compress
+        self.ensureDurability = ensureDurability
+        self.hasher = TreeHasher()
+        self.manifestPath = os.path.join(dbDir, manifestFileName(dbName))
+        # Root and whether compressed of every sealed segment
+        self._sealed = []
+        self._open = OrderedDict()
+        self._active = None
+        os.makedirs(dbDir, exist_ok=True)
+        self.open()
+
+    def open(self):
+        self._sealed = self._loadManifest()
+        for index, segment in enumerate(self._sealed):
+            path = self.segmentPath(index)
+            # The segment was compressed but removing its raw file was cut
+            # short
+            if segment[COMPRESSED] and os.path.exists(path):
+                os.remove(path)
+        self._openActive()
+
+    def _loadManifest(self) -> List[dict]:
+        if not os.path.exists(self.manifestPath):
+            return []
+        with open(self.manifestPath) as file:
+            manifest = json.load(file)
+        if manifest[SEGMENT_SIZE] != self.segmentSize:
+            raise ValueError("{} is kept in segments of {} transactions, not "
+                             "{}".format(self.dbName, manifest[SEGMENT_SIZE],
+                                         self.segmentSize))
+        return manifest[SEALED]
+
+    def _saveManifest(self):
+        _writeAtomically(self.manifestPath, json.dumps({
+            SEGMENT_SIZE: self.segmentSize,
+            SEALED: self._sealed
+        }).encode())
+
+    def _openActive(self):
+        self._active = BinaryFileStore(
+            self.dbDir, segmentFileName(self.dbName, len(self._sealed)),
+            ensureDurability=self.ensureDurability)
+        # A full segment left unsealed by a crash
+        if self._active.numKeys >= self.segmentSize:
+            self._seal()
+
+    def segmentPath(self, index: int) -> str:
+        return os.path.join(self.dbDir, segmentFileName(self.dbName, index))
+
+    @property
+    def closed(self):
+        return self._active is None or self._active.closed
+
+    @property
+    def numKeys(self) -> int:
+        return len(self._sealed) * self.segmentSize + self._active.numKeys
+
+    @property
+    def lastKey(self) -> Optional[str]:
+        return str(self.numKeys) if self.numKeys else None
+
+    @property
+    def sealedCount(self) -> int:
+        return len(self._sealed)
+
+    def segmentRoot(self, index: int) -> bytes:
+        return bytes.fromhex(self._sealed[index][ROOT])
+
+    def put(self, value: bytes, key=None):
+        if key is not None and int(key) != self.numKeys + 1:
+            raise ValueError("{} can only append record {}, not {}".
+                             format(self.dbName, self.numKeys + 1, key))
+        self._active.put(value)
+        if self._active.numKeys == self.segmentSize:
+            self._seal()
+
+    def _root(self, records) -> bytes:
+        leafOf = self.leafOf or bytes
+        return merkleRoot((self.hasher.hash_leaf(leafOf(record))
+                           for record in records), self.hasher)
+
+    def _seal(self):
+        """
+        Make the full active segment a sealed one and start the next one
+        """
+        active = self._active
+        path = active.dbPath
+        _writeAtomically(offsetsFileName(path), active.offsets.tobytes())
+        root = self._root(active.iterator(includeKey=False))
+        active.close()
+        if self.compress:
+            with open(path, 'rb') as file:
+                _writeAtomically(compressedFileName(path),
+                                 zlib.compress(file.read()))
+        self._sealed.append({ROOT: root.hex(), COMPRESSED: self.compress})
+        self._saveManifest()
+        if self.compress:
+            os.remove(path)
+        logger.debug("sealed segment {} of {}".format(len(self._sealed) - 1,
+                                                      self.dbName))
+        self._openActive()
+
+    def _segment(self, index: int) -> SealedSegment:
+        segment = self._open.pop(index, None)
+        if segment is None:
+            segment = SealedSegment(self.segmentPath(index),
+                                    self._sealed[index][COMPRESSED])
+            if len(self._open) >= OpenSegments:
+                _, oldest = self._open.popitem(last=False)
+                oldest.close()
+        self._open[index] = segment
+        return segment
+
+    def get(self, key) -> Optional[bytes]:
+        index, position = divmod(int(key) - 1, self.segmentSize)
+        if int(key) < 1 or index > len(self._sealed):
+            return None
+        if index == len(self._sealed):
+            return self._active.get(str(position + 1))
+        return self._segment(index).get(position)
+
+    def _sealedRecords(self, index: int):
+        if index in self._open:
+            yield from self._open[index].records()
+            return
+        segment = SealedSegment(self.segmentPath(index),
+                                self._sealed[index][COMPRESSED])
+        try:
+            yield from segment.records()
+        finally:
+            segment.close()
+
+    def iterator(self, includeKey=True, includeValue=True, prefix=None):
+        def records():
+            for index in range(len(self._sealed)):
+                yield from self._sealedRecords(index)
+            yield from self._active.iterator(includeKey=False)
+
+        for i, value in enumerate(records(), 1):
+            key = str(i)
+            if prefix and not key.startswith(prefix):
+                continue
+            if includeKey and includeValue:
+                yield key, value
+            elif includeKey:
+                yield key
+            else:
+                yield value
+
+    def verifySegment(self, index: int) -> bool:
+        """
+        Whether the records of sealed segment `index` still hash to the
+        root recorded when it was sealed. Segments are independent, so they
+        can be checked in parallel.
+        """
+        try:
+            records = list(self._sealedRecords(index))
+        except (OSError, zlib.error) as ex:
+            logger.warning("cannot read segment {} of {}: {}".
+                           format(index, self.dbName, ex))
+            return False
+        return len(records) == self.segmentSize and \
+            self._root(records) == self.segmentRoot(index)
+
+    def reset(self):
+        self.close()
+        os.remove(self._active.dbPath)
+        for index, segment in enumerate(self._sealed):
+            path = self.segmentPath(index)
+            for name in (path, offsetsFileName(path),
+                         compressedFileName(path)):
+                if os.path.exists(name):
+                    os.remove(name)
+        self._sealed = []
+        if os.path.exists(self.manifestPath):
+            os.remove(self.manifestPath)
+        self._openActive()
+
+    def close(self):
+        for segment in self._open.values():
+            segment.close()
+        self._open.clear()
+        if self._active is not None:
+            self._active.close()
+
+
+class SegmentedLedger(Ledger):
+    """
+    `Ledger` keeping its transactions in a `SegmentedFileStore`, serialized
+    by `serializer`. Leaves are hashed as `hashSerializer` serializes them,
+    `serializer` itself if None, as for `BinaryLedger`.
+    """
+
+    def __init__(self, tree, dataDir, serializer=None, hashSerializer=None,
+                 segmentSize=65536, compress=False, fileName=None,
+                 ensureDurability=True):
+        self.hashSerializer = hashSerializer
+        self.segmentSize = segmentSize
+        self.compress = compress
+        super().__init__(tree, dataDir=dataDir, serializer=serializer,
+                         fileName=fileName,
+                         ensureDurability=ensureDurability)
+
+    def start(self, loop=None, ensureDurability=True):
+        if self._transactionLog and not self._transactionLog.closed:
+            logger.debug("Ledger already started.")
+            return
+        self._transactionLog = SegmentedFileStore(
+            self.dataDir, self._transactionLogName, self.segmentSize,
+            leafOf=self._leafOf if self.hashSerializer else None,
+            compress=self.compress,
+            ensureDurability=ensureDurability and self.ensureDurability)
+
+    def _leafOf(self, record: bytes) -> bytes:
+        return self.serializeLeaf(self.leafSerializer.deserialize(record))
+
+    def serializeLeaf(self, leafData):
+        if self.hashSerializer is None:
+            return super().serializeLeaf(leafData)
+        return self.hashSerializer.serialize(leafData)
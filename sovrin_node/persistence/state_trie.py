@@ -0,0 +1,279 @@
+"""
+An authenticated key/value store: a binary Merkle radix (crit-bit) trie over
+the sha256 digests of the keys. Every node carries the hash of its subtree so
+the root hash commits to the whole state, and for any key the trie can prove
+either the value stored under it or that nothing is stored under it.
+
+Updates copy the path from the root to the changed leaf and leave the rest of
+the trie shared, so the roots of earlier states stay valid and can still be
+used to build proofs.
+"""
+from base64 import b64encode, b64decode
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Optional, Dict, Iterator
+
+from plenum.common.log import getlogger
+
+from sovrin_node.persistence.journal import JournaledIndex
+
+logger = getlogger()
+
+EMPTY_ROOT = sha256(b'').digest()
+
+ROOT_HASH = "rootHash"
+SEQ_NO = "seqNo"
+KEY = "key"
+VALUE = "value"
+PATH = "path"
+LEAF = "leaf"
+
+
+def keyPath(key: bytes) -> bytes:
+    return sha256(key).digest()
+
+
+def bitAt(path: bytes, bit: int) -> int:
+    return (path[bit >> 3] >> (7 - (bit & 7))) & 1
+
+
+def critBit(a: bytes, b: bytes) -> int:
+    """
+    Index of the first bit in which `a` and `b` differ, -1 if they are equal
+    """
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return i * 8 + 8 - (x ^ y).bit_length()
+    return -1
+
+
+def leafHash(path: bytes, valueHash: bytes) -> bytes:
+    return sha256(b'\x00' + path + valueHash).digest()
+
+
+def branchHash(bit: int, left: bytes, right: bytes) -> bytes:
+    return sha256(b'\x01' + bit.to_bytes(2, 'big') + left + right).digest()
+
+
+class Leaf:
+    __slots__ = ('path', 'value', 'valueHash', 'hash')
+
+    def __init__(self, path: bytes, value: bytes):
+        self.path = path
+        self.value = value
+        self.valueHash = sha256(value).digest()
+        self.hash = leafHash(path, self.valueHash)
+
+
+class Branch:
+    __slots__ = ('bit', 'left', 'right', 'hash')
+
+    def __init__(self, bit: int, left, right):
+        self.bit = bit
+        self.left = left
+        self.right = right
+        self.hash = branchHash(bit, left.hash, right.hash)
+
+    def child(self, path: bytes):
+        return self.right if bitAt(path, self.bit) else self.left
+
+
+def _insert(node, leaf: Leaf, bit: int):
+    """
+    Trie below `node` with `leaf` added, `bit` being the first bit in which
+    the path of `leaf` differs from the path of the closest existing leaf
+    """
+    if isinstance(node, Leaf) or node.bit > bit:
+        if bitAt(leaf.path, bit):
+            return Branch(bit, node, leaf)
+        return Branch(bit, leaf, node)
+    if bitAt(leaf.path, node.bit):
+        return Branch(node.bit, node.left, _insert(node.right, leaf, bit))
+    return Branch(node.bit, _insert(node.left, leaf, bit), node.right)
+
+
+def _replace(node, leaf: Leaf):
+    if isinstance(node, Leaf):
+        return leaf
+    if bitAt(leaf.path, node.bit):
+        return Branch(node.bit, node.left, _replace(node.right, leaf))
+    return Branch(node.bit, _replace(node.left, leaf), node.right)
+
+
+class StateTrie(JournaledIndex):
+    """
+    :param journalPath: file every update is appended to, see
+    `SnapshotJournal`, the trie only lives in memory if None
+    :param rootHistory: number of the most recent roots which are kept to
+    build proofs against. A trie loaded from a snapshot only has the roots
+    from the snapshot on.
+    :param snapshotEvery: number of updates after which a flush writes a
+    snapshot of all the leaves and empties the journal
+    """
+
+    def __init__(self, journalPath: str = None, rootHistory: int = 1000,
+                 snapshotEvery: int = 10000):
+        self.root = None
+        self.rootHistory = rootHistory
+        self.roots = OrderedDict()  # type: Dict[int, object]
+        self._openJournal(journalPath, snapshotEvery)
+
+    @property
+    def rootHash(self) -> bytes:
+        return self.root.hash if self.root else EMPTY_ROOT
+
+    def _find(self, path: bytes, root=None):
+        node = root or self.root
+        while isinstance(node, Branch):
+            node = node.child(path)
+        return node
+
+    def get(self, key: bytes, root=None) -> Optional[bytes]:
+        path = keyPath(key)
+        leaf = self._find(path, root) if (root or self.root) else None
+        return leaf.value if leaf and leaf.path == path else None
+
+    def set(self, key: bytes, value: bytes, seqNo: int = None):
+        self._set(Leaf(keyPath(key), value))
+        self._journalAppend([seqNo, b64encode(key).decode(),
+                             b64encode(value).decode()])
+        if seqNo is not None:
+            self.recordRoot(seqNo)
+
+    def _set(self, leaf: Leaf):
+        if self.root is None:
+            self.root = leaf
+            return
+        closest = self._find(leaf.path)
+        bit = critBit(leaf.path, closest.path)
+        if bit < 0:
+            if closest.valueHash != leaf.valueHash:
+                self.root = _replace(self.root, leaf)
+        else:
+            self.root = _insert(self.root, leaf, bit)
+
+    def recordRoot(self, seqNo: int):
+        """
+        Remember the current root as the state after transaction `seqNo`
+        """
+        # The root is kept before lastSeqNo moves on, so a proof built
+        # meanwhile on another thread is against a recorded state
+        self.roots[seqNo] = self.root
+        self.roots.move_to_end(seqNo)
+        self.lastSeqNo = max(self.lastSeqNo, seqNo)
+        while len(self.roots) > self.rootHistory:
+            self.roots.popitem(last=False)
+
+    def prove(self, key: bytes, seqNo: int = None) -> Dict:
+        """
+        Proof of the value stored under `key`, or of its absence, in the
+        state after transaction `seqNo`, the latest state if None. Raises
+        KeyError if that state is no longer kept.
+        """
+        if seqNo is None or seqNo == self.lastSeqNo:
+            # Not the current root, a transaction may be half applied to it
+            seqNo = self.lastSeqNo
+            root = self.roots.get(seqNo, self.root)
+        else:
+            root = self.roots[seqNo]
+        path = keyPath(key)
+        proof = {
+            ROOT_HASH: (root.hash if root else EMPTY_ROOT).hex(),
+            SEQ_NO: seqNo,
+            KEY: b64encode(key).decode(),
+            VALUE: None,
+            PATH: []
+        }
+        node = root
+        while isinstance(node, Branch):
+            if bitAt(path, node.bit):
+                proof[PATH].append([node.bit, node.left.hash.hex()])
+                node = node.right
+            else:
+                proof[PATH].append([node.bit, node.right.hash.hex()])
+                node = node.left
+        if node is None:
+            return proof
+        if node.path == path:
+            proof[VALUE] = b64encode(node.value).decode()
+        else:
+            proof[LEAF] = [node.path.hex(), node.valueHash.hex()]
+        return proof
+
+    def leaves(self) -> Iterator[Leaf]:
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Branch):
+                stack.append(node.right)
+                stack.append(node.left)
+            else:
+                yield node
+
+    def _replay(self, record):
+        seqNo, key, value = record
+        self._set(Leaf(keyPath(b64decode(key)), b64decode(value)))
+        if seqNo is not None:
+            self.recordRoot(seqNo)
+
+    def _loadSnapshot(self, header, records):
+        for path, value in records:
+            self._set(Leaf(b64decode(path), b64decode(value)))
+        if self.rootHash.hex() != header[ROOT_HASH]:
+            logger.warning("snapshot of {} does not lead to its root "
+                           "hash, the state will be rebuilt".
+                           format(self._journal.path))
+            return False
+        if header[SEQ_NO]:
+            self.recordRoot(header[SEQ_NO])
+        return True
+
+    def _snapshotHeader(self, ledgerRoot=None):
+        header = super()._snapshotHeader(ledgerRoot)
+        header[ROOT_HASH] = self.rootHash.hex()
+        return header
+
+    def _snapshotRecords(self):
+        return ([b64encode(leaf.path).decode(), b64encode(leaf.value).decode()]
+                for leaf in self.leaves())
+
+    def _clear(self):
+        self.root = None
+        self.roots.clear()
+
+
+def verifyProof(proof: Dict, rootHash: str = None) -> bool:
+    """
+    Check that `proof`, as returned by `StateTrie.prove`, leads to its root
+    hash, and to `rootHash` if given. A valid proof with a value of None
+    proves that nothing was stored under the key.
+    """
+    if rootHash is not None and proof[ROOT_HASH] != rootHash:
+        return False
+    expected = bytes.fromhex(proof[ROOT_HASH])
+    path = keyPath(b64decode(proof[KEY]))
+    steps = proof[PATH]
+    if proof[VALUE] is not None:
+        leafPath = path
+        h = leafHash(path, sha256(b64decode(proof[VALUE])).digest())
+    elif LEAF in proof:
+        leafPath = bytes.fromhex(proof[LEAF][0])
+        if leafPath == path:
+            return False
+        h = leafHash(leafPath, bytes.fromhex(proof[LEAF][1]))
+    else:
+        return not steps and expected == EMPTY_ROOT
+    bits = [bit for bit, _ in steps]
+    if any(a >= b for a, b in zip(bits, bits[1:])):
+        return False
+    for bit, sibling in reversed(steps):
+        # The search for the key must have taken the same turns as the path
+        # of the leaf it ended at
+        if bitAt(path, bit) != bitAt(leafPath, bit):
+            return False
+        sibling = bytes.fromhex(sibling)
+        if bitAt(path, bit):
+            h = branchHash(bit, sibling, h)
+        else:
+            h = branchHash(bit, h, sibling)
+    return h == expected
@@ -0,0 +1,110 @@
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Tuple
+
+from ledger.util import F
+from plenum.common.types import f
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, TXN_ID, NYM, ATTRIB, \
+    ROLE
+from sovrin_node.persistence.journal import JournaledIndex
+from sovrin_node.persistence.txn_index import TxnIndex
+
+
+class TxnHistoryIndex(JournaledIndex, TxnIndex):
+    """
+    For every nym the seqNos and txnIds, in seqNo order, of the transactions
+    GET_TXNS returns to it: the NYM which added it preceded by the NYM which
+    added its sponsor if it has no role, and the ATTRIBs for it.
+
+    Every NYM and ATTRIB added is appended to a journal, see
+    `SnapshotJournal`, which a flush after `snapshotEvery` of them compacts
+    into a snapshot of the whole index. The index only lives in memory if
+    `journalPath` is None.
+    """
+
+    def __init__(self, journalPath: str = None, snapshotEvery: int = 10000):
+        # The ledger has all that the index needs
+        self.rebuiltFromLedger = journalPath is None
+        self._seqNos = {}    # type: Dict[str, array]
+        self._txnIds = {}    # type: Dict[str, List[str]]
+        # nym -> (seqNo, txnId) of the NYM which added it
+        self._added = {}     # type: Dict[str, Tuple[int, str]]
+        self._openJournal(journalPath, snapshotEvery)
+
+    def addTxn(self, txn: Dict):
+        seqNo = txn.get(F.seqNo.name)
+        if not seqNo or seqNo <= self.lastSeqNo:
+            return
+        self.lastSeqNo = seqNo
+        typ = txn[TXN_TYPE]
+        if typ == NYM:
+            record = [seqNo, txn[TXN_ID], txn[TARGET_NYM],
+                      txn.get(f.IDENTIFIER.nm), bool(txn.get(ROLE))]
+        elif typ == ATTRIB:
+            record = [seqNo, txn[TXN_ID],
+                      txn.get(TARGET_NYM) or txn[f.IDENTIFIER.nm]]
+        else:
+            return
+        if self._apply(*record):
+            self._journalAppend(record)
+
+    def _apply(self, seqNo, txnId, nym, sponsor=None, hasRole=None) -> bool:
+        """
+        Add the NYM, if `hasRole` is not None, or the ATTRIB `txnId` for
+        `nym`, False if it changed nothing
+        """
+        if hasRole is None:
+            self._append(nym, seqNo, txnId)
+            return True
+        if nym in self._added:
+            return False
+        self._added[nym] = (seqNo, txnId)
+        if not hasRole:
+            sponsorNym = self._added.get(sponsor)
+            if sponsorNym:
+                self._append(nym, *sponsorNym)
+        self._append(nym, seqNo, txnId)
+        return True
+
+    def _append(self, nym, seqNo, txnId):
+        # txnIds first, so a reader never finds a seqNo without its txnId
+        if nym not in self._seqNos:
+            self._txnIds[nym] = []
+            self._seqNos[nym] = array('Q')
+        self._txnIds[nym].append(txnId)
+        self._seqNos[nym].append(seqNo)
+
+    def txnsAfter(self, nym, seqNo: int = 0) -> Tuple[List[int], List[str]]:
+        """
+        seqNos and txnIds of the transactions of `nym` after `seqNo`
+        """
+        seqNos = self._seqNos.get(nym)
+        if not seqNos:
+            return [], []
+        end = len(seqNos)
+        start = bisect_right(seqNos, seqNo, 0, end)
+        return seqNos[start:end].tolist(), self._txnIds[nym][start:end]
+
+    def _replay(self, record):
+        self._apply(*record)
+
+    def _loadSnapshot(self, header, records):
+        for nym, added, seqNos, txnIds in records:
+            if added:
+                self._added[nym] = tuple(added)
+            if seqNos:
+                self._txnIds[nym] = txnIds
+                self._seqNos[nym] = array('Q', seqNos)
+        return True
+
+    def _snapshotRecords(self):
+        nyms = set(self._added).union(self._seqNos)
+        return ([nym, self._added.get(nym),
+                 self._seqNos[nym].tolist() if nym in self._seqNos else [],
+                 self._txnIds.get(nym, [])] for nym in nyms)
+
+    def _clear(self):
+        self._seqNos = {}
+        self._txnIds = {}
+        self._added = {}
@@ -0,0 +1,54 @@
+from typing import Dict, Optional, Tuple
+
+
+class TxnIndex:
+    """
+    A lookup structure the node keeps up to date with every domain
+    transaction it stores, see `Node.txnIndexes`
+    """
+
+    # seqNo of the last transaction added
+    lastSeqNo = 0
+
+    # True if the index is built from the domain ledger when the node starts
+    # instead of being persisted
+    rebuiltFromLedger = True
+
+    # True if the index needs the payloads of attributes, otherwise it gets
+    # the references to them the identity graph gets, see
+    # `AttributeBlobStore`
+    attrPayloads = False
+
+    # True if the index gets attributes as the ledger has them, only the
+    # hashes of their payloads
+    ledgerAttrs = False
+
+    def addTxn(self, txn: Dict):
+        """
+        Add a transaction which has its seqNo, ignoring it if it is not
+        after `lastSeqNo`
+        """
+        raise NotImplementedError
+
+    def flush(self, ledgerRoot: str = None):
+        """
+        Write what was added. `ledgerRoot` is the domain ledger's root hash
+        at `lastSeqNo` if known, a persisted index saves it with itself.
+        """
+
+    def close(self, ledgerRoot: str = None):
+        pass
+
+    def ledgerCheckpoint(self) -> Optional[Tuple[int, str]]:
+        """
+        seqNo and domain ledger root hash the persisted index was last saved
+        with, None if it was never saved with a root
+        """
+        return None
+
+    def reset(self):
+        """
+        Forget everything, so a persisted index which does not match the
+        ledger is built again
+        """
+        raise NotImplementedError
@@ -13,8 +13,10 @@ class TxnBasedAuthNr(NaclAuthNr):
     """
     Transaction-based client authenticator.
     """
-    def __init__(self, storage: IdentityGraph):
+    def __init__(self, storage: IdentityGraph, nymFilter=None):
         self.storage = storage
+        # Answers most lookups of unknown identifiers without the graph
+        self.nymFilter = nymFilter
 
     def serializeForSig(self, msg):
         if msg["operation"].get(TXN_TYPE) == ATTRIB:
@@ -31,6 +33,8 @@ class TxnBasedAuthNr(NaclAuthNr):
         raise RuntimeError('Add verification keys through the ADDNYM txn')
 
     def getVerkey(self, identifier):
+        if self.nymFilter and not self.nymFilter.mightHave(identifier):
+            raise UnknownIdentifier(identifier)
         nym = self.storage.getNym(identifier)
         if not nym:
             raise UnknownIdentifier(identifier)
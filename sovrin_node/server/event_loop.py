@@ -0,0 +1,42 @@
+"""
+Choice of the asyncio event loop implementation a node runs on. It must be
+made before the `Looper` is created, as the looper takes the current event
+loop.
+"""
+import asyncio
+import importlib
+
+from plenum.common.log import getlogger
+
+logger = getlogger()
+
+DEFAULT_LOOP = "asyncio"
+
+# Name of an event loop -> module with its `EventLoopPolicy`
+loopModules = {
+    "uvloop": "uvloop"
+}
+
+
+def useEventLoop(name: str = None) -> str:
+    """
+    Make `name` the implementation of the event loops created from now on
+    and give the name of the one in use, which is asyncio's own if `name`
+    is unknown or not installed
+    """
+    if not name or name == DEFAULT_LOOP:
+        return DEFAULT_LOOP
+    moduleName = loopModules.get(name)
+    if moduleName is None:
+        logger.warning("unknown event loop {}, using {}; known ones are {}".
+                       format(name, DEFAULT_LOOP, ", ".join(loopModules)))
+        return DEFAULT_LOOP
+    try:
+        module = importlib.import_module(moduleName)
+    except ImportError:
+        logger.warning("event loop {} is not installed, using {}".
+                       format(name, DEFAULT_LOOP))
+        return DEFAULT_LOOP
+    asyncio.set_event_loop_policy(module.EventLoopPolicy())
+    logger.info("running on the {} event loop".format(name))
+    return name
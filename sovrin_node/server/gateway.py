@@ -0,0 +1,350 @@
+"""
+Client gateway: a process of its own holding the client connections of a
+node, so the node's process is left with consensus. The gateway checks and
+authenticates requests, refuses those over the rate limits, answers repeated
+reads from a short-lived cache and forwards everything else to the node over
+the node's gateway socket, relaying the node's replies back to the clients.
+"""
+import os
+import shutil
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import pyorient
+from plenum.common.log import getlogger
+from plenum.common.motor import Motor
+from plenum.common.stacked import ClientStack
+from plenum.common.startable import Status
+from plenum.common.types import f, OPERATION, OP_FIELD_NAME, REPLY, \
+    REQACK, Reply, RequestAck, RequestNack, CLIENT_STACK_SUFFIX
+from plenum.persistence.orientdb_store import OrientDbStore
+from raet.raeting import AutoMode
+
+from sovrin_common.config_util import getConfig
+from sovrin_common.txn import TXN_TYPE, TXN_ID, validTxnTypes, GET_NYM, \
+    GET_ATTR, GET_CLAIM_DEF, GET_ISSUER_KEY, NYM, ROLE, TARGET_NYM, DATA
+from sovrin_node.common.json_encoding import encodeJson
+from sovrin_node.common.txn import GET_NYMS, NYMS, nodeTxnTypes, \
+    readTxnTypes, signatureNeeded
+from sovrin_node.config import addNodeDefaults
+from sovrin_node.persistence.identity_graph import IdentityGraph
+from sovrin_node.server.client_authn import TxnBasedAuthNr
+from sovrin_node.server.gateway_ipc import CLIENT, MSG, connect
+from sovrin_node.server.node import Node
+from sovrin_node.server.rate_limiter import ClientRateLimiter
+
+logger = getlogger()
+
+# Reads whose reply depends only on their operation, so one reply serves
+# every client asking the same. GET_TXNS depends on who asks.
+CachedReads = {GET_NYM, GET_NYMS, GET_ATTR, GET_CLAIM_DEF, GET_ISSUER_KEY}
+
+# Seconds between attempts to reach a node which is not listening
+ReconnectInterval = 1
+
+
+def gatewaySocketPath(basedirpath: str, nodeName: str, config) -> str:
+    """
+    Path of the gateway socket of the node `nodeName`, in its data directory
+    """
+    return os.path.join(basedirpath, "data", "nodes", nodeName,
+                        config.GatewaySocket)
+
+
+def gatewayKeepDir(basedirpath: str, nodeName: str) -> str:
+    """
+    Directory of the keep of the gateway's client stack, apart from the
+    keep of the node's own client stack
+    """
+    return os.path.join(basedirpath, "data", "nodes", nodeName,
+                        "gateway_keep")
+
+
+def copyStackKeys(fromDir: str, toDir: str, stackName: str):
+    """
+    Copy the keys of the RAET stack `stackName` from the keep in `fromDir`
+    to the one in `toDir`
+    """
+    src = os.path.join(fromDir, stackName, "role", "local")
+    dst = os.path.join(toDir, stackName, "role", "local")
+    os.makedirs(dst, exist_ok=True)
+    for fileName in os.listdir(src):
+        shutil.copy2(os.path.join(src, fileName), dst)
+
+
+class ReadCache:
+    """
+    Results of recent reads by their operation, each kept for `ttl` seconds
+    and at most `maxSize` of them
+    """
+
+    def __init__(self, ttl: float, maxSize: int,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.ttl = ttl
+        self.maxSize = maxSize
+        self.clock = clock
+        self._results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(operation: dict) -> str:
+        return encodeJson(operation)
+
+    def add(self, key: str, result: dict):
+        self._results.pop(key, None)
+        if len(self._results) >= self.maxSize:
+            self._results.popitem(last=False)
+        self._results[key] = (self.clock() + self.ttl, result)
+
+    def replyFor(self, operation: dict, identifier: str, reqId: int) \
+            -> Optional[dict]:
+        """
+        Cached result of a read with `operation`, made the result of the
+        request `identifier`, `reqId`
+        """
+        key = self.key(operation)
+        entry = self._results.get(key)
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                del self._results[key]
+            self.misses += 1
+            return None
+        self.hits += 1
+        result = dict(entry[1])
+        result.update({
+            f.IDENTIFIER.nm: identifier,
+            f.REQ_ID.nm: reqId,
+            TXN_ID: Node.genTxnId(identifier, reqId)
+        })
+        return result
+
+
+class Gateway(Motor):
+    """
+    Client gateway of the node `nodeName`, listening for clients on `cliha`
+    with the keys of the node's client stack. The node's own client stack
+    keeps running on localhost, so the gateway's stack has a keep of its
+    own: two stacks sharing one would overwrite each other's estate and
+    remotes.
+    """
+
+    def __init__(self, nodeName: str, cliha, basedirpath: str, config=None,
+                 graphStore=None):
+        super().__init__()
+        self.nodeName = nodeName
+        self.name = nodeName + "Gateway"
+        self.config = addNodeDefaults(config or getConfig())
+        self.socketPath = gatewaySocketPath(basedirpath, nodeName,
+                                            self.config)
+        self.graphStore = graphStore or self.getGraphStorage(nodeName)
+        self.authNr = TxnBasedAuthNr(self.graphStore)
+        self.rateLimiter = self.getRateLimiter()
+        self.readCache = self.getReadCache()
+        # (identifier, reqId) of a forwarded read -> key of its result in
+        # the cache
+        self.pendingReads = OrderedDict()
+        stackParams = dict(name=nodeName + CLIENT_STACK_SUFFIX,
+                           ha=cliha,
+                           main=True,
+                           auto=AutoMode.always,
+                           basedirpath=gatewayKeepDir(basedirpath,
+                                                      nodeName))
+        self.clientstack = self.getClientStack(stackParams, basedirpath)
+        self.node = None
+        self._nextConnect = 0
+
+    def __repr__(self):
+        return self.name
+
+    def getGraphStorage(self, name):
+        return IdentityGraph(OrientDbStore(
+            user=self.config.OrientDB["user"],
+            password=self.config.OrientDB["password"],
+            dbName=name,
+            dbType=pyorient.DB_TYPE_GRAPH,
+            storageType=pyorient.STORAGE_TYPE_PLOCAL))
+
+    def getClientStack(self, stackParams, basedirpath):
+        """
+        Client stack with the keys of the node's client stack, whose keep
+        is in `basedirpath`
+        """
+        copyStackKeys(basedirpath, stackParams["basedirpath"],
+                      stackParams["name"])
+        return ClientStack(stackParams, self.handleClientMsg)
+
+    def getRateLimiter(self):
+        config = self.config
+        if config.ClientRateLimits is None:
+            return None
+        return ClientRateLimiter(config.ClientRateLimits,
+                                 config.ClientConnectionRateLimits,
+                                 config.ClientRateBurstSeconds,
+                                 roleOf=self.roleOf)
+
+    def getReadCache(self):
+        if not self.config.GatewayReadCacheSeconds:
+            return None
+        return ReadCache(self.config.GatewayReadCacheSeconds,
+                         self.config.GatewayReadCacheSize)
+
+    def roleOf(self, identifier):
+        try:
+            return self.graphStore.getRole(identifier)
+        except Exception:
+            return None
+
+    def start(self, loop):
+        super().start(loop)
+        self.clientstack.start()
+        self.connectToNode()
+        self.status = Status.started
+
+    def _statusChanged(self, old, new):
+        pass
+
+    def onStopping(self, *args, **kwargs):
+        self.clientstack.stop()
+        if self.node:
+            self.node.close()
+
+    def connectToNode(self):
+        self._nextConnect = time.perf_counter() + ReconnectInterval
+        try:
+            self.node = connect(self.socketPath)
+        except OSError as ex:
+            logger.debug("{} cannot reach its node on {}: {}".
+                         format(self, self.socketPath, ex))
+            self.node = None
+            return
+        logger.info("{} connected to its node".format(self))
+
+    @property
+    def nodeConnected(self) -> bool:
+        return self.node is not None and not self.node.closed
+
+    async def prod(self, limit: int = None) -> int:
+        if not self.isGoing():
+            return 0
+        if not self.nodeConnected and \
+                time.perf_counter() >= self._nextConnect:
+            self.connectToNode()
+        c = await self.clientstack.service(limit)
+        self.clientstack.serviceClientStack()
+        c += self.serviceNode(limit)
+        return c
+
+    def serviceNode(self, limit: int = None) -> int:
+        """
+        Relay the messages the node sent to the clients
+        """
+        if self.node is None:
+            return 0
+        msgs = self.node.receive(limit)
+        for msg in msgs:
+            self.cacheReply(msg[MSG])
+            self.forgetChangedRoles(msg[MSG])
+            self.clientstack.transmitToClient(msg[MSG], msg[CLIENT])
+        self.node.flush()
+        return len(msgs)
+
+    def handleClientMsg(self, wrappedMsg):
+        msg, frm = wrappedMsg
+        if not isinstance(msg, dict) or \
+                not isinstance(msg.get(OPERATION), dict) or \
+                msg.get(f.IDENTIFIER.nm) is None or \
+                msg.get(f.REQ_ID.nm) is None:
+            logger.debug("{} discarding {} from {} which is not a request".
+                         format(self, msg, frm))
+            return
+        identifier = msg[f.IDENTIFIER.nm]
+        reqId = msg[f.REQ_ID.nm]
+        operation = msg[OPERATION]
+        reason = self.checkRequest(msg, frm)
+        if reason:
+            self.clientstack.transmitToClient(
+                RequestNack(identifier, reqId, reason), frm)
+            return
+        typ = operation[TXN_TYPE]
+        if self.readCache and typ in CachedReads:
+            result = self.readCache.replyFor(operation, identifier, reqId)
+            if result:
+                self.clientstack.transmitToClient(
+                    RequestAck(identifier, reqId), frm)
+                self.clientstack.transmitToClient(Reply(result), frm)
+                return
+        if not self.nodeConnected:
+            self.clientstack.transmitToClient(RequestNack(
+                identifier, reqId, "node {} is not reachable".
+                format(self.nodeName)), frm)
+            return
+        if self.readCache and typ in CachedReads:
+            self.pendingReads[(identifier, reqId)] = \
+                self.readCache.key(operation)
+            if len(self.pendingReads) > self.readCache.maxSize:
+                self.pendingReads.popitem(last=False)
+        self.node.send({CLIENT: frm, MSG: msg})
+
+    def checkRequest(self, msg, frm) -> Optional[str]:
+        """
+        Why the node should not get the request, None if it should. The
+        node checks the operation in full, with its state.
+        """
+        identifier = msg[f.IDENTIFIER.nm]
+        operation = msg[OPERATION]
+        typ = operation.get(TXN_TYPE)
+        if typ not in validTxnTypes and typ not in nodeTxnTypes:
+            return 'invalid {}: {}'.format(TXN_TYPE, typ)
+        write = typ not in readTxnTypes
+        if self.rateLimiter:
+            reason = self.rateLimiter.checkConnection(frm, write)
+            if reason:
+                return reason
+        if signatureNeeded(operation):
+            try:
+                self.authNr.authenticate(msg)
+            except Exception as ex:
+                return "signature verification failed: {}".format(ex)
+            # Only a verified signature tells whose request it is
+            if self.rateLimiter:
+                return self.rateLimiter.checkIdentifier(identifier, write)
+        return None
+
+    def forgetChangedRoles(self, msg):
+        """
+        Have the rate limiter look up again the roles of the nyms a relayed
+        reply to a NYM or NYMS gave a role
+        """
+        if not self.rateLimiter or not isinstance(msg, dict) or \
+                msg.get(OP_FIELD_NAME) != REPLY:
+            return
+        result = msg.get(f.RESULT.nm) or {}
+        typ = result.get(TXN_TYPE)
+        if typ == NYM:
+            nymOps = [result]
+        elif typ == NYMS and isinstance(result.get(DATA), list):
+            nymOps = result[DATA]
+        else:
+            return
+        for op in nymOps:
+            if isinstance(op, dict) and ROLE in op:
+                self.rateLimiter.forget(op.get(TARGET_NYM))
+
+    def cacheReply(self, msg):
+        """
+        Cache the reply to a forwarded read, forget a read which was refused
+        """
+        if not self.pendingReads or not isinstance(msg, dict):
+            return
+        op = msg.get(OP_FIELD_NAME)
+        if op == REPLY:
+            result = msg.get(f.RESULT.nm) or {}
+            cacheKey = self.pendingReads.pop(
+                (result.get(f.IDENTIFIER.nm), result.get(f.REQ_ID.nm)), None)
+            if cacheKey is not None:
+                self.readCache.add(cacheKey, result)
+        elif op != REQACK:
+            self.pendingReads.pop(
+                (msg.get(f.IDENTIFIER.nm), msg.get(f.REQ_ID.nm)), None)
@@ -0,0 +1,184 @@
+"""
+Local channel between a node and its client gateway: JSON messages, each
+prefixed with its length, over a Unix socket. Both ends are non-blocking and
+serviced from their prod cycles.
+
+Each message is a client message with the name of the client it comes from
+or goes to, `{CLIENT: name, MSG: msg}`.
+"""
+import json
+import os
+import socket
+import struct
+from typing import List, Tuple
+
+from plenum.common.log import getlogger
+
+logger = getlogger()
+
+CLIENT = "client"
+MSG = "msg"
+
+# Prefix of the names the node knows the clients of its gateway by
+GATEWAY_CLIENT_PREFIX = "gateway:"
+
+HEADER = struct.Struct('>I')
+
+# Largest message accepted, a longer one closes the connection
+MaxMessageSize = 16 * 1024 * 1024
+
+# Bytes read from a socket at once
+ReadSize = 64 * 1024
+
+
+def frame(msg) -> bytes:
+    data = json.dumps(msg, separators=(',', ':')).encode()
+    return HEADER.pack(len(data)) + data
+
+
+class FrameConnection:
+    """
+    Connection exchanging framed messages. `send` queues a message and
+    writes what the socket takes, `flush` writes the rest later, `receive`
+    gives the complete messages which arrived.
+    """
+
+    def __init__(self, sock: socket.socket):
+        sock.setblocking(False)
+        self.sock = sock
+        self.closed = False
+        self._in = bytearray()
+        self._out = bytearray()
+
+    def send(self, msg):
+        if self.closed:
+            return
+        self._out += frame(msg)
+        self.flush()
+
+    def flush(self):
+        while self._out and not self.closed:
+            try:
+                sent = self.sock.send(self._out)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as ex:
+                logger.warning("gateway connection failed: {}".format(ex))
+                self.close()
+                return
+            del self._out[:sent]
+
+    def _read(self):
+        while not self.closed:
+            try:
+                data = self.sock.recv(ReadSize)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as ex:
+                logger.warning("gateway connection failed: {}".format(ex))
+                self._shutdown()
+                return
+            if not data:
+                # What arrived before the end is still received
+                self._shutdown()
+                return
+            self._in += data
+
+    def receive(self, limit: int = None) -> List:
+        self._read()
+        msgs = []
+        while len(self._in) >= HEADER.size and \
+                (limit is None or len(msgs) < limit):
+            size, = HEADER.unpack_from(self._in)
+            if size > MaxMessageSize:
+                logger.warning("gateway message of {} bytes is too long, "
+                               "closing the connection".format(size))
+                self.close()
+                break
+            end = HEADER.size + size
+            if len(self._in) < end:
+                break
+            data = bytes(self._in[HEADER.size:end])
+            del self._in[:end]
+            try:
+                msgs.append(json.loads(data.decode()))
+            except ValueError:
+                logger.warning("gateway message is not JSON, closing the "
+                               "connection")
+                self.close()
+                break
+        return msgs
+
+    def _shutdown(self):
+        if not self.closed:
+            self.closed = True
+            self._out.clear()
+            self.sock.close()
+
+    def close(self):
+        self._shutdown()
+        self._in.clear()
+
+
+def connect(path: str) -> FrameConnection:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return FrameConnection(sock)
+
+
+class IpcListener:
+    """
+    Node's end of the channel: accepts gateways on the socket at `path`,
+    which only the node's user may connect to
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Left behind by a node which did not stop cleanly
+        if os.path.exists(path):
+            os.remove(path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(path)
+        os.chmod(path, 0o600)
+        self.sock.listen(8)
+        self.sock.setblocking(False)
+        self.connections = []
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self.sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            logger.info("gateway connected on {}".format(self.path))
+            self.connections.append(FrameConnection(sock))
+
+    def service(self, limit: int = None) \
+            -> List[Tuple[FrameConnection, dict]]:
+        """
+        Messages which arrived from the gateways, with the connection each
+        came over
+        """
+        self._accept()
+        received = []
+        for conn in self.connections:
+            conn.flush()
+        for conn in self.connections:
+            left = None if limit is None else limit - len(received)
+            if left is not None and left <= 0:
+                break
+            received.extend((conn, msg) for msg in conn.receive(left))
+        self.connections = [c for c in self.connections if not c.closed]
+        return received
+
+    def close(self):
+        for conn in self.connections:
+            conn.close()
+        self.connections = []
+        self.sock.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,49 @@
+"""
+Looper of a node which, when idle, sleeps until the node's next timer is due
+instead of waking up at a fixed rate to look for it
+"""
+import asyncio
+import time
+from typing import Iterable
+
+from plenum.common.log import getlogger
+from plenum.common.looper import Looper
+
+logger = getlogger()
+
+
+def idleSleep(prodables: Iterable, maxSleep: float) -> float:
+    """
+    Seconds to sleep until the earliest timer of `prodables` is due, as told
+    by the `nextDue` of those which have one, but at most `maxSleep`
+    """
+    sleep = maxSleep
+    for prodable in prodables:
+        nextDue = getattr(prodable, "nextDue", None)
+        due = nextDue() if nextDue else None
+        if due is not None:
+            sleep = min(sleep, due)
+    return sleep
+
+
+class TimerLooper(Looper):
+    """
+    Looper which, after a cycle in which its prodables handled nothing,
+    sleeps until the earliest of their timers is due but no longer than
+    `maxIdleSleep`. The stacks are polled, so `maxIdleSleep` bounds how late
+    an idle node sees a message; timers run on time whatever it is.
+    """
+
+    def __init__(self, *args, maxIdleSleep: float = 0.01, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.maxIdleSleep = maxIdleSleep
+
+    async def runOnceNicely(self):
+        start = time.perf_counter()
+        msgsProcessed = await self.prodAllOnce()
+        if msgsProcessed == 0:
+            await asyncio.sleep(idleSleep(self.prodables, self.maxIdleSleep))
+        dur = time.perf_counter() - start
+        if dur >= 15:
+            logger.info("it took {:.3f} seconds to run once nicely".
+                        format(dur))
@@ -1,46 +1,85 @@
 import json
+import os
+from collections import OrderedDict, deque
 from copy import deepcopy
+from functools import partial
 from hashlib import sha256
-from operator import itemgetter
-from typing import Iterable, Any
+from typing import Iterable, Any, Optional
 
 import pyorient
 from ledger.compact_merkle_tree import CompactMerkleTree
 from ledger.ledger import Ledger
 from ledger.serializers.compact_serializer import CompactSerializer
+from ledger.serializers.json_serializer import JsonSerializer
 from ledger.stores.file_hash_store import FileHashStore
 from ledger.util import F
 from plenum.common.exceptions import InvalidClientRequest, \
     UnauthorizedClientRequest
 from plenum.common.log import getlogger
 from plenum.common.txn import RAW, ENC, HASH, NAME, VERSION, ORIGIN, \
-    POOL_TXN_TYPES
+    POOL_TXN_TYPES, VERKEY, VALIDATOR
 from plenum.common.types import Reply, RequestAck, RequestNack, f, \
-    NODE_PRIMARY_STORAGE_SUFFIX, OPERATION, LedgerStatus
+    NODE_PRIMARY_STORAGE_SUFFIX, OPERATION, LedgerStatus, Propagate, \
+    PrePrepare, Prepare, Commit, InstanceChange, Nomination, Primary, \
+    Reelection
 from plenum.common.util import error
 from plenum.persistence.storage import initStorage
 from plenum.server.node import Node as PlenumNode
 from sovrin_common.auth import Authoriser
 from sovrin_common.config_util import getConfig
-from sovrin_common.persistence import identity_graph
 from sovrin_common.txn import TXN_TYPE, \
     TARGET_NYM, allOpKeys, validTxnTypes, ATTRIB, NYM,\
     ROLE, GET_ATTR, DISCLO, DATA, GET_NYM, \
     TXN_ID, TXN_TIME, reqOpKeys, GET_TXNS, LAST_TXN, TXNS, \
-    getTxnOrderedFields, CLAIM_DEF, GET_CLAIM_DEF, openTxns, \
+    getTxnOrderedFields, CLAIM_DEF, GET_CLAIM_DEF, \
     ISSUER_KEY, GET_ISSUER_KEY, REF, IDENTITY_TXN_TYPES, \
     CONFIG_TXN_TYPES, POOL_UPGRADE, ACTION, START, CANCEL, SCHEDULE, \
     NODE_UPGRADE, COMPLETE, FAIL
 from sovrin_common.types import Request
-from sovrin_common.util import dateTimeEncoding
+from sovrin_node.common.json_encoding import encodeJson
+from sovrin_node.common.txn import STATE_PROOF, SIGNED_STATE_ROOT, \
+    ATTR_PAYLOAD, GET_NYMS, NYMS, nodeTxnTypes, readTxnTypes, \
+    signatureNeeded
+from sovrin_node.config import addNodeDefaults
+from sovrin_node.persistence.attribute_blobs import AttributeBlobStore, \
+    hasBlobRef, storedDigest
+from sovrin_node.persistence.attribute_index import AttributeIndex
+from sovrin_node.persistence.binary_ledger import BinaryLedger, \
+    binaryFileName, BINARY_FORMAT
+from sovrin_node.persistence.binary_serializer import BinarySerializer
+from sovrin_node.persistence.graph_access import GraphPool, gather
+from sovrin_node.persistence.identity_graph import IdentityGraph
+from sovrin_node.persistence.identity_state import IdentityState, \
+    ledgerAttrHash
+from sovrin_node.persistence.journal import LEDGER_ROOT
+from sovrin_node.persistence.ledger_reader import LedgerReader
+from sovrin_node.persistence.nym_filter import NymBloomFilter
 from sovrin_node.persistence.secondary_storage import SecondaryStorage
+from sovrin_node.persistence.segmented_ledger import SegmentedLedger
+from sovrin_node.persistence.state_trie import StateTrie, ROOT_HASH, \
+    SEQ_NO
+from sovrin_node.persistence.txn_history_index import TxnHistoryIndex
 from sovrin_node.server.client_authn import TxnBasedAuthNr
+from sovrin_node.server.gateway_ipc import IpcListener, CLIENT, MSG, \
+    GATEWAY_CLIENT_PREFIX
 from sovrin_node.server.node_authn import NodeAuthNr
-from sovrin_node.server.pool_manager import HasPoolManager
+from sovrin_node.server.pool_manager import HasPoolManager, nodeServices
+from sovrin_node.server.prod_budget import ProdBudget, NODE_MSGS, \
+    CLIENT_WRITES, CLIENT_READS, CLIENT_KINDS, READ_REPLIES, BACKGROUND
+from sovrin_node.server.rate_limiter import ClientRateLimiter
+from sovrin_node.server.read_worker_pool import ReadWorkerPool
+from sovrin_node.server.recent_replies import RecentReplies
+from sovrin_node.server.rw_lock import ReadWriteLock
+from sovrin_node.server.request_trace import RequestTrace
+from sovrin_node.server.timer_queue import TimerQueue
 from sovrin_node.server.upgrader import Upgrader
 
 logger = getlogger()
 
+# Messages an observer node neither sends nor processes
+ConsensusMsgs = (Propagate, PrePrepare, Prepare, Commit, InstanceChange,
+                 Nomination, Primary, Reelection)
+
 
 class Node(PlenumNode, HasPoolManager):
     keygenScript = "init_sovrin_raet_keep"
@@ -56,9 +95,33 @@ class Node(PlenumNode, HasPoolManager):
                  primaryDecider=None,
                  pluginPaths: Iterable[str] = None,
                  storage=None,
-                 config=None):
-        self.config = config or getConfig()
-        self.graphStore = self.getGraphStorage(name)
+                 config=None,
+                 observer=False):
+        self.config = addNodeDefaults(config or getConfig())
+        # An observer follows the ledgers through catch-up and answers reads
+        # but never takes part in consensus
+        self.observer = observer
+        # Written while the domain ledger, the identity graph and the
+        # indexes change and read while a reply to a read is built, so the
+        # data and the proofs of a reply come from the same state
+        self.stateLock = ReadWriteLock()
+        if self.config.GraphConnections > 1:
+            # Each connection has a thread of its own, no lock is needed
+            self.graphStore = GraphPool(lambda: self.getGraphStorage(name),
+                                        self.config.GraphConnections)
+        else:
+            self.graphStore = self.getGraphStorage(name)
+        self.readGraph = self.getReadGraph(name)
+        self.identityState = None
+        # The last root of the identity state the node signed, see
+        # `signStateRoot`
+        self.signedStateRoot = None
+        self.attrBlobs = None
+        self.rateLimiter = None
+        self.txnIndexes = []
+        self.recentReplies = RecentReplies(self.config.RecentReplyCacheSize)
+        # Delayed actions of the node and its upgrader
+        self.timers = TimerQueue()
         super().__init__(name=name,
                          nodeRegistry=nodeRegistry,
                          clientAuthNr=clientAuthNr,
@@ -70,6 +133,17 @@ class Node(PlenumNode, HasPoolManager):
                          pluginPaths=pluginPaths,
                          storage=storage,
                          config=self.config)
+        self.identityState = self.getIdentityState()
+        self.txnHistory = self.getTxnHistory()
+        self.attrIndex = self.getAttributeIndex()
+        self.attrBlobs = self.getAttributeBlobs()
+        self.nymFilter = self.getNymFilter()
+        if isinstance(self.clientAuthNr, TxnBasedAuthNr):
+            self.clientAuthNr.nymFilter = self.nymFilter
+        self.txnIndexes = self.getTxnIndexes()
+        self.domainReader = LedgerReader(self.domainLedger)
+        self._checkIndexesAgainstLedger()
+        self._addTxnsToIndexesIfNeeded()
         self._addTxnsToGraphIfNeeded()
         self.configLedger = self.getConfigLedger()
         self.ledgerManager.addLedger(2, self.configLedger,
@@ -78,15 +152,48 @@ class Node(PlenumNode, HasPoolManager):
         self.upgrader = self.getUpgrader()
         self.nodeMsgRouter.routes[Request] = self.processNodeRequest
         self.nodeAuthNr = self.defaultNodeAuthNr()
+        self.requestTrace = self.getRequestTrace()
+        self.rateLimiter = self.getRateLimiter()
+        # Name of a client of the gateway -> connection of its gateway, the
+        # clients which sent a request the longest ago first
+        self.gatewayClients = OrderedDict()
+        self.gatewayListener = self.getGatewayListener()
+        self.readWorkers = self.getReadWorkers()
+        # Callables taking the number of items they may handle and giving
+        # the number handled, called every prod cycle
+        self.backgroundWork = []
+        # Validated client requests waiting for their kind's budget, when
+        # the node has one
+        self.clientQueues = {kind: deque() for kind in CLIENT_KINDS}
+        self.prodBudget = self.getProdBudget()
+        if self.prodBudget:
+            self.timers.schedule("reportProdBudget", self.reportProdBudget,
+                                 self.config.ProdBudgetReportInterval)
+        if self.observer:
+            reason = self.observerRegistrationError()
+            if reason:
+                raise RuntimeError(reason)
+            self.timers.schedule("syncWithPool", self.syncWithPool,
+                                 self.config.ObserverSyncInterval)
 
     def initPoolManager(self, nodeRegistry, ha, cliname, cliha):
         HasPoolManager.__init__(self, nodeRegistry, ha, cliname, cliha)
 
+    def getReadGraph(self, name):
+        """
+        Graph the replies to reads are built from. Read workers have
+        connections of their own so they never wait for the looper's.
+        """
+        count = self.config.ReadWorkerCount
+        if not count or isinstance(self.graphStore, GraphPool):
+            return self.graphStore
+        return GraphPool(lambda: self.getGraphStorage(name), count)
+
     def getSecondaryStorage(self):
         return SecondaryStorage(self.graphStore, self.primaryStorage)
 
     def getGraphStorage(self, name):
-        return identity_graph.IdentityGraph(self._getOrientDbStore(name,
+        return IdentityGraph(self._getOrientDbStore(name,
                                                     pyorient.DB_TYPE_GRAPH))
 
     def getPrimaryStorage(self):
@@ -94,28 +201,172 @@ class Node(PlenumNode, HasPoolManager):
         This is usually an implementation of Ledger
         """
         if self.config.primaryStorage is None:
-            fields = getTxnOrderedFields()
-            return Ledger(CompactMerkleTree(hashStore=self.hashStore),
-                          dataDir=self.dataLocation,
-                          serializer=CompactSerializer(fields=fields),
-                          fileName=self.config.domainTransactionsFile,
-                          ensureDurability=self.config.EnsureLedgerDurability)
+            return self.newLedger(CompactMerkleTree(hashStore=self.hashStore),
+                                  self.config.domainTransactionsFile,
+                                  getTxnOrderedFields())
         else:
             return initStorage(self.config.primaryStorage,
                                name=self.name + NODE_PRIMARY_STORAGE_SUFFIX,
                                dataDir=self.dataLocation,
                                config=self.config)
 
+    def getRequestTrace(self):
+        fileName = self.config.ClientRequestTraceFile
+        if not fileName:
+            return None
+        return RequestTrace(os.path.join(self.dataLocation, fileName))
+
+    def getRateLimiter(self):
+        config = self.config
+        if config.ClientRateLimits is None:
+            return None
+        return ClientRateLimiter(config.ClientRateLimits,
+                                 config.ClientConnectionRateLimits,
+                                 config.ClientRateBurstSeconds,
+                                 roleOf=self.roleOf)
+
+    def getGatewayListener(self):
+        fileName = self.config.GatewaySocket
+        if not fileName:
+            return None
+        return IpcListener(os.path.join(self.dataLocation, fileName))
+
+    def roleOf(self, identifier):
+        try:
+            return self.graphStore.getRole(identifier)
+        except Exception:
+            return None
+
+    def getIdentityState(self):
+        fileName = self.config.StateTrieFile
+        if not fileName:
+            return None
+        trie = StateTrie(os.path.join(self.dataLocation, fileName),
+                         rootHistory=self.config.StateRootHistorySize,
+                         snapshotEvery=self.config.IndexSnapshotInterval)
+        return IdentityState(trie)
+
+    def getAttributeIndex(self):
+        fileName = self.config.AttributeIndexFile
+        if not fileName:
+            return None
+        return AttributeIndex(os.path.join(self.dataLocation, fileName),
+                              snapshotEvery=self.config.IndexSnapshotInterval)
+
+    def getTxnHistory(self):
+        fileName = self.config.TxnHistoryFile
+        return TxnHistoryIndex(
+            os.path.join(self.dataLocation, fileName) if fileName else None,
+            snapshotEvery=self.config.IndexSnapshotInterval)
+
+    def getAttributeBlobs(self):
+        fileName = self.config.AttributeBlobFile
+        if not fileName:
+            return None
+        return AttributeBlobStore(os.path.join(self.dataLocation, fileName),
+                                  minSize=self.config.AttributeBlobMinSize)
+
+    def getNymFilter(self):
+        fileName = self.config.NymFilterFile
+        if not fileName:
+            return None
+        return NymBloomFilter(os.path.join(self.dataLocation, fileName),
+                              capacity=self.config.NymFilterCapacity,
+                              errorRate=self.config.NymFilterErrorRate)
+
+    def getTxnIndexes(self):
+        """
+        Indexes updated with every transaction added to the identity graph
+        """
+        return [index for index in (self.identityState, self.txnHistory,
+                                    self.attrIndex, self.nymFilter) if index]
+
+    def getReadWorkers(self):
+        count = self.config.ReadWorkerCount
+        if not count:
+            return None
+        return ReadWorkerPool(count, self.transmitToClient, self.readFailed)
+
+    def getProdBudget(self):
+        config = self.config
+        if not config.ProdCycleTarget:
+            return None
+        return ProdBudget(config.ProdCycleTarget, config.ProdBudgetMin,
+                          config.ProdBudgetMax, shares={
+                              CLIENT_WRITES: config.ClientWriteShare,
+                              CLIENT_READS: config.ClientReadShare,
+                              READ_REPLIES: config.ReadReplyShare,
+                              BACKGROUND: config.BackgroundShare
+                          })
+
     def getUpgrader(self):
         return Upgrader(self.id, self.config,
-                        self.dataLocation, self.configLedger)
+                        self.dataLocation, self.configLedger,
+                        timers=self.timers)
 
     def getConfigLedger(self):
-        return Ledger(CompactMerkleTree(hashStore=FileHashStore(
-            fileNamePrefix='config', dataDir=self.dataLocation)),
-            dataDir=self.dataLocation,
-            fileName=self.config.configTransactionsFile,
-            ensureDurability=self.config.EnsureLedgerDurability)
+        tree = CompactMerkleTree(hashStore=FileHashStore(
+            fileNamePrefix='config', dataDir=self.dataLocation))
+        return self.newLedger(tree, self.config.configTransactionsFile)
+
+    def newLedger(self, tree, fileName, fields=None):
+        """
+        Ledger in the format and files the config asks for, its leaves
+        being those of a `CompactSerializer` over `fields`, or of JSON if None
+        """
+        config = self.config
+        textSerializer = CompactSerializer(fields=fields) if fields \
+            else JsonSerializer()
+        binary = config.LedgerFormat == BINARY_FORMAT
+        if binary:
+            fileName = binaryFileName(fileName)
+        if config.LedgerSegmentSize:
+            return SegmentedLedger(
+                tree,
+                dataDir=self.dataLocation,
+                serializer=BinarySerializer(fields) if binary
+                else textSerializer,
+                hashSerializer=textSerializer if binary else None,
+                segmentSize=config.LedgerSegmentSize,
+                compress=config.CompressSealedSegments,
+                fileName=fileName,
+                ensureDurability=config.EnsureLedgerDurability)
+        if binary:
+            return BinaryLedger(tree,
+                                dataDir=self.dataLocation,
+                                fields=fields,
+                                hashSerializer=textSerializer,
+                                fileName=fileName,
+                                ensureDurability=config.EnsureLedgerDurability)
+        return Ledger(tree,
+                      dataDir=self.dataLocation,
+                      serializer=textSerializer,
+                      fileName=fileName,
+                      ensureDurability=config.EnsureLedgerDurability)
+
+    def observerRegistrationError(self) -> Optional[str]:
+        """
+        Why this node cannot be an observer, None if it can. The pool ledger
+        must not give it the VALIDATOR service, or validators would count
+        it towards N and f and wait for votes it never sends.
+        """
+        if self.poolLedger is None:
+            return None
+        services = nodeServices(self.poolLedger.getAllTxn().values(),
+                                self.name)
+        if services is not None and VALIDATOR in services:
+            return "{} is an observer but the pool ledger has it as a " \
+                   "validator".format(self.name)
+        return None
+
+    def postPoolLedgerCaughtUp(self):
+        if self.observer:
+            reason = self.observerRegistrationError()
+            if reason:
+                logger.error("{}, stopping".format(reason))
+                self.stop()
+                return
+        super().postPoolLedgerCaughtUp()
 
     def postDomainLedgerCaughtUp(self):
         # TODO: Reconsider, shouldn't config ledger be synced before domain
@@ -124,6 +375,12 @@ class Node(PlenumNode, HasPoolManager):
         # A counter argument is since domain ledger contains identities and thus
         # trustees, its needs to sync first
         super().postDomainLedgerCaughtUp()
+        self.signStateRoot()
+        if self.observer and \
+                self.replayLedgerToGraph not in self.backgroundWork:
+            # A budget's worth a cycle, so a long catch-up does not hold up
+            # the node's messages
+            self.backgroundWork.append(self.replayLedgerToGraph)
         self.ledgerManager.setLedgerCanSync(2, True)
         # Node has discovered other nodes now sync up domain ledger
         for nm in self.nodestack.connecteds:
@@ -164,7 +421,7 @@ class Node(PlenumNode, HasPoolManager):
                 }
             }
 
-        if op:
+        if op and not self.observer:
             op[f.SIG.nm] = self.wallet.signMsg(op[DATA])
             request = self.wallet.signOp(op)
             self.startedProcessingReq(*request.key, self.nodestack.name)
@@ -196,6 +453,24 @@ class Node(PlenumNode, HasPoolManager):
         else:
             super().postTxnFromCatchupAddedToLedger(ledgerType, txn)
 
+    def syncWithPool(self):
+        """
+        Ask the connected nodes for their ledger statuses so an observer
+        catches up with whatever the pool ordered since the last sync
+        """
+        for ledgerType in (0, 1, 2):
+            self.ledgerManager.setLedgerCanSync(ledgerType, True)
+            for nm in self.nodestack.connecteds:
+                self.sendLedgerStatus(nm, ledgerType)
+        self.timers.schedule("syncWithPool", self.syncWithPool,
+                             self.config.ObserverSyncInterval)
+
+    def send(self, msg: Any, *rids: Iterable[int], signer=None):
+        if self.observer and isinstance(msg, ConsensusMsgs):
+            logger.debug("{} is an observer, not sending {}".format(self, msg))
+            return
+        super().send(msg, *rids, signer=signer)
+
     def validateNodeMsg(self, wrappedMsg):
         msg, frm = wrappedMsg
         if all(attr in msg.keys()
@@ -205,7 +480,64 @@ class Node(PlenumNode, HasPoolManager):
             cMsg = cls(**msg)
             return cMsg, frm
         else:
-            return super().validateNodeMsg(wrappedMsg)
+            vmsg = super().validateNodeMsg(wrappedMsg)
+            if vmsg and self.observer and isinstance(vmsg[0], ConsensusMsgs):
+                logger.debug("{} is an observer, discarding {} from {}".
+                             format(self, vmsg[0], frm))
+                return None
+            return vmsg
+
+    def validateClientMsg(self, wrappedMsg):
+        msg, frm = wrappedMsg
+        if self.rateLimiter:
+            self.checkClientRate(msg, frm)
+        vmsg = super().validateClientMsg(wrappedMsg)
+        if vmsg and self.rateLimiter and \
+                self.isSignatureVerificationNeeded(msg):
+            # Its signature is verified, so it is its identifier's request
+            self.checkClientRate(msg)
+        if vmsg and self.requestTrace:
+            self.requestTrace.record(msg, frm)
+        return vmsg
+
+    def checkClientRate(self, msg, frm=None):
+        """
+        Refuse a request over the rate limits of the connection `frm` it
+        came over, before any work is done on it, or if `frm` is None over
+        those of its identifier, once its signature is verified
+        """
+        operation = msg.get(OPERATION) if isinstance(msg, dict) else None
+        if not isinstance(operation, dict) or f.IDENTIFIER.nm not in msg:
+            return
+        identifier = msg[f.IDENTIFIER.nm]
+        write = operation.get(TXN_TYPE) not in readTxnTypes
+        if frm is None:
+            reason = self.rateLimiter.checkIdentifier(identifier, write)
+        else:
+            reason = self.rateLimiter.checkConnection(frm, write)
+        if reason:
+            raise InvalidClientRequest(identifier, msg.get(f.REQ_ID.nm),
+                                       reason)
+
+    def onStopping(self, *args, **kwargs):
+        # Saved with the root of the ledger, before it is closed
+        for index in self.txnIndexes:
+            index.close(self.ledgerRootFor(index))
+        super().onStopping(*args, **kwargs)
+        if self.requestTrace:
+            self.requestTrace.close()
+        if self.readWorkers:
+            self.readWorkers.stop()
+        if self.attrBlobs:
+            self.attrBlobs.close()
+        if self.gatewayListener:
+            self.gatewayListener.close()
+        for graph in {self.graphStore, self.readGraph}:
+            if isinstance(graph, GraphPool):
+                graph.close()
+        for reader in (self.domainReader, self.upgrader.ledgerReader,
+                       self.nodeAuthNr.ledgerReader):
+            reader.close()
 
     def authNr(self, req):
         # TODO: Assumption that NODE_UPGRADE can be sent by nodes only
@@ -217,21 +549,145 @@ class Node(PlenumNode, HasPoolManager):
     def _addTxnsToGraphIfNeeded(self):
         i = 0
         txnCountInGraph = self.graphStore.countTxns()
-        for seqNo, txn in self.domainLedger.getAllTxn().items():
-            if seqNo > txnCountInGraph:
-                txn[F.seqNo.name] = seqNo
-                self.storeTxnInGraph(txn)
-                i += 1
+        for seqNo, txn in self.domainReader.txns(txnCountInGraph + 1):
+            txn[F.seqNo.name] = seqNo
+            self.storeTxnInGraph(txn)
+            i += 1
         logger.debug("{} adding {} transactions to graph from ledger".
                      format(self, i))
         return i
 
+    def replayLedgerToGraph(self, limit: int = None) -> int:
+        """
+        Background work adding up to `limit` of the domain ledger's
+        transactions which the graph does not have yet, which stops being
+        background work once the graph has them all
+        """
+        frm = self.graphStore.countTxns() + 1
+        size = self.domainLedger.size
+        to = size if limit is None else min(size, frm + limit - 1)
+        count = 0
+        for seqNo, txn in self.domainReader.txns(frm, to):
+            txn[F.seqNo.name] = seqNo
+            self.storeTxnInGraph(txn)
+            count += 1
+        if frm + count > size and \
+                self.replayLedgerToGraph in self.backgroundWork:
+            self.backgroundWork.remove(self.replayLedgerToGraph)
+            logger.debug("{} added the transactions up to {} to its graph".
+                         format(self, size))
+        return count
+
+    def ledgerRootFor(self, index) -> Optional[str]:
+        """
+        Root hash of the domain ledger if `index` has all its transactions
+        """
+        ledger = self.domainLedger
+        return ledger.root_hash if index.lastSeqNo == ledger.size else None
+
+    def flushIndexes(self):
+        for index in self.txnIndexes:
+            index.flush(self.ledgerRootFor(index))
+
+    def signStateRoot(self):
+        """
+        Sign the root hash of the identity state with the seqNo it is at and
+        the domain ledger's root hash at that seqNo. The pool agrees on the
+        ledger, so a client which knows the ledger's root, from the other
+        nodes or a Merkle proof, can trust a state proof against the signed
+        root of a single node. An observer is not in the pool ledger, so
+        nobody could check its signature.
+        """
+        state = self.identityState
+        if not state or self.observer:
+            return
+        signed = self.signedStateRoot
+        if signed and signed[SEQ_NO] == state.lastSeqNo:
+            return
+        ledgerRoot = self.ledgerRootFor(state)
+        if not ledgerRoot:
+            # The state does not have all the ledger's transactions yet
+            return
+        root = {SEQ_NO: state.lastSeqNo,
+                ROOT_HASH: state.rootHash.hex(),
+                LEDGER_ROOT: ledgerRoot,
+                f.IDENTIFIER.nm: self.wallet.defaultId}
+        root[f.SIG.nm] = self.wallet.signMsg(root)
+        self.signedStateRoot = root
+
+    def proveState(self, signedRoot, prove, *args):
+        """
+        Proof built by `prove` against the state at `signedRoot`, None if
+        there is no signed root or it is not the root of the state the data
+        of a reply comes from, e.g. while the node catches up
+        """
+        if not signedRoot or \
+                signedRoot[SEQ_NO] != self.identityState.lastSeqNo:
+            return None
+        try:
+            return prove(*args, seqNo=signedRoot[SEQ_NO])
+        except KeyError:
+            return None
+
+    def _checkIndexesAgainstLedger(self):
+        """
+        Reset the persisted indexes which do not belong to the domain ledger,
+        e.g. which have transactions it does not have or were saved with
+        another root hash at the same seqNo. They are then built again.
+        """
+        ledger = self.domainLedger
+        for index in self.txnIndexes:
+            if index.rebuiltFromLedger:
+                continue
+            matches = index.lastSeqNo <= ledger.size
+            checkpoint = index.ledgerCheckpoint()
+            if matches and checkpoint and checkpoint[0] and checkpoint[1]:
+                seqNo, ledgerRoot = checkpoint
+                matches = ledger.merkleInfo(seqNo)[F.rootHash.name] == \
+                    ledgerRoot
+            if not matches:
+                logger.warning("{}'s {} does not match the domain ledger, "
+                               "rebuilding it".format(self,
+                                                      type(index).__name__))
+                index.reset()
+
+    def _addTxnsToIndexesIfNeeded(self):
+        """
+        Add the transactions of the ledger which the indexes do not have yet.
+        That is all of them for the indexes built from the ledger, and the
+        last few for persisted ones if the node stopped before writing them.
+        The ledger only has the hash of a raw attribute, so for the persisted
+        indexes an ATTRIB is taken from the graph.
+        """
+        if not self.txnIndexes:
+            return 0
+        i = 0
+        lastSeqNo = min(index.lastSeqNo for index in self.txnIndexes)
+        for seqNo, txn in self.domainReader.txns(lastSeqNo + 1):
+            txn[F.seqNo.name] = seqNo
+            graphTxn = None
+            for index in self.txnIndexes:
+                if index.rebuiltFromLedger or index.ledgerAttrs or \
+                        txn[TXN_TYPE] != ATTRIB:
+                    index.addTxn(txn)
+                    continue
+                if seqNo <= index.lastSeqNo:
+                    continue
+                if graphTxn is None:
+                    graphTxn = self.graphStore.getResultForTxnIds(
+                        txn[TXN_ID]).get(seqNo, txn)
+                if index.attrPayloads and self.attrBlobs:
+                    index.addTxn(self.attrBlobs.restore(graphTxn))
+                else:
+                    index.addTxn(graphTxn)
+            i += 1
+        logger.debug("{} adding {} transactions to indexes from ledger".
+                     format(self, i))
+        return i
+
     def isSignatureVerificationNeeded(self, msg: Any):
         op = msg.get(OPERATION)
-        if op:
-            if op.get(TXN_TYPE) in openTxns:
-                return False
-        return True
+        return not op or signatureNeeded(op)
 
     def checkValidOperation(self, identifier, reqId, operation):
         self.checkValidSovrinOperation(identifier, reqId, operation)
@@ -250,10 +706,31 @@ class Node(PlenumNode, HasPoolManager):
                                        'missing required keys "{}"'.
                                        format(",".join(missingKeys)))
 
-        if operation[TXN_TYPE] not in validTxnTypes:
+        if operation[TXN_TYPE] not in validTxnTypes and \
+                operation[TXN_TYPE] not in nodeTxnTypes:
             raise InvalidClientRequest(identifier, reqId, 'invalid {}: {}'.
                                        format(TXN_TYPE, operation[TXN_TYPE]))
 
+        if operation[TXN_TYPE] == GET_NYMS:
+            nyms = operation.get(DATA)
+            if not isinstance(nyms, list) or not nyms or \
+                    not all(isinstance(nym, str) for nym in nyms):
+                raise InvalidClientRequest(identifier, reqId,
+                                           '{} should be a non empty list of '
+                                           'nyms'.format(DATA))
+            if len(nyms) > self.config.MaxNymsPerRequest:
+                raise InvalidClientRequest(identifier, reqId,
+                                           'at most {} nyms can be asked for '
+                                           'at once'.
+                                           format(self.config.MaxNymsPerRequest))
+
+        if operation[TXN_TYPE] == GET_TXNS:
+            if not self.isValidTxnsSeqNo(operation.get(DATA)):
+                raise InvalidClientRequest(identifier, reqId,
+                                           '{} should be the seqNo of the '
+                                           'last transaction the client has'.
+                                           format(DATA))
+
         if operation[TXN_TYPE] == ATTRIB:
             dataKeys = {RAW, ENC, HASH}.intersection(set(operation.keys()))
             if len(dataKeys) != 1:
@@ -268,30 +745,53 @@ class Node(PlenumNode, HasPoolManager):
                     raise InvalidClientRequest(identifier, reqId,
                                                'raw attribute {} should be '
                                                'JSON'.format(operation[RAW]))
+            if hasBlobRef(operation.get(RAW)) or \
+                    hasBlobRef(operation.get(ENC)):
+                raise InvalidClientRequest(identifier, reqId,
+                                           'attribute should not refer to a '
+                                           'stored attribute')
 
             if not (not operation.get(TARGET_NYM) or
-                    self.graphStore.hasNym(operation[TARGET_NYM])):
+                    self.nymExists(operation[TARGET_NYM])):
                 raise InvalidClientRequest(identifier, reqId,
                                            '{} should be added before adding '
                                            'attribute for it'.
                                            format(TARGET_NYM))
 
         if operation[TXN_TYPE] == NYM:
-            role = operation.get(ROLE)
-            nym = operation.get(TARGET_NYM)
-            if not nym:
-                raise InvalidClientRequest(identifier, reqId,
-                                           "{} needs to be present".
-                                           format(TARGET_NYM))
-            if not Authoriser.isValidRole(role):
+            self.checkValidNymOperation(identifier, reqId, operation)
+
+        if operation[TXN_TYPE] == NYMS:
+            nymOps = operation.get(DATA)
+            if not isinstance(nymOps, list) or not nymOps or \
+                    not all(isinstance(op, dict) for op in nymOps):
                 raise InvalidClientRequest(identifier, reqId,
-                                           "{} not a valid role".
-                                           format(role))
-            # Only
-            if not self.canNymRequestBeProcessed(identifier, operation):
+                                           '{} should be a non empty list of '
+                                           '{} operations'.format(DATA, NYM))
+            if len(nymOps) > self.config.MaxNymsPerBatch:
                 raise InvalidClientRequest(identifier, reqId,
-                                           "{} is already present".
-                                           format(nym))
+                                           'at most {} nyms can be added at '
+                                           'once'.
+                                           format(self.config.MaxNymsPerBatch))
+            nyms = set()
+            for op in nymOps:
+                unknownKeys = set(op.keys()).difference({TARGET_NYM, VERKEY,
+                                                         ROLE})
+                if unknownKeys:
+                    raise InvalidClientRequest(identifier, reqId,
+                                               'invalid keys "{}"'.
+                                               format(",".join(unknownKeys)))
+                # A batch only adds nyms, it never updates one
+                if op.get(TARGET_NYM) and self.nymExists(op[TARGET_NYM]):
+                    raise InvalidClientRequest(identifier, reqId,
+                                               "{} is already added".
+                                               format(op[TARGET_NYM]))
+                self.checkValidNymOperation(identifier, reqId, op)
+                if op[TARGET_NYM] in nyms:
+                    raise InvalidClientRequest(identifier, reqId,
+                                               "{} is listed more than once".
+                                               format(op[TARGET_NYM]))
+                nyms.add(op[TARGET_NYM])
 
         if operation[TXN_TYPE] == POOL_UPGRADE:
             action = operation.get(ACTION)
@@ -309,47 +809,64 @@ class Node(PlenumNode, HasPoolManager):
 
             # TODO: Check if cancel is submitted before start
 
+    @staticmethod
+    def isValidTxnsSeqNo(seqNo) -> bool:
+        """
+        Whether `seqNo` of a GET_TXNS, a number or its digits, is one
+        `getTxnsReply` can take, none meaning from the first transaction
+        """
+        if seqNo is None or seqNo == '':
+            return True
+        if not isinstance(seqNo, (int, str)) or isinstance(seqNo, bool):
+            return False
+        try:
+            return int(seqNo) >= 0
+        except ValueError:
+            return False
+
+    def checkValidNymOperation(self, identifier, reqId, operation):
+        role = operation.get(ROLE)
+        nym = operation.get(TARGET_NYM)
+        if not nym:
+            raise InvalidClientRequest(identifier, reqId,
+                                       "{} needs to be present".
+                                       format(TARGET_NYM))
+        if not Authoriser.isValidRole(role):
+            raise InvalidClientRequest(identifier, reqId,
+                                       "{} not a valid role".
+                                       format(role))
+        # Only
+        if not self.canNymRequestBeProcessed(identifier, operation):
+            raise InvalidClientRequest(identifier, reqId,
+                                       "{} is already present".
+                                       format(nym))
+
     def checkRequestAuthorized(self, request: Request):
         op = request.operation
         typ = op[TXN_TYPE]
 
-        s = self.graphStore  # type: identity_graph.IdentityGraph
+        s = self.graphStore  # type: IdentityGraph
 
         origin = request.identifier
 
-        if typ == NYM:
-            try:
-                originRole = s.getRole(origin)
-            except:
+        if typ in (NYM, NYMS):
+            nymOps = op[DATA] if typ == NYMS else [op]
+            # The role of the origin and the nyms are looked up together
+            originRole, *nyms = gather(
+                s, ("getRole", origin),
+                *(("getNym", nymOp[TARGET_NYM]) for nymOp in nymOps),
+                returnExceptions=True)
+            if isinstance(originRole, Exception):
                 raise UnauthorizedClientRequest(
                     request.identifier,
                     request.reqId,
                     "Nym {} not added to the ledger yet".format(origin))
 
-            role = op.get(ROLE)
-
-            nym = self.graphStore.getNym(op[TARGET_NYM])
-            if not nym:
-                # If nym does not exist
-                r, msg = Authoriser.authorised(NYM, ROLE, originRole,
-                                               oldVal=None, newVal=role)
-                if not r:
-                    raise UnauthorizedClientRequest(
-                        request.identifier,
-                        request.reqId,
-                        "{} cannot add {}".format(originRole, role))
-            else:
-                nym = nym.oRecordData
-                subjectRole = nym.get(ROLE)
-                if subjectRole != role:
-                    r, msg = Authoriser.authorised(NYM, ROLE, originRole,
-                                                   oldVal=subjectRole,
-                                                   newVal=role)
-                    if not r:
-                        raise UnauthorizedClientRequest(
-                            request.identifier,
-                            request.reqId,
-                            "{} cannot update {}".format(originRole, role))
+            # A batch is authorised only if every NYM in it is
+            for nymOp, nym in zip(nymOps, nyms):
+                if isinstance(nym, Exception):
+                    raise nym
+                self.checkNymAuthorized(request, originRole, nymOp, nym)
 
         elif typ == ATTRIB:
             if op.get(TARGET_NYM) and \
@@ -392,9 +909,43 @@ class Node(PlenumNode, HasPoolManager):
                     request.reqId,
                     "{} cannot do {}".format(originRole, POOL_UPGRADE))
 
+    def checkNymAuthorized(self, request: Request, originRole, op, nym):
+        """
+        Check `originRole` may make the change of `op` to the nym, whose
+        record is `nym`, None if it is not in the graph yet
+        """
+        role = op.get(ROLE)
+
+        if not nym:
+            # If nym does not exist
+            r, msg = Authoriser.authorised(NYM, ROLE, originRole,
+                                           oldVal=None, newVal=role)
+            if not r:
+                raise UnauthorizedClientRequest(
+                    request.identifier,
+                    request.reqId,
+                    "{} cannot add {}".format(originRole, role))
+        else:
+            nym = nym.oRecordData
+            subjectRole = nym.get(ROLE)
+            if subjectRole != role:
+                r, msg = Authoriser.authorised(NYM, ROLE, originRole,
+                                               oldVal=subjectRole,
+                                               newVal=role)
+                if not r:
+                    raise UnauthorizedClientRequest(
+                        request.identifier,
+                        request.reqId,
+                        "{} cannot update {}".format(originRole, role))
+
+    def nymExists(self, nym) -> bool:
+        if self.nymFilter and not self.nymFilter.mightHave(nym):
+            return False
+        return self.graphStore.hasNym(nym)
+
     def canNymRequestBeProcessed(self, identifier, msg):
         nym = msg.get(TARGET_NYM)
-        if self.graphStore.hasNym(nym):
+        if self.nymExists(nym):
             if not self.graphStore.hasTrustee(identifier) and \
                             self.graphStore.getSponsorFor(nym) != identifier:
                     return False
@@ -406,25 +957,250 @@ class Node(PlenumNode, HasPoolManager):
     def defaultNodeAuthNr(self):
         return NodeAuthNr(self.poolLedger)
 
+    def nextDue(self) -> Optional[float]:
+        """
+        Seconds until the next timer of the node or its upgrader is due, for
+        `TimerLooper` to sleep until then when the node is idle
+        """
+        return self.timers.nextDue()
+
     async def prod(self, limit: int = None) -> int:
+        if self.prodBudget:
+            self.prodBudget.startCycle(
+                hasBackground=bool(self.backgroundWork),
+                hasReadWorkers=bool(self.readWorkers))
         c = await super().prod(limit)
-        c += self.upgrader.service()
+        c += self.timers.service()
+        if self.gatewayListener:
+            allowed = self.clientIntakeLimit(limit)
+            if allowed:
+                c += self.serviceGateway(allowed)
+        if self.readWorkers:
+            c += self.budgeted(READ_REPLIES, self.readWorkers.service, limit)
+        for work in self.backgroundWork:
+            c += self.budgeted(BACKGROUND, work, limit)
+        if self.prodBudget:
+            self.prodBudget.endCycle()
         return c
 
+    def budgeted(self, kind, service, limit: int = None) -> int:
+        """
+        Call `service` with what is left of the cycle's budget for `kind`,
+        not at all if nothing is left
+        """
+        if not self.prodBudget:
+            return service(limit)
+        allowed = self.prodBudget.limit(kind, limit)
+        if not allowed:
+            return 0
+        count = service(allowed)
+        self.prodBudget.record(kind, count)
+        return count
+
+    async def serviceNodeMsgs(self, limit: int) -> int:
+        if not self.prodBudget:
+            return await super().serviceNodeMsgs(limit)
+        count = await super().serviceNodeMsgs(
+            self.prodBudget.limit(NODE_MSGS, limit) or 1)
+        self.prodBudget.record(NODE_MSGS, count)
+        return count
+
+    async def serviceClientMsgs(self, limit: int) -> int:
+        if not self.prodBudget:
+            return await super().serviceClientMsgs(limit)
+        allowed = self.clientIntakeLimit(limit)
+        if allowed:
+            return await super().serviceClientMsgs(allowed)
+        await self.processClientInBox()
+        return 0
+
+    def clientIntakeLimit(self, limit: int = None) -> Optional[int]:
+        """
+        Number of client messages which may be taken in this cycle: what is
+        left of the budgets of client writes and reads less the requests
+        already waiting for them, so a flood of one kind never queues more
+        than a cycle's worth of requests. No limit but `limit` without a
+        budget.
+        """
+        if not self.prodBudget:
+            return limit
+        room = sum(self.prodBudget.limit(kind) for kind in CLIENT_KINDS) - \
+            len(self.clientInBox) - \
+            sum(len(queue) for queue in self.clientQueues.values())
+        room = max(room, 0)
+        return room if limit is None else min(room, limit)
+
+    @staticmethod
+    def clientMsgKind(msg) -> str:
+        """
+        Budget a validated client message is handled under, messages other
+        than requests, e.g. for catch-up, go with the writes
+        """
+        operation = getattr(msg, 'operation', None)
+        if isinstance(operation, dict) and \
+                operation.get(TXN_TYPE) in readTxnTypes:
+            return CLIENT_READS
+        return CLIENT_WRITES
+
+    async def processClientInBox(self):
+        """
+        Handle the validated client messages, no more writes and reads than
+        their budgets allow, the rest waiting for the next cycles in order
+        """
+        if not self.prodBudget:
+            return await super().processClientInBox()
+        while self.clientInBox:
+            msg = self.clientInBox.popleft()
+            self.clientQueues[self.clientMsgKind(msg[0])].append(msg)
+        for kind in CLIENT_KINDS:
+            queue = self.clientQueues[kind]
+            count = min(len(queue), self.prodBudget.limit(kind))
+            for _ in range(count):
+                self.clientInBox.append(queue.popleft())
+            if count:
+                await super().processClientInBox()
+                self.prodBudget.record(kind, count)
+
+    def serviceGateway(self, limit: int = None) -> int:
+        """
+        Take the requests the client gateway forwarded
+        """
+        received = self.gatewayListener.service(limit)
+        for conn, msg in received:
+            frm = GATEWAY_CLIENT_PREFIX + msg[CLIENT]
+            self.gatewayClients.pop(frm, None)
+            self.gatewayClients[frm] = conn
+            if len(self.gatewayClients) > self.config.GatewayClientsSize:
+                self.gatewayClients.popitem(last=False)
+            self.handleGatewayRequest(msg[MSG], frm)
+        return len(received)
+
+    def handleGatewayRequest(self, msg, frm):
+        """
+        Check a request which the gateway authenticated like any other
+        client request but for its signature and rate, and queue it
+        """
+        identifier = msg.get(f.IDENTIFIER.nm)
+        reqId = msg.get(f.REQ_ID.nm)
+        try:
+            self.checkValidOperation(identifier, reqId, msg[OPERATION])
+            request = Request(**msg)
+        except InvalidClientRequest as ex:
+            self.transmitToClient(RequestNack(identifier, reqId, str(ex)),
+                                  frm)
+            return
+        except (KeyError, TypeError) as ex:
+            logger.warning("{} discarding malformed request {} from the "
+                           "gateway: {}".format(self, msg, ex))
+            return
+        if self.requestTrace:
+            self.requestTrace.record(msg, frm)
+        self.postToClientInBox(request, frm)
+
+    def transmitToClient(self, msg: Any, remoteName: str):
+        conn = self.gatewayClients.get(remoteName)
+        if conn is None:
+            if remoteName.startswith(GATEWAY_CLIENT_PREFIX):
+                logger.debug("{} cannot send {} to {}, it was forgotten".
+                             format(self, msg, remoteName))
+            else:
+                super().transmitToClient(msg, remoteName)
+        elif conn.closed:
+            logger.debug("{} cannot send {} to {}, its gateway is gone".
+                         format(self, msg, remoteName))
+            del self.gatewayClients[remoteName]
+        else:
+            conn.send({CLIENT: remoteName[len(GATEWAY_CLIENT_PREFIX):],
+                       MSG: self.clientstack.prepForSending(msg)})
+
+    def reportProdBudget(self):
+        logger.debug("{} prod budget {}, queued client messages {}".format(
+            self, self.prodBudget.metrics,
+            {kind: len(queue) for kind, queue in self.clientQueues.items()}))
+        self.timers.schedule("reportProdBudget", self.reportProdBudget,
+                             self.config.ProdBudgetReportInterval)
+
+    def serveRead(self, builder, request: Request, frm: str):
+        """
+        Build the reply to a read request with `builder` and send it, on a
+        read worker if the node has them
+        """
+        if self.readWorkers:
+            self.readWorkers.submit(partial(self.buildReadReply, builder),
+                                    request, frm)
+        else:
+            self.transmitToClient(self.buildReadReply(builder, request), frm)
+
+    def buildReadReply(self, builder, request: Request) -> Reply:
+        """
+        Build the reply to a read request with `builder` while no write is
+        applied, so the reply has no half applied write and its proofs are
+        against the state its data comes from
+        """
+        with self.stateLock.read():
+            return builder(request)
+
+    def readFailed(self, request: Request, ex: Exception, frm: str):
+        self.transmitToClient(RequestNack(*request.key, str(ex)), frm)
+
+    def addMerkleProof(self, result, seqNo):
+        """
+        Add the ledger's root hash and the audit path of the transaction with
+        `seqNo` to `result` so a client can check a reply it got from a
+        single node
+        """
+        if seqNo:
+            with self.stateLock.read():
+                result.update(self.primaryStorage.merkleInfo(seqNo))
+
     def processGetNymReq(self, request: Request, frm: str):
         self.transmitToClient(RequestAck(*request.key), frm)
+        self.serveRead(self.getNymReply, request, frm)
+
+    def getNymReply(self, request: Request) -> Reply:
         nym = request.operation[TARGET_NYM]
-        txn = self.graphStore.getAddNymTxn(nym)
+        txn = self.readGraph.getAddNymTxn(nym)
+        signed = self.signedStateRoot
+        proof = self.proveState(signed, self.identityState.proveNym, nym) \
+            if self.identityState else None
         txnId = self.genTxnId(request.identifier, request.reqId)
-        # TODO: We should have a single JSON encoder which does the
-        # encoding for us, like sorting by keys, handling datetime objects.
         result = {f.IDENTIFIER.nm: request.identifier,
                   f.REQ_ID.nm: request.reqId,
-                  DATA: json.dumps(txn, sort_keys=True) if txn else None,
+                  DATA: encodeJson(txn) if txn else None,
                   TXN_ID: txnId
                   }
         result.update(request.operation)
-        self.transmitToClient(Reply(result), frm)
+        if self.observer and txn:
+            self.addMerkleProof(result, txn.get(F.seqNo.name))
+        if proof:
+            result[STATE_PROOF] = proof
+            result[SIGNED_STATE_ROOT] = signed
+        return Reply(result)
+
+    def processGetNymsReq(self, request: Request, frm: str):
+        self.transmitToClient(RequestAck(*request.key), frm)
+        self.serveRead(self.getNymsReply, request, frm)
+
+    def getNymsReply(self, request: Request) -> Reply:
+        txns = self.readGraph.getAddNymTxns(*request.operation[DATA])
+        if self.observer:
+            for txn in txns.values():
+                if txn:
+                    self.addMerkleProof(txn, txn.get(F.seqNo.name))
+        signed = self.signedStateRoot
+        proofs = {nym: self.proveState(signed, self.identityState.proveNym,
+                                       nym)
+                  for nym in txns} if signed else None
+        result = {f.IDENTIFIER.nm: request.identifier,
+                  f.REQ_ID.nm: request.reqId,
+                  TXN_ID: self.genTxnId(request.identifier, request.reqId)
+                  }
+        result.update(request.operation)
+        result[DATA] = encodeJson(txns)
+        if proofs:
+            result[STATE_PROOF] = proofs
+            result[SIGNED_STATE_ROOT] = signed
+        return Reply(result)
 
     def processGetTxnReq(self, request: Request, frm: str):
         nym = request.operation[TARGET_NYM]
@@ -435,94 +1211,173 @@ class Node(PlenumNode, HasPoolManager):
             self.transmitToClient(RequestNack(*request.key, msg), frm)
         else:
             self.transmitToClient(RequestAck(*request.key), frm)
-            data = request.operation.get(DATA)
-            addNymTxn = self.graphStore.getAddNymTxn(origin)
-            txnIds = [addNymTxn[TXN_ID], ] + self.graphStore. \
-                getAddAttributeTxnIds(origin)
-            # If sending transactions to a user then should send user's
-            # sponsor creation transaction also
-            if addNymTxn.get(ROLE) is None:
-                sponsorNymTxn = self.graphStore.getAddNymTxn(
-                    addNymTxn.get(f.IDENTIFIER.nm))
-                txnIds = [sponsorNymTxn[TXN_ID], ] + txnIds
-            # TODO: Remove this log statement
-            logger.debug("{} getting replies for {}".format(self, txnIds))
-            result = self.secondaryStorage.getReplies(*txnIds, seqNo=data)
-            txns = sorted(list(result.values()), key=itemgetter(F.seqNo.name))
-            lastTxn = str(txns[-1][F.seqNo.name]) if len(txns) > 0 else data
-            result = {
-                TXN_ID: self.genTxnId(
-                    request.identifier, request.reqId)
-            }
-            result.update(request.operation)
-            # TODO: We should have a single JSON encoder which does the
-            # encoding for us, like sorting by keys, handling datetime objects.
-            result[DATA] = json.dumps({
-                LAST_TXN: lastTxn,
-                TXNS: txns
-            }, default=dateTimeEncoding, sort_keys=True)
-            result.update({
-                f.IDENTIFIER.nm: request.identifier,
-                f.REQ_ID.nm: request.reqId,
-            })
-            self.transmitToClient(Reply(result), frm)
+            self.serveRead(self.getTxnsReply, request, frm)
+
+    def getTxnsReply(self, request: Request) -> Reply:
+        origin = request.identifier
+        data = request.operation.get(DATA)
+        # The history index also has the sponsor's NYM for a user
+        seqNos, _ = self.txnHistory.txnsAfter(
+            origin, int(data) if data else 0)
+        txns = []
+        for seqNo in seqNos:
+            txn = self.domainReader.getBySeqNo(seqNo)
+            if txn:
+                txn[F.seqNo.name] = seqNo
+                txns.append(txn)
+        attribTxnIds = [txn[TXN_ID] for txn in txns
+                        if txn[TXN_TYPE] == ATTRIB]
+        if attribTxnIds:
+            # The ledger only has the hash of an attribute
+            attribs = self.readGraph.getResultForTxnIds(*attribTxnIds)
+            txns = [attribs.get(txn[F.seqNo.name], txn)
+                    if txn[TXN_TYPE] == ATTRIB else txn for txn in txns]
+        for txn in txns:
+            self.addMerkleProof(txn, txn[F.seqNo.name])
+        if self.attrBlobs:
+            txns = [self.attrBlobs.restore(txn)
+                    if txn[TXN_TYPE] == ATTRIB else txn for txn in txns]
+        lastTxn = str(txns[-1][F.seqNo.name]) if len(txns) > 0 else data
+        result = {
+            TXN_ID: self.genTxnId(
+                request.identifier, request.reqId)
+        }
+        result.update(request.operation)
+        result[DATA] = encodeJson({
+            LAST_TXN: lastTxn,
+            TXNS: txns
+        })
+        result.update({
+            f.IDENTIFIER.nm: request.identifier,
+            f.REQ_ID.nm: request.reqId,
+        })
+        return Reply(result)
 
     def processGetClaimDefReq(self, request: Request, frm: str):
+        self.serveRead(self.getClaimDefReply, request, frm)
+
+    def getClaimDefReply(self, request: Request) -> Reply:
         issuerNym = request.operation[TARGET_NYM]
         name = request.operation[DATA][NAME]
         version = request.operation[DATA][VERSION]
-        claimDef = self.graphStore.getClaimDef(issuerNym, name, version)
+        claimDef = self.readGraph.getClaimDef(issuerNym, name, version)
+        signed = self.signedStateRoot
+        proof = self.proveState(signed, self.identityState.proveClaimDef,
+                                issuerNym, name, version) \
+            if self.identityState else None
         result = {
             TXN_ID: self.genTxnId(
                 request.identifier, request.reqId)
         }
         result.update(request.operation)
-        result[DATA] = json.dumps(claimDef, sort_keys=True)
+        result[DATA] = encodeJson(claimDef)
         result.update({
             f.IDENTIFIER.nm: request.identifier,
             f.REQ_ID.nm: request.reqId,
         })
-        self.transmitToClient(Reply(result), frm)
+        if self.observer and claimDef:
+            self.addMerkleProof(result, claimDef.get(F.seqNo.name))
+        if proof:
+            result[STATE_PROOF] = proof
+            result[SIGNED_STATE_ROOT] = signed
+        return Reply(result)
 
     def processGetAttrsReq(self, request: Request, frm: str):
+        if self.observer:
+            # An observer only gets the ledger, which has the hashes of
+            # attributes but not their values
+            self.transmitToClient(RequestNack(
+                *request.key, "{} is an observer and does not have the "
+                              "values of attributes".format(self.name)), frm)
+            return
         self.transmitToClient(RequestAck(*request.key), frm)
+        self.serveRead(self.getAttrReply, request, frm)
+
+    def getAttrReply(self, request: Request) -> Reply:
         attrName = request.operation[RAW]
         nym = request.operation[TARGET_NYM]
-        attrWithSeqNo = self.graphStore.getRawAttrs(nym, attrName)
+        attrStore = self.attrIndex or self.readGraph
+        attrWithSeqNo = attrStore.getRawAttrs(nym, attrName)
+        signed = self.signedStateRoot
         result = {
             TXN_ID: self.genTxnId(
                 request.identifier, request.reqId)
         }
         if attrWithSeqNo:
-            attr = {attrName: attrWithSeqNo[attrName][0]}
-            result[DATA] = json.dumps(attr, sort_keys=True)
+            value = attrWithSeqNo[attrName][0]
+            if self.attrBlobs:
+                value = self.attrBlobs.attrValue(value, attrName)
+            attr = {attrName: value}
+            result[DATA] = encodeJson(attr)
             result[F.seqNo.name] = attrWithSeqNo[attrName][1]
+            if self.observer:
+                self.addMerkleProof(result, result[F.seqNo.name])
+            if self.identityState:
+                self.addAttrProof(result, nym, result[F.seqNo.name], signed)
         result.update(request.operation)
         result.update({
             f.IDENTIFIER.nm: request.identifier,
             f.REQ_ID.nm: request.reqId,
         })
-        self.transmitToClient(Reply(result), frm)
+        return Reply(result)
+
+    def addAttrProof(self, result, nym, seqNo, signedRoot):
+        """
+        Add to the reply `result` of a GET_ATTR the payload of the ATTRIB
+        with `seqNo` and the proof that the state has that payload's hash
+        for `nym`. The state only has hashes of payloads, so there is no
+        proof that a nym does not have an attribute.
+        """
+        ledgerTxn = self.domainReader.getBySeqNo(seqNo)
+        attrHash = ledgerAttrHash(ledgerTxn) if ledgerTxn else None
+        proof = self.proveState(signedRoot, self.identityState.proveAttr,
+                                nym, attrHash) if attrHash else None
+        if not proof:
+            return
+        stored = self.readGraph.getResultForTxnIds(
+            ledgerTxn[TXN_ID]).get(seqNo)
+        if not stored:
+            return
+        if self.attrBlobs:
+            stored = self.attrBlobs.restore(stored)
+        result[ATTR_PAYLOAD] = stored.get(RAW)
+        result[STATE_PROOF] = proof
+        result[SIGNED_STATE_ROOT] = signedRoot
 
     def processGetIssuerKeyReq(self, request: Request, frm: str):
         self.transmitToClient(RequestAck(*request.key), frm)
-        keys = self.graphStore.getIssuerKeys(request.operation[ORIGIN],
-                                             request.operation[REF])
+        self.serveRead(self.getIssuerKeyReply, request, frm)
+
+    def getIssuerKeyReply(self, request: Request) -> Reply:
+        keys = self.readGraph.getIssuerKeys(request.operation[ORIGIN],
+                                            request.operation[REF])
+        signed = self.signedStateRoot
+        proof = self.proveState(signed, self.identityState.proveIssuerKey,
+                                request.operation[ORIGIN],
+                                request.operation[REF]) \
+            if self.identityState else None
         result = {
             TXN_ID: self.genTxnId(
                 request.identifier, request.reqId)
         }
         result.update(request.operation)
-        result[DATA] = json.dumps(keys, sort_keys=True)
+        result[DATA] = encodeJson(keys)
         result.update({
             f.IDENTIFIER.nm: request.identifier,
             f.REQ_ID.nm: request.reqId,
         })
-        self.transmitToClient(Reply(result), frm)
+        if self.observer and keys:
+            self.addMerkleProof(result, keys.get(F.seqNo.name))
+        if proof:
+            result[STATE_PROOF] = proof
+            result[SIGNED_STATE_ROOT] = signed
+        return Reply(result)
 
     def processRequest(self, request: Request, frm: str):
         if request.operation[TXN_TYPE] == GET_NYM:
             self.processGetNymReq(request, frm)
+        elif request.operation[TXN_TYPE] == GET_NYMS:
+            self.processGetNymsReq(request, frm)
         elif request.operation[TXN_TYPE] == GET_TXNS:
             self.processGetTxnReq(request, frm)
         elif request.operation[TXN_TYPE] == GET_CLAIM_DEF:
@@ -531,6 +1386,10 @@ class Node(PlenumNode, HasPoolManager):
             self.processGetAttrsReq(request, frm)
         elif request.operation[TXN_TYPE] == GET_ISSUER_KEY:
             self.processGetIssuerKeyReq(request, frm)
+        elif self.observer:
+            self.transmitToClient(RequestNack(
+                *request.key, "{} is an observer and does not accept writes".
+                format(self.name)), frm)
         else:
             super().processRequest(request, frm)
 
@@ -544,17 +1403,22 @@ class Node(PlenumNode, HasPoolManager):
          client requests it.
         """
         result = reply.result
-        txnWithMerkleInfo = self.storeTxnInLedger(result)
-        self.sendReplyToClient(Reply(txnWithMerkleInfo),
-                               (result[f.IDENTIFIER.nm], result[f.REQ_ID.nm]))
-        reply.result[F.seqNo.name] = txnWithMerkleInfo.get(F.seqNo.name)
-        self.storeTxnInGraph(reply.result)
+        with self.stateLock.write():
+            txnWithMerkleInfo = self.storeTxnInLedger(result)
+            key = (result[f.IDENTIFIER.nm], result[f.REQ_ID.nm])
+            ledgerReply = Reply(txnWithMerkleInfo)
+            self.sendReplyToClient(ledgerReply, key)
+            self.recentReplies.add(key, ledgerReply)
+            reply.result[F.seqNo.name] = txnWithMerkleInfo.get(F.seqNo.name)
+            self.storeTxnInGraph(reply.result, txnWithMerkleInfo)
+            self.signStateRoot()
+        self.flushIndexes()
 
     @staticmethod
     def ledgerTypeForTxn(txnType: str):
         if txnType in POOL_TXN_TYPES:
             return 0
-        if txnType in IDENTITY_TXN_TYPES:
+        if txnType in IDENTITY_TXN_TYPES or txnType == NYMS:
             return 1
         if txnType in CONFIG_TXN_TYPES:
             return 2
@@ -567,30 +1431,49 @@ class Node(PlenumNode, HasPoolManager):
         return result
 
     @staticmethod
-    def hashAttribTxn(result):
+    def hashAttribTxn(result, stored=False):
         # Creating copy of result so that `RAW`, `ENC` or `HASH` can be
         # replaced by their hashes. We do not insert actual attribute data
-        # in the ledger but only the hash of it.
+        # in the ledger but only the hash of it. A `stored` result comes
+        # from the graph, where the payload may be a reference to the
+        # attribute blob store, which is keyed by that hash.
         result = deepcopy(result)
         if RAW in result:
-            result[RAW] = sha256(result[RAW].encode()).hexdigest()
+            result[RAW] = stored and storedDigest(result[RAW]) or \
+                sha256(result[RAW].encode()).hexdigest()
         elif ENC in result:
-            result[ENC] = sha256(result[ENC].encode()).hexdigest()
+            result[ENC] = stored and storedDigest(result[ENC]) or \
+                sha256(result[ENC].encode()).hexdigest()
         elif HASH in result:
             result[HASH] = result[HASH]
         else:
             error("Transaction missing required field")
         return result
 
-    def storeTxnInGraph(self, result):
+    def storeTxnInGraph(self, result, ledgerTxn=None):
+        """
+        :param ledgerTxn: `result` as the ledger has it, with the hash of
+        an attribute's payload instead of the payload. If None, `result`
+        comes from the ledger.
+        """
+        with self.stateLock.write():
+            self._storeTxnInGraph(result, ledgerTxn)
+
+    def _storeTxnInGraph(self, result, ledgerTxn=None):
         result = deepcopy(result)
         # Remove root hash and audit path from result if present since they can
         # be generated on the fly from the ledger so no need to store it
         result.pop(F.rootHash.name, None)
         result.pop(F.auditPath.name, None)
+        # The graph keeps large attribute payloads in the blob store
+        txn = result
+        if result[TXN_TYPE] == ATTRIB and self.attrBlobs:
+            result = self.attrBlobs.stash(result)
 
         if result[TXN_TYPE] == NYM:
             self.graphStore.addNymTxnToGraph(result)
+            if self.rateLimiter and ROLE in result:
+                self.rateLimiter.forget(result[TARGET_NYM])
         elif result[TXN_TYPE] == ATTRIB:
             self.graphStore.addAttribTxnToGraph(result)
         elif result[TXN_TYPE] == CLAIM_DEF:
@@ -600,22 +1483,53 @@ class Node(PlenumNode, HasPoolManager):
         else:
             logger.debug("Got an unknown type {} to process".
                          format(result[TXN_TYPE]))
+        for index in self.txnIndexes:
+            if index.ledgerAttrs:
+                index.addTxn(ledgerTxn or txn)
+            else:
+                index.addTxn(txn if index.attrPayloads else result)
 
     def getReplyFor(self, request):
+        reply = self.recentReplies.get(request.key)
+        if reply:
+            return reply
         typ = request.operation.get(TXN_TYPE)
+        if typ == NYMS:
+            return self.getNymBatchReply(request)
         if typ in IDENTITY_TXN_TYPES:
             result = self.secondaryStorage.getReply(request.identifier,
                                                     request.reqId,
                                                     type=request.operation[TXN_TYPE])
             if result:
                 if request.operation[TXN_TYPE] == ATTRIB:
-                    result = self.hashAttribTxn(result)
+                    result = self.hashAttribTxn(result, stored=True)
                 return Reply(result)
             else:
                 return None
         if typ in CONFIG_TXN_TYPES:
             return self.getReplyFromLedger(self.configLedger, request)
 
+    def getNymBatchReply(self, request):
+        """
+        Reply to a NYMS request which was ordered before, rebuilt from the
+        first of its NYM transactions, None if it was not ordered
+        """
+        txnId = self.genTxnId(request.identifier,
+                              "{}/0".format(request.reqId))
+        txns = self.graphStore.getResultForTxnIds(txnId)
+        if not txns:
+            return None
+        seqNo, txn = next(iter(txns.items()))
+        result = {TXN_ID: self.genTxnId(request.identifier, request.reqId),
+                  TXN_TIME: txn.get(TXN_TIME)}
+        result.update(request.operation)
+        result.update({
+            f.IDENTIFIER.nm: request.identifier,
+            f.REQ_ID.nm: request.reqId,
+            F.seqNo.name: seqNo
+        })
+        return Reply(result)
+
     def doCustomAction(self, ppTime: float, req: Request) -> None:
         """
         Execute the REQUEST sent to this Node
@@ -629,6 +1543,8 @@ class Node(PlenumNode, HasPoolManager):
             if req.key in self.requestSender:
                 self.transmitToClient(RequestNack(*req.key, reason),
                                       self.requestSender.pop(req.key))
+        elif req.operation[TXN_TYPE] == NYMS:
+            self.applyNymBatch(int(ppTime), req)
         else:
             reply = self.generateReply(int(ppTime), req)
             self.storeTxnAndSendToClient(reply)
@@ -637,6 +1553,52 @@ class Node(PlenumNode, HasPoolManager):
                 # so transaction goes to Upgrader
                 self.upgrader.handleUpgradeTxn(reply.result)
 
+    def applyNymBatch(self, ppTime: int, req: Request):
+        """
+        Add all the NYMs of a NYMS request as consecutive NYM transactions of
+        the ledger and send a single reply, or add none of them if one of the
+        nyms cannot be added anymore
+        """
+        nymOps = req.operation[DATA]
+        # Checked when the request was validated too, but a batch ordered
+        # since, or a retry of this one, may have added the nyms
+        added = [op[TARGET_NYM] for op in nymOps
+                 if self.nymExists(op[TARGET_NYM])]
+        if added:
+            reason = "nyms {} are already added".format(", ".join(added))
+            if req.key in self.requestSender:
+                self.transmitToClient(RequestNack(*req.key, reason),
+                                      self.requestSender.pop(req.key))
+            return
+        reply = self.generateReply(ppTime, req)
+        seqNos = []
+        with self.stateLock.write():
+            for i, op in enumerate(nymOps):
+                txn = self.nymTxnOfBatch(reply.result, i, op)
+                txnWithMerkleInfo = self.storeTxnInLedger(txn)
+                txn[F.seqNo.name] = txnWithMerkleInfo.get(F.seqNo.name)
+                self.storeTxnInGraph(txn)
+                seqNos.append(txn[F.seqNo.name])
+            self.signStateRoot()
+        self.flushIndexes()
+        # The NYMs are at seqNo and the positions right after it
+        reply.result[F.seqNo.name] = seqNos[0]
+        self.sendReplyToClient(reply, req.key)
+        self.recentReplies.add(req.key, reply)
+
+    def nymTxnOfBatch(self, batchResult, index, op):
+        identifier = batchResult[f.IDENTIFIER.nm]
+        reqId = batchResult[f.REQ_ID.nm]
+        txn = {
+            TXN_TYPE: NYM,
+            TXN_ID: self.genTxnId(identifier, "{}/{}".format(reqId, index)),
+            TXN_TIME: batchResult[TXN_TIME],
+            f.IDENTIFIER.nm: identifier,
+            f.REQ_ID.nm: reqId
+        }
+        txn.update(op)
+        return txn
+
     def generateReply(self, ppTime: float, req: Request):
         operation = req.operation
         txnId = self.genTxnId(req.identifier, req.reqId)
@@ -5,23 +5,25 @@ from plenum.common.exceptions import UnknownIdentifier
 from plenum.common.txn import TARGET_NYM, VERKEY
 from plenum.server.client_authn import NaclAuthNr
 
+from sovrin_node.persistence.ledger_reader import LedgerReader
+
 
 class NodeAuthNr(NaclAuthNr):
     def __init__(self, ledger: Ledger):
         self.ledger = ledger
+        self.ledgerReader = LedgerReader(ledger)
 
     @functools.lru_cache(maxsize=20)
     def getVerkey(self, identifier):
-        # TODO: This is very inefficient
-        verkey = None
+        # The latest transaction of the identifier with a verkey has its
+        # current verkey
         found = False
-        for txn in self.ledger.getAllTxn().values():
+        for _, txn in self.ledgerReader.txns(reverse=True):
             if txn[TARGET_NYM] == identifier:
                 found = True
                 if txn.get(VERKEY):
-                    verkey = txn[VERKEY]
+                    return txn[VERKEY]
 
         if not found:
             raise UnknownIdentifier(identifier)
-        verkey = verkey or identifier
-        return verkey
+        return identifier
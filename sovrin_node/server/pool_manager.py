@@ -1,10 +1,12 @@
 from copy import deepcopy
+from typing import Dict, Iterable, List, Optional
 
 from plenum.common.txn import POOL_TXN_TYPES, TXN_TYPE, DATA, ALIAS, \
-    TARGET_NYM
+    TARGET_NYM, NODE, SERVICES, VALIDATOR
 from plenum.server.pool_manager import HasPoolManager as PHasPoolManager, \
     TxnPoolManager as PTxnPoolManager
 from sovrin_common.auth import Authoriser
+from sovrin_node.persistence.graph_access import gather
 
 
 class HasPoolManager(PHasPoolManager):
@@ -26,8 +28,9 @@ class TxnPoolManager(PTxnPoolManager):
         origin = request.identifier
         operation = request.operation
         nodeNym = operation.get(TARGET_NYM)
-        isSteward = self.node.secondaryStorage.isSteward(origin)
-        actorRole = self.node.graphStore.getRole(origin)
+        isSteward, actorRole = gather(self.node.graphStore,
+                                      ("hasSteward", origin),
+                                      ("getRole", origin))
         _, nodeInfo = self.getNodeInfoFromLedger(nodeNym, excludeLast=False)
         typ = operation.get(TXN_TYPE)
         data = deepcopy(operation.get(DATA))
@@ -43,3 +46,21 @@ class TxnPoolManager(PTxnPoolManager):
             msgs.append(msg)
         msg = None if all(vals) else '\n'.join(msgs)
         return msg
+
+
+def nodeServices(poolTxns: Iterable[Dict], alias: str) -> Optional[List[str]]:
+    """
+    Services the NODE transactions among `poolTxns` last gave the node
+    `alias`, None if it is not among them. A node added without any is a
+    validator.
+    """
+    services = None
+    for txn in poolTxns:
+        data = txn.get(DATA) or {}
+        if txn.get(TXN_TYPE) != NODE or data.get(ALIAS) != alias:
+            continue
+        if SERVICES in data:
+            services = data[SERVICES]
+        elif services is None:
+            services = [VALIDATOR]
+    return services
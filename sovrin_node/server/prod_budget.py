@@ -0,0 +1,121 @@
+import math
+import time
+from typing import Callable, Dict
+
+NODE_MSGS = "nodeMsgs"
+CLIENT_WRITES = "clientWrites"
+CLIENT_READS = "clientReads"
+READ_REPLIES = "readReplies"
+BACKGROUND = "background"
+
+KINDS = (NODE_MSGS, CLIENT_WRITES, CLIENT_READS, READ_REPLIES, BACKGROUND)
+# Kinds which keep a share of the budget
+SHARED_KINDS = (CLIENT_WRITES, CLIENT_READS, READ_REPLIES, BACKGROUND)
+CLIENT_KINDS = (CLIENT_WRITES, CLIENT_READS)
+
+
+class ProdBudget:
+    """
+    Splits the number of messages one prod cycle of the node handles between
+    messages from other nodes, client writes, client reads, replies built by
+    the read workers and background work.
+
+    Node messages get whatever the other kinds do not keep: client writes,
+    client reads, read replies and background work each keep their `shares`
+    of the budget so a flood of one kind never stops the others, and client
+    writes and reads also get the part of the node messages' limit which
+    went unused in the previous cycle, in proportion to their shares.
+
+    The budget itself grows while cycles which use up a limit stay well
+    under `cycleTarget` seconds and is halved after a cycle which takes
+    longer, keeping the looper responsive whatever the load.
+    """
+
+    def __init__(self, cycleTarget: float, minBudget: int, maxBudget: int,
+                 shares: Dict[str, float],
+                 clock: Callable[[], float] = time.perf_counter):
+        self.cycleTarget = cycleTarget
+        self.minBudget = minBudget
+        self.maxBudget = maxBudget
+        self.shares = shares
+        self.clock = clock
+        self.budget = maxBudget
+        self.limits = {}    # type: Dict[str, int]
+        self.handled = dict.fromkeys(KINDS, 0)
+        self.lastHandled = dict.fromkeys(KINDS, 0)
+        self.lastCycleSeconds = 0.0
+        self.cycles = 0
+        self.slowCycles = 0
+        # Number of cycles in which each kind used up its limit
+        self.saturated = dict.fromkeys(KINDS, 0)
+        self._started = None
+
+    def startCycle(self, hasBackground=True, hasReadWorkers=True) \
+            -> Dict[str, int]:
+        """
+        Limits of the new cycle by kind. Without background work or read
+        workers, their kinds get nothing and leave their shares to node
+        messages.
+        """
+        budget = self.budget
+        limits = {kind: max(1, math.ceil(self.shares.get(kind, 0) * budget))
+                  for kind in SHARED_KINDS}
+        if not hasBackground:
+            limits[BACKGROUND] = 0
+        if not hasReadWorkers:
+            limits[READ_REPLIES] = 0
+        limits[NODE_MSGS] = max(1, budget - sum(limits.values()))
+        previous = self.limits.get(NODE_MSGS)
+        if previous is not None and self.lastHandled[NODE_MSGS] < previous:
+            unused = limits[NODE_MSGS] - min(self.lastHandled[NODE_MSGS],
+                                             limits[NODE_MSGS])
+            clientShares = sum(self.shares.get(kind, 0)
+                               for kind in CLIENT_KINDS)
+            for kind in CLIENT_KINDS:
+                share = self.shares.get(kind, 0) / clientShares \
+                    if clientShares else 1 / len(CLIENT_KINDS)
+                limits[kind] += int(unused * share)
+        self.limits = limits
+        self.handled = dict.fromkeys(KINDS, 0)
+        self._started = self.clock()
+        return limits
+
+    def limit(self, kind: str, limit: int = None) -> int:
+        """
+        How many messages of `kind` may still be handled this cycle, no
+        more than `limit` if given
+        """
+        left = max(self.limits.get(kind, 0) - self.handled[kind], 0)
+        return left if limit is None else min(left, limit)
+
+    def record(self, kind: str, count: int):
+        self.handled[kind] += count
+
+    def endCycle(self) -> float:
+        elapsed = self.clock() - self._started
+        self.cycles += 1
+        self.lastCycleSeconds = elapsed
+        self.lastHandled = dict(self.handled)
+        saturated = False
+        for kind, limit in self.limits.items():
+            if limit and self.handled[kind] >= limit:
+                self.saturated[kind] += 1
+                saturated = True
+        if elapsed > self.cycleTarget and any(self.handled.values()):
+            self.slowCycles += 1
+            self.budget = max(self.minBudget, self.budget // 2)
+        elif saturated and elapsed < self.cycleTarget / 2:
+            self.budget = min(self.maxBudget, self.budget + self.minBudget)
+        return elapsed
+
+    @property
+    def metrics(self) -> Dict:
+        return {
+            "budget": self.budget,
+            "limits": dict(self.limits),
+            "handled": dict(self.lastHandled),
+            "cycleSeconds": self.lastCycleSeconds,
+            "cycles": self.cycles,
+            "slowCycles": self.slowCycles,
+            "saturatedCycles": dict(self.saturated)
+        }
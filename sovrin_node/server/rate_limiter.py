@@ -0,0 +1,125 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from sovrin_common.txn import TRUSTEE, STEWARD, SPONSOR
+
+# Names of the roles in the `ClientRateLimits` setting
+USER_ROLE = "user"
+roleNames = {TRUSTEE: "trustee", STEWARD: "steward", SPONSOR: "sponsor"}
+
+# Requests a second as (reads, writes), None for no limit
+Limits = Tuple[Optional[float], Optional[float]]
+READS = 0
+WRITES = 1
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests a second on average and bursts of up to `burst`
+    """
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class ClientRateLimiter:
+    """
+    Admits client requests while their identifier and the connection they
+    came over are within their request rates, with separate buckets for
+    reads and writes. The rates of an identifier are those of its role,
+    found with `roleOf` when the identifier is first seen or after it is
+    forgotten; connections all have `connectionLimits`. Only the `maxKeys`
+    most recently seen identifiers and connections are tracked, the others
+    start afresh.
+    """
+
+    def __init__(self, roleLimits: Dict[str, Limits], connectionLimits: Limits,
+                 burstSeconds: float, roleOf: Callable[[str], Optional[str]],
+                 clock: Callable[[], float] = time.perf_counter,
+                 maxKeys: int = 100000):
+        self.roleLimits = roleLimits
+        self.connectionLimits = connectionLimits
+        self.burstSeconds = burstSeconds
+        self.roleOf = roleOf
+        self.clock = clock
+        self.maxKeys = maxKeys
+        self._identifiers = OrderedDict()
+        self._connections = OrderedDict()
+        # Number of requests refused because of their identifier or their
+        # connection
+        self.refused = {"identifier": 0, "connection": 0}
+
+    def _newBuckets(self, limits: Optional[Limits], now: float):
+        limits = limits or (None, None)
+        return tuple(TokenBucket(rate, max(rate * self.burstSeconds, 1), now)
+                     if rate is not None else None for rate in limits)
+
+    def _buckets(self, table: OrderedDict, key, limits: Callable[[], Limits],
+                 now: float):
+        buckets = table.pop(key, None)
+        if buckets is None:
+            buckets = self._newBuckets(limits(), now)
+            if len(table) >= self.maxKeys:
+                table.popitem(last=False)
+        table[key] = buckets
+        return buckets
+
+    def limitsOf(self, identifier: str) -> Optional[Limits]:
+        role = self.roleOf(identifier)
+        return self.roleLimits.get(roleNames.get(role, USER_ROLE))
+
+    def checkConnection(self, frm: str, write: bool) -> Optional[str]:
+        """
+        None if the connection `frm` may send the request, otherwise why it
+        may not. Checked before any work is done on the request.
+        """
+        now = self.clock()
+        kind, index = _kind(write)
+        bucket = self._buckets(self._connections, frm,
+                               lambda: self.connectionLimits, now)[index]
+        if bucket is not None and not bucket.take(now):
+            self.refused["connection"] += 1
+            return "too many {} from this connection, at most {} a " \
+                   "second".format(kind, bucket.rate)
+        return None
+
+    def checkIdentifier(self, identifier: str, write: bool) -> Optional[str]:
+        """
+        None if `identifier` may send the request, otherwise why it may not.
+        Only checked once the request's signature is verified, so nobody
+        uses up the requests of an identifier they do not hold.
+        """
+        now = self.clock()
+        kind, index = _kind(write)
+        bucket = self._buckets(self._identifiers, identifier,
+                               lambda: self.limitsOf(identifier), now)[index]
+        if bucket is not None and not bucket.take(now):
+            self.refused["identifier"] += 1
+            return "too many {} from {}, at most {} a second".\
+                format(kind, identifier, bucket.rate)
+        return None
+
+    def forget(self, identifier: str):
+        """
+        Drop the buckets of `identifier`, whose role changed, so its next
+        request gets the rates of its new role
+        """
+        self._identifiers.pop(identifier, None)
+
+
+def _kind(write: bool) -> Tuple[str, int]:
+    return ("writes", WRITES) if write else ("reads", READS)
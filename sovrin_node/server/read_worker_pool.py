@@ -0,0 +1,57 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from plenum.common.log import getlogger
+from plenum.common.types import Reply
+
+from sovrin_common.types import Request
+
+logger = getlogger()
+
+
+class ReadWorkerPool:
+    """
+    Builds the replies to read requests on worker threads. A finished reply
+    is queued and handed back to the looper by `service`, which is the only
+    place `transmit` (or `onError`) is called from, so the node's stacks are
+    never touched by a worker.
+    """
+
+    def __init__(self, workers: int,
+                 transmit: Callable[[Reply, str], None],
+                 onError: Callable[[Request, Exception, str], None]):
+        self.workers = workers
+        self.transmit = transmit
+        self.onError = onError
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._done = deque()
+        self.pending = 0
+
+    def submit(self, builder: Callable[[Request], Reply], request: Request,
+               frm: str):
+        self.pending += 1
+        self._executor.submit(self._build, builder, request, frm)
+
+    def _build(self, builder, request, frm):
+        try:
+            self._done.append((request, frm, builder(request), None))
+        except Exception as ex:
+            self._done.append((request, frm, None, ex))
+
+    def service(self, limit: int = None) -> int:
+        count = 0
+        while self._done and (limit is None or count < limit):
+            request, frm, reply, ex = self._done.popleft()
+            self.pending -= 1
+            count += 1
+            if ex is None:
+                self.transmit(reply, frm)
+            else:
+                logger.warning("building reply to {} failed: {}".
+                               format(request.key, ex))
+                self.onError(request, ex, frm)
+        return count
+
+    def stop(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,33 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from plenum.common.types import Reply
+
+ReqKey = Tuple[str, int]
+
+
+class RecentReplies:
+    """
+    The replies to the most recently ordered write requests by
+    (identifier, reqId), so that a client retrying one of them gets the same
+    reply again without a graph query or a new Merkle proof. Holds at most
+    `size` replies, dropping the oldest first.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._replies = OrderedDict()
+
+    def add(self, key: ReqKey, reply: Reply):
+        if not self.size:
+            return
+        self._replies[key] = reply
+        self._replies.move_to_end(key)
+        while len(self._replies) > self.size:
+            self._replies.popitem(last=False)
+
+    def get(self, key: ReqKey) -> Optional[Reply]:
+        return self._replies.get(key)
+
+    def __len__(self):
+        return len(self._replies)
@@ -0,0 +1,61 @@
+import json
+import os
+import time
+from typing import Dict, Iterator
+
+from plenum.common.log import getlogger
+from plenum.common.types import f, OPERATION
+
+logger = getlogger()
+
+ARRIVAL = "arrival"
+CLIENT = "client"
+
+
+class RequestTrace:
+    """
+    Append-only trace of accepted client requests, one JSON object per line
+    holding the request's operation, identifier, reqId, signature, the name of
+    the client connection it came over and its arrival time.
+    """
+
+    def __init__(self, filePath, flushEvery=100):
+        self.filePath = filePath
+        self.flushEvery = flushEvery
+        self._unflushed = 0
+        dirName = os.path.dirname(filePath)
+        if dirName:
+            os.makedirs(dirName, exist_ok=True)
+        self._file = open(filePath, mode="a")
+        logger.info("tracing client requests to {}".format(filePath))
+
+    def record(self, msg: Dict, frm: str, arrival: float = None):
+        entry = {
+            OPERATION: msg[OPERATION],
+            f.IDENTIFIER.nm: msg[f.IDENTIFIER.nm],
+            f.REQ_ID.nm: msg[f.REQ_ID.nm],
+            f.SIG.nm: msg.get(f.SIG.nm),
+            CLIENT: frm,
+            ARRIVAL: time.time() if arrival is None else arrival
+        }
+        self._file.write(json.dumps(entry, sort_keys=True))
+        self._file.write("\n")
+        self._unflushed += 1
+        if self._unflushed >= self.flushEvery:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        self._unflushed = 0
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    @staticmethod
+    def read(filePath) -> Iterator[Dict]:
+        with open(filePath) as file:
+            for line in file:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
@@ -0,0 +1,71 @@
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """
+    Lets any number of threads read at once, or a single thread write.
+
+    The writing thread may take the lock again, to write or to read. A
+    waiting writer goes before threads which start reading after it, so
+    reads never starve it, but a thread which is already reading may read
+    again.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writes = 0
+        self._waitingWriters = 0
+        # Reads the current thread is in
+        self._local = threading.local()
+
+    @property
+    def _reads(self) -> int:
+        return getattr(self._local, "reads", 0)
+
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        with self._cond:
+            counted = self._writer != me
+            if counted:
+                if not self._reads:
+                    while self._writer is not None or self._waitingWriters:
+                        self._cond.wait()
+                self._readers += 1
+        self._local.reads = self._reads + 1
+        try:
+            yield
+        finally:
+            self._local.reads -= 1
+            if counted:
+                with self._cond:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writes += 1
+            else:
+                if self._reads:
+                    raise RuntimeError("a reading thread cannot write")
+                self._waitingWriters += 1
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+                self._waitingWriters -= 1
+                self._writer = me
+                self._writes = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writes -= 1
+                if not self._writes:
+                    self._writer = None
+                    self._cond.notify_all()
@@ -0,0 +1,91 @@
+import heapq
+import time
+from itertools import count
+from typing import Callable, Hashable, Optional
+
+
+class TimerQueue:
+    """
+    Actions to run once their time comes, each under a key which cancels or
+    reschedules it.
+
+    Timers are kept in a heap ordered by deadline, so scheduling is
+    O(log n) and finding what is due only looks at the top. A cancelled or
+    rescheduled timer leaves its old entry in the heap, skipped when it
+    reaches the top; the heap is rebuilt when such entries outnumber the
+    live ones.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        # (deadline, sequence number, key)
+        self._heap = []
+        # key -> (deadline, sequence number, action) of the live timers
+        self._timers = {}
+        self._seqNos = count()
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, key):
+        return key in self._timers
+
+    def schedule(self, key: Hashable, action: Callable, delay: float):
+        """
+        Run `action` in `delay` seconds, replacing the timer `key` had
+        """
+        deadline = self.clock() + max(delay, 0)
+        seqNo = next(self._seqNos)
+        self._timers[key] = (deadline, seqNo, action)
+        heapq.heappush(self._heap, (deadline, seqNo, key))
+        if len(self._heap) > 2 * len(self._timers) + 16:
+            self._compact()
+
+    def cancel(self, key: Hashable) -> bool:
+        """
+        Cancel the timer of `key`, False if it had none
+        """
+        return self._timers.pop(key, None) is not None
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        timer = self._timers.get(key)
+        return timer[0] if timer else None
+
+    def _isLive(self, entry) -> bool:
+        timer = self._timers.get(entry[2])
+        return timer is not None and timer[1] == entry[1]
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._isLive(entry)]
+        heapq.heapify(self._heap)
+
+    @property
+    def nextDeadline(self) -> Optional[float]:
+        while self._heap and not self._isLive(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def nextDue(self) -> Optional[float]:
+        """
+        Seconds until the next timer is due, 0 if one is, None if there are
+        no timers, so a caller can sleep until then instead of polling
+        """
+        deadline = self.nextDeadline
+        if deadline is None:
+            return None
+        return max(deadline - self.clock(), 0)
+
+    def service(self) -> int:
+        """
+        Run the actions which are due, returning how many ran
+        """
+        now = self.clock()
+        ran = 0
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if not self._isLive(entry):
+                continue
+            _, _, action = self._timers.pop(entry[2])
+            action()
+            ran += 1
+        return ran
@@ -1,5 +1,4 @@
 import os
-from collections import deque
 from datetime import datetime
 from functools import partial
 from typing import Tuple, Union, Optional
@@ -10,18 +9,24 @@ import dateutil.tz
 from plenum.common.log import getlogger
 from plenum.common.txn import NAME, TXN_TYPE
 from plenum.common.txn import VERSION
-from plenum.server.has_action_queue import HasActionQueue
 from sovrin_common.txn import ACTION, POOL_UPGRADE, START, SCHEDULE, CANCEL
+from sovrin_node.persistence.ledger_reader import LedgerReader
+from sovrin_node.server.timer_queue import TimerQueue
 
 logger = getlogger()
 
+# Key of the timer of the scheduled upgrade
+UPGRADE_TIMER = "upgrade"
 
-class Upgrader(HasActionQueue):
-    def __init__(self, nodeId, config, baseDir, ledger):
+
+class Upgrader:
+    def __init__(self, nodeId, config, baseDir, ledger,
+                 timers: TimerQueue = None):
         self.nodeId = nodeId
         self.config = config
         self.baseDir = baseDir
         self.ledger = ledger
+        self.ledgerReader = LedgerReader(ledger)
 
         # TODO: Rename to `upgradedVersion`
         self.hasCodeBeenUpgraded = self._hasCodeBeenUpgraded()
@@ -36,18 +41,27 @@ class Upgrader(HasActionQueue):
             pass
         else:
             self.removeNextVersionFile()
-        self.scheduledUpgrade = None    # type: Tuple[str, int]
-        HasActionQueue.__init__(self)
+        self.scheduledUpgrade = None    # type: Tuple[str, float]
+        # Shared with the node when it passes its own
+        self.timers = timers or TimerQueue()
 
     def service(self):
-        return self._serviceActions()
+        return self.timers.service()
+
+    def nextDue(self) -> Optional[float]:
+        """
+        Seconds until the next timer of the upgrader's queue is due, None if
+        there is none. The queue is the node's when the node passed its own,
+        it then has the node's timers too, see `Node.nextDue`.
+        """
+        return self.timers.nextDue()
 
     def processLedger(self):
         # Assumption: Only version is enough to identify a release, no hash
         # checking is done
         currentVer = self.getVersion()
         upgrades = {}   # Map of version to scheduled time
-        for txn in self.ledger.getAllTxn().values():
+        for _, txn in self.ledgerReader.txns():
             if txn[TXN_TYPE] == POOL_UPGRADE:
                 if txn[ACTION] == START:
                     if self.isVersionHigher(currentVer, txn[VERSION]):
@@ -153,7 +167,7 @@ class Upgrader(HasActionQueue):
         for i in range(len(times)):
             if i == len(times) - 1:
                 break
-            diff = (times[i+1] - times[i]).seconds
+            diff = (times[i+1] - times[i]).total_seconds()
             if diff < self.config.MinSepBetweenNodeUpgrades:
                 return False, 'time span between upgrades is {} seconds which' \
                               ' is less than {}, specified in the config'.\
@@ -162,14 +176,11 @@ class Upgrader(HasActionQueue):
         return True, ''
 
     def statusInLedger(self, name, version):
-        t = {}
-        for txn in self.ledger.getAllTxn().values():
+        # The latest transaction for the upgrade has its status
+        for _, txn in self.ledgerReader.txns(reverse=True):
             if txn[NAME] == name and txn[VERSION] == version:
-                t = txn
-        if not t:
-            return None
-        else:
-            return t[ACTION]
+                return txn[ACTION]
+        return None
 
     def handleUpgradeTxn(self, txn):
         if txn[TXN_TYPE] == POOL_UPGRADE:
@@ -186,13 +197,11 @@ class Upgrader(HasActionQueue):
                             self.scheduledUpgrade[0], txn[VERSION]):
                         # If upgrade has been scheduled but for version lower
                         # than current transaction
-                        self.aqStash = deque()
-                        self.scheduledUpgrade = None
+                        self.cancelScheduledUpgrade()
                         self._upgrade(txn[VERSION], txn[SCHEDULE][self.nodeId])
             elif txn[ACTION] == CANCEL:
                 if self.scheduledUpgrade and self.scheduledUpgrade[0] == txn[VERSION]:
-                    self.scheduledUpgrade = None
-                    self.aqStash = deque()
+                    self.cancelScheduledUpgrade()
                     # An efficient way would be to enqueue all upgrades to do
                     # and then for each cancel keep dequeuing them
                     self.processLedger()
@@ -200,19 +209,24 @@ class Upgrader(HasActionQueue):
     def _upgrade(self, version, when: Union[datetime, str]):
         assert isinstance(when, (str, datetime))
         logger.info(
-            "{}'s upgrader processing upgrade for version".
+            "{}'s upgrader processing upgrade for version {}".
                 format(self.nodeId, version))
         if isinstance(when, str):
             when = dateutil.parser.parse(when)
         unow = datetime.utcnow().replace(tzinfo=dateutil.tz.tzutc())
         if when > unow:
-            delay = (when - unow).seconds
-            self._schedule(partial(self.callUpgradeAgent, version), delay)
+            delay = (when - unow).total_seconds()
+            self.timers.schedule(UPGRADE_TIMER,
+                                 partial(self.callUpgradeAgent, version), delay)
             self.scheduledUpgrade = (version, delay)
         else:
             self.callUpgradeAgent(version)
             return True
 
+    def cancelScheduledUpgrade(self):
+        self.timers.cancel(UPGRADE_TIMER)
+        self.scheduledUpgrade = None
+
     def callUpgradeAgent(self, version):
         # TODO: Call upgrade agent
         logger.info("{}'s upgrader calling agent for upgrade".format(self.nodeId))
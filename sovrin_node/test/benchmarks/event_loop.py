@@ -0,0 +1,117 @@
+#! /usr/bin/env python3
+"""
+Event loop benchmark. Runs the same NYM write workload on an in-process pool
+once on every event loop in `--loops`, each in a process of its own since
+the loop implementation has to be chosen before anything creates a loop,
+and reports the duration of the nodes' prod cycles, the messages they
+handled a second and the write latency and throughput clients saw.
+
+A loop which is not installed is reported as unavailable, the run then
+falls back to asyncio's loop.
+
+Usage:
+python -m sovrin_node.test.benchmarks.event_loop --loops asyncio,uvloop \
+    --nodes 4 --clients 4 --rate 20 --duration 30 --out loops.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from tempfile import TemporaryDirectory
+
+from sovrin_node.server.event_loop import useEventLoop
+from sovrin_node.test.benchmarks.helper import BenchPool, driveLoad, \
+    loadReport, latencySummary, benchEnvironment, writeReport
+from sovrin_node.test.benchmarks.pool_scaling import NymOps
+
+
+def timeProdCycles(nodes):
+    """
+    Make every node record the duration of each of its prod cycles and the
+    number of messages it handled in it
+    """
+    cycles = []
+    for node in nodes:
+        async def timedProd(limit=None, prod=node.prod):
+            start = time.perf_counter()
+            count = await prod(limit)
+            cycles.append((time.perf_counter() - start, count))
+            return count
+
+        node.prod = timedProd
+    return cycles
+
+
+def runOnLoop(loopName, nodeCount, clients, rate, duration):
+    inUse = useEventLoop(loopName)
+    with TemporaryDirectory() as tmpdir:
+        with BenchPool(nodeCount, tmpdir) as pool:
+            loadClients = pool.newSponsorClients(clients)
+            cycles = timeProdCycles(pool.nodes)
+            sent, start = pool.looper.run(driveLoad(
+                loadClients, NymOps('loop-'), rate, duration))
+            elapsed = time.perf_counter() - start
+            write = loadReport(loadClients, sent, start, duration)
+    busy = [seconds for seconds, count in cycles if count]
+    return {
+        "loop": loopName,
+        "available": inUse == loopName,
+        "prodCycle": latencySummary(seconds for seconds, _ in cycles),
+        "busyProdCycle": latencySummary(busy),
+        "messagesPerSecond": round(sum(c for _, c in cycles) / elapsed, 3),
+        "write": write
+    }
+
+
+def runBenchmark(loops, nodeCount, clients, rate, duration):
+    results = []
+    for loopName in loops:
+        out = subprocess.check_output([
+            sys.executable, '-m', __spec__.name, '--child', loopName,
+            '--nodes', str(nodeCount), '--clients', str(clients),
+            '--rate', str(rate), '--duration', str(duration)])
+        results.append(json.loads(out.decode().strip().splitlines()[-1]))
+    return {
+        "benchmark": "event_loop",
+        "env": benchEnvironment(),
+        "params": {
+            "loops": loops,
+            "nodes": nodeCount,
+            "clients": clients,
+            "rate": rate,
+            "duration": duration
+        },
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prod cycle duration and throughput of a pool on "
+                    "different event loops")
+    parser.add_argument('--loops', default='asyncio,uvloop',
+                        help='comma separated event loops')
+    parser.add_argument('--nodes', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=20,
+                        help='requests per second of the write workload')
+    parser.add_argument('--duration', type=float, default=30,
+                        help='seconds the write workload runs for')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--out', help='file to write the JSON report to, '
+                                      'printed if not given')
+    args = parser.parse_args()
+    if args.child:
+        # The result is the last line of the output
+        print(json.dumps(runOnLoop(args.child, args.nodes, args.clients,
+                                   args.rate, args.duration)))
+        return
+    loops = [name for name in args.loops.split(',') if name.strip()]
+    report = runBenchmark(loops, args.nodes, args.clients, args.rate,
+                          args.duration)
+    writeReport(report, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+from datetime import datetime
+from hashlib import sha256
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from plenum.common.eventually import eventually
+from plenum.common.log import getlogger
+from plenum.common.signer_simple import SimpleSigner
+from plenum.common.txn import VERKEY
+from plenum.common.util import getMaxFailures
+
+from sovrin_client.client.wallet.wallet import Wallet
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, TXN_ID, ROLE, NYM, \
+    STEWARD, SPONSOR
+from sovrin_node.test.helper import Scenario, genTestClient
+
+logger = getlogger()
+
+BenchStewardSeed = b'benchmark steward secret seed...'
+
+
+def percentile(sortedValues: Sequence[float], p: float):
+    """
+    Nearest-rank percentile of an already sorted sequence
+    """
+    if not sortedValues:
+        return None
+    rank = int(math.ceil(p / 100.0 * len(sortedValues)))
+    return sortedValues[max(rank, 1) - 1]
+
+
+def latencySummary(latencies: Iterable[float]) -> Dict:
+    """
+    Summarise latencies given in seconds, result values are in milliseconds
+    """
+    values = sorted(latencies)
+    if not values:
+        return {"count": 0}
+
+    def ms(v):
+        return round(v * 1000, 3)
+
+    return {
+        "count": len(values),
+        "mean": ms(sum(values) / len(values)),
+        "p50": ms(percentile(values, 50)),
+        "p95": ms(percentile(values, 95)),
+        "p99": ms(percentile(values, 99)),
+        "max": ms(values[-1])
+    }
+
+
+def _gitRevision():
+    repoDir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                         cwd=repoDir,
+                                         stderr=subprocess.DEVNULL)
+        status = subprocess.check_output(['git', 'status', '--porcelain',
+                                          '--untracked-files=no'],
+                                         cwd=repoDir,
+                                         stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit.decode().strip(), bool(status.strip())
+
+
+def benchEnvironment() -> Dict:
+    """
+    Everything needed to tell whether two reports are comparable
+    """
+    commit, dirty = _gitRevision()
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+        "startedAt": datetime.utcnow().isoformat()
+    }
+
+
+def writeReport(report: Dict, path: str = None):
+    out = json.dumps(report, indent=2, sort_keys=True)
+    if path:
+        with open(path, 'w') as f:
+            f.write(out)
+            f.write('\n')
+        logger.info("benchmark report written to {}".format(path))
+    else:
+        print(out)
+
+
+def parseMix(mix: str, allowed: Iterable[str]) -> OrderedDict:
+    """
+    Parse a mix like `NYM=70,ATTRIB=30` into normalised weights
+    """
+    allowed = set(allowed)
+    weights = OrderedDict()
+    for part in mix.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        typ, _, weight = part.partition('=')
+        typ = typ.strip().upper()
+        if typ not in allowed:
+            raise ValueError('{} is not one of {}'.format(typ, sorted(allowed)))
+        weights[typ] = float(weight) if weight else 1.0
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError('mix {} has no positive weight'.format(mix))
+    return OrderedDict((k, v / total) for k, v in weights.items())
+
+
+def genesisStewardTxn(stewardWallet: Wallet):
+    nym = stewardWallet.defaultId
+    return {
+        TXN_TYPE: NYM,
+        TARGET_NYM: nym,
+        TXN_ID: sha256(nym.encode()).hexdigest(),
+        ROLE: STEWARD,
+        VERKEY: stewardWallet.getVerkey()
+    }
+
+
+def seededWallet(name: str, seed: bytes) -> Wallet:
+    wallet = Wallet(name)
+    wallet.addIdentifier(signer=SimpleSigner(seed=seed))
+    return wallet
+
+
+class LoadClient:
+    """
+    A test client which remembers when each request was sent and records
+    the latency once f+1 nodes have replied to it.
+    """
+
+    def __init__(self, pool: 'BenchPool', wallet: Wallet):
+        self.pool = pool
+        self.wallet = wallet
+        self.client, _ = genTestClient(pool.nodes, tmpdir=pool.tmpdir)
+        self.client.registerObserver(self.onReply)
+        self.requiredReplies = getMaxFailures(len(pool.nodes)) + 1
+        # reqId -> (time of sending, txn type, whether to keep the result)
+        self.pending = {}
+        # (txn type, time of sending, latency) of completed requests
+        self.completed = []
+        self.results = {}
+
+    def submit(self, op, keepResult=False, identifier=None):
+        req = self.wallet.signOp(op, identifier=identifier)
+        self.pending[req.reqId] = (time.perf_counter(), op[TXN_TYPE],
+                                   keepResult)
+        self.client.submitReqs(req)
+        return req
+
+    def onReply(self, observerName, reqId, frm, result, numReplies):
+        if numReplies < self.requiredReplies or reqId not in self.pending:
+            return
+        sentAt, typ, keepResult = self.pending.pop(reqId)
+        self.completed.append((typ, sentAt, time.perf_counter() - sentAt))
+        if keepResult:
+            self.results[reqId] = result
+
+    async def waitFor(self, *reqs, timeout=30):
+        def chk():
+            assert all(r.reqId not in self.pending for r in reqs)
+        await eventually(chk, retryWait=.1, timeout=timeout)
+        return [self.results.get(r.reqId) for r in reqs]
+
+
+class BenchPool(ExitStack):
+    """
+    An in-process pool of `TestNode`s with a steward in the genesis
+    transactions, everything runs on one looper without leaving the machine.
+    """
+
+    def __init__(self, nodeCount: int, tmpdir: str,
+                 stewardSeed: bytes = BenchStewardSeed):
+        super().__init__()
+        self.tmpdir = tmpdir
+        self.scenario = self.enter_context(Scenario(nodeCount=nodeCount,
+                                                    tmpdir=tmpdir))
+        self.nodes = self.scenario.nodes
+        self.looper = self.scenario.looper
+        self.stewardWallet = seededWallet('steward', stewardSeed)
+        genesis = [genesisStewardTxn(self.stewardWallet)]
+        for node in self.nodes:
+            node.addGenesisTxns(genesis)
+            node._addTxnsToGraphIfNeeded()
+        self.scenario.run(Scenario.start)
+        self.steward = self.newClient(self.stewardWallet)
+
+    def newClient(self, wallet: Wallet) -> LoadClient:
+        client = LoadClient(self, wallet)
+        self.looper.add(client.client)
+        self.looper.run(client.client.ensureConnectedToNodes())
+        return client
+
+    def addIdentities(self, identities: List[Tuple[str, str]], role=SPONSOR,
+                      timeout=60, chunk=100):
+        """
+        Make the steward write a NYM for every (identifier, verkey) pair
+        """
+        for i in range(0, len(identities), chunk):
+            reqs = []
+            for identifier, verkey in identities[i:i + chunk]:
+                reqs.append(self.steward.submit({
+                    TXN_TYPE: NYM,
+                    TARGET_NYM: identifier,
+                    VERKEY: verkey,
+                    ROLE: role
+                }))
+            self.looper.run(self.steward.waitFor(*reqs, timeout=timeout))
+        self.steward.completed.clear()
+
+    def newSponsorClients(self, count: int) -> List[LoadClient]:
+        wallets = [seededWallet('sponsor{}'.format(i),
+                                'bench sponsor {:>18}'.format(i).encode())
+                   for i in range(count)]
+        self.addIdentities([(w.defaultId, w.getVerkey()) for w in wallets],
+                           role=SPONSOR)
+        return [self.newClient(w) for w in wallets]
+
+
+async def driveLoad(clients: List[LoadClient],
+                    nextOp: Callable[[LoadClient], Dict],
+                    rate: float,
+                    duration: float,
+                    drainTimeout: float = 30,
+                    tick: float = .005):
+    """
+    Submit requests round robin over `clients` at `rate` requests per second
+    for `duration` seconds, then wait up to `drainTimeout` seconds for the
+    outstanding ones. Returns the number of requests sent and the time the
+    load started at.
+    """
+    sent = 0
+    start = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            break
+        due = int(elapsed * rate) - sent
+        for _ in range(due):
+            client = clients[sent % len(clients)]
+            client.submit(nextOp(client))
+            sent += 1
+        await asyncio.sleep(tick)
+
+    deadline = time.perf_counter() + drainTimeout
+    while any(c.pending for c in clients) and \
+            time.perf_counter() < deadline:
+        await asyncio.sleep(tick)
+    return sent, start
+
+
+def loadReport(clients: List[LoadClient], sent: int, start: float,
+               duration: float) -> Dict:
+    completed = [c for client in clients for c in client.completed
+                 if c[1] >= start]
+    inWindow = [c for c in completed if c[1] + c[2] <= start + duration]
+    byType = {}
+    for typ in sorted({c[0] for c in completed}):
+        byType[typ] = latencySummary(c[2] for c in completed if c[0] == typ)
+    return {
+        "sent": sent,
+        "completed": len(completed),
+        "timedOut": sum(len(c.pending) for c in clients),
+        "sustainedThroughput": round(len(inWindow) / duration, 3),
+        "latency": latencySummary(c[2] for c in completed),
+        "latencyByType": byType
+    }
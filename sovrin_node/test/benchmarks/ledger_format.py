@@ -0,0 +1,144 @@
+#! /usr/bin/env python3
+"""
+Compares the text and binary formats of the domain ledger on a synthetic
+ledger of `--txns` transactions, half NYMs and half ATTRIBs as they are
+stored (with the hash of the raw attribute).
+
+Reports the size of both files, the time to write them, to parse every
+transaction back in order and to read `--lookups` random transactions by
+seqNo through the ledger's store.
+
+Usage:
+python -m sovrin_node.test.benchmarks.ledger_format --txns 1000000 \
+    --out ledger_format.json
+"""
+import argparse
+import os
+import random
+import time
+from hashlib import sha256
+from tempfile import TemporaryDirectory
+
+from ledger.serializers.compact_serializer import CompactSerializer
+from plenum.common.txn import RAW, VERKEY
+from plenum.common.types import f
+
+from sovrin_common.txn import getTxnOrderedFields, TXN_TYPE, TARGET_NYM, \
+    TXN_ID, TXN_TIME, NYM, ATTRIB, ROLE, SPONSOR
+from sovrin_node.persistence.binary_ledger import BinaryFileStore, \
+    textRecords
+from sovrin_node.persistence.binary_serializer import BinarySerializer
+from sovrin_node.test.benchmarks.helper import benchEnvironment, writeReport
+
+
+def syntheticTxns(count):
+    sponsor = 'sponsor{:0>37}'.format(0)
+    for i in range(count):
+        nym = '{:0>44}'.format(i)
+        txn = {f.IDENTIFIER.nm: sponsor, f.REQ_ID.nm: 1487000000000000 + i,
+               TXN_ID: sha256(nym.encode()).hexdigest(),
+               TXN_TIME: 1487000000 + i // 10, TARGET_NYM: nym}
+        if i % 2:
+            txn.update({TXN_TYPE: ATTRIB,
+                        RAW: sha256(nym.encode() * 2).hexdigest()})
+        else:
+            txn.update({TXN_TYPE: NYM, VERKEY: '~' + nym[:22],
+                        ROLE: SPONSOR})
+        yield txn
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return round(time.perf_counter() - start, 3)
+
+
+def runBenchmark(count, lookups, dataDir):
+    fields = getTxnOrderedFields()
+    compact = CompactSerializer(fields=fields)
+    binary = BinarySerializer(fields)
+    textPath = os.path.join(dataDir, 'transactions')
+    binaryStore = BinaryFileStore(dataDir, 'transactions.bin',
+                                  ensureDurability=False)
+
+    def writeText():
+        with open(textPath, 'w') as file:
+            for txn in syntheticTxns(count):
+                file.write(compact.serialize(txn, toBytes=False))
+                file.write('\n')
+
+    def writeBinary():
+        for txn in syntheticTxns(count):
+            binaryStore.put(binary.serialize(txn))
+
+    def parseText():
+        for text in textRecords(textPath):
+            compact.deserialize(text)
+
+    def parseBinary():
+        for _, record in binaryStore.iterator():
+            binary.deserialize(record)
+
+    seqNos = [random.randint(1, count) for _ in range(lookups)]
+    # The text store has no index, a lookup by seqNo is a scan for its line
+    lines = []
+
+    def indexText():
+        with open(textPath, 'rb') as file:
+            offset = 0
+            for line in file:
+                lines.append(offset)
+                offset += len(line)
+
+    def lookupText():
+        with open(textPath, 'rb') as file:
+            for seqNo in seqNos:
+                file.seek(lines[seqNo - 1])
+                compact.deserialize(file.readline().rstrip(b'\n'))
+
+    def lookupBinary():
+        for seqNo in seqNos:
+            binary.deserialize(binaryStore.get(str(seqNo)))
+
+    results = {
+        "text": {"writeSeconds": timed(writeText)},
+        "binary": {"writeSeconds": timed(writeBinary)}
+    }
+    results["text"]["bytes"] = os.path.getsize(textPath)
+    results["binary"]["bytes"] = os.path.getsize(binaryStore.dbPath)
+    results["text"]["parseAllSeconds"] = timed(parseText)
+    results["binary"]["parseAllSeconds"] = timed(parseBinary)
+    timed(indexText)
+    results["text"]["lookupSeconds"] = timed(lookupText)
+    results["binary"]["lookupSeconds"] = timed(lookupBinary)
+    binaryStore.close()
+    return {
+        "benchmark": "ledger_format",
+        "env": benchEnvironment(),
+        "params": {"txns": count, "lookups": lookups},
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Size and parse speed of the text and binary ledgers")
+    parser.add_argument('--txns', type=int, default=1000000,
+                        help='transactions in the ledger')
+    parser.add_argument('--lookups', type=int, default=100000,
+                        help='random reads by seqNo')
+    parser.add_argument('--dir', help='directory for the ledger files, a '
+                                      'temporary one if not given')
+    parser.add_argument('--out', help='file to write the JSON report to, '
+                                      'printed if not given')
+    args = parser.parse_args()
+    if args.dir:
+        report = runBenchmark(args.txns, args.lookups, args.dir)
+    else:
+        with TemporaryDirectory() as dataDir:
+            report = runBenchmark(args.txns, args.lookups, dataDir)
+    writeReport(report, args.out)
+
+
+if __name__ == '__main__':
+    main()
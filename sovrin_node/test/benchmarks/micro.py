@@ -0,0 +1,245 @@
+#! /usr/bin/env python3
+"""
+Network-free micro-benchmarks of the node's hot functions. The node methods
+run against `TestGraphStorage`, an in-memory stand-in for the identity graph,
+with synthetic requests so a full run takes seconds.
+
+For every function the report has the best time per call out of `--repeat`
+rounds of `--number` calls, and from `tracemalloc` the peak memory allocated
+during one call and the number of memory blocks still alive after it.
+
+Usage:
+python -m sovrin_node.test.benchmarks.micro --number 10000 --repeat 5 \
+    --filter Authorized --out micro.json
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from hashlib import sha256
+from itertools import cycle
+
+from ledger.util import F
+from plenum.common.exceptions import UnknownIdentifier
+from plenum.common.signer_simple import SimpleSigner
+from plenum.common.txn import RAW, VERKEY
+from plenum.common.types import f
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, TXN_ID, ROLE, NYM, \
+    ATTRIB, STEWARD, SPONSOR, LAST_TXN, TXNS
+from sovrin_common.types import Request
+from sovrin_node.common.json_encoding import encodeJson
+from sovrin_node.server.client_authn import TxnBasedAuthNr
+from sovrin_node.server.node import Node
+from sovrin_node.test.benchmarks.helper import benchEnvironment, writeReport
+from sovrin_node.test.helper import TestGraphStorage, unstartedNode
+
+Identities = 1000
+
+
+def nymTxn(nym, creator, seqNo, role=None):
+    return {
+        TXN_TYPE: NYM,
+        TARGET_NYM: nym,
+        ROLE: role,
+        VERKEY: nym,
+        f.IDENTIFIER.nm: creator,
+        f.REQ_ID.nm: seqNo,
+        TXN_ID: sha256('{}{}'.format(creator, seqNo).encode()).hexdigest(),
+        F.seqNo.name: seqNo
+    }
+
+
+def attribTxn(nym, seqNo, size=1024):
+    return {
+        TXN_TYPE: ATTRIB,
+        TARGET_NYM: nym,
+        RAW: json.dumps({'attr{}'.format(seqNo): 'x' * size}),
+        f.IDENTIFIER.nm: nym,
+        f.REQ_ID.nm: seqNo,
+        TXN_ID: sha256('{}{}'.format(nym, seqNo).encode()).hexdigest(),
+        F.seqNo.name: seqNo
+    }
+
+
+class Config:
+    # The indexes the benchmarked functions use, which are off by default
+    StateTrieFile = "state_trie"
+    AttributeIndexFile = "attr_index"
+    NymFilterFile = "nym_filter"
+
+
+class Fixture:
+    """
+    A node which is never started, backed by an in-memory graph holding a
+    steward, a sponsor and `Identities` users of the sponsor
+    """
+    def __init__(self):
+        self.signers = [SimpleSigner(seed='micro bench {:>20}'.format(i)
+                                     .encode())
+                        for i in range(Identities + 2)]
+        self.steward = self.signers[0].identifier
+        self.sponsor = self.signers[1].identifier
+        self.users = [s.identifier for s in self.signers[2:]]
+        self.graph = TestGraphStorage()
+        self.node = unstartedNode(self.graph, config=Config())
+        self.seqNo = 0
+        self.store(nymTxn(self.steward, self.steward, self.nextSeqNo(),
+                          STEWARD))
+        self.store(nymTxn(self.sponsor, self.steward, self.nextSeqNo(),
+                          SPONSOR))
+        for user in self.users:
+            self.store(nymTxn(user, self.sponsor, self.nextSeqNo()))
+        self.authNr = TxnBasedAuthNr(self.graph, self.node.nymFilter)
+
+    def nextSeqNo(self):
+        self.seqNo += 1
+        return self.seqNo
+
+    def store(self, txn):
+        self.node.storeTxnInGraph(txn)
+
+    def unknownVerkey(self, identifier):
+        try:
+            self.authNr.getVerkey(identifier)
+        except UnknownIdentifier:
+            pass
+
+    def request(self, identifier, op):
+        return Request(identifier=identifier, reqId=self.nextSeqNo(),
+                       operation=op)
+
+
+def benchmarks(fx: Fixture):
+    """
+    Returns name -> zero argument callable
+    """
+    node = fx.node
+    newNyms = cycle('{:0>22}'.format(i) for i in range(Identities))
+    users = cycle(fx.users)
+    attribOp = {TXN_TYPE: ATTRIB, TARGET_NYM: fx.users[0],
+                RAW: json.dumps({'email': 'user@example.com'})}
+    attribReq = fx.request(fx.sponsor, attribOp)
+    nymReq = fx.request(fx.steward, {TXN_TYPE: NYM,
+                                     TARGET_NYM: 'unknownNym000000000000',
+                                     ROLE: SPONSOR})
+    attribResult = attribTxn(fx.users[0], 1)
+    # Indexes skip transactions they already have, so seqNos keep growing
+    graphNyms = ({TXN_TYPE: NYM, TARGET_NYM: nym, VERKEY: nym,
+                  f.IDENTIFIER.nm: fx.sponsor, f.REQ_ID.nm: i,
+                  TXN_ID: sha256(nym.encode()).hexdigest(),
+                  F.seqNo.name: fx.nextSeqNo()}
+                 for i, nym in enumerate(
+                     'g{:0>21}'.format(j) for j in range(10 ** 9)))
+    graphAttribs = (attribTxn(nym, fx.nextSeqNo(), size=256)
+                    for nym in users)
+    nymMsg = {'identifier': fx.steward, 'reqId': 1,
+              'operation': nymReq.operation, 'signature': 'x' * 88}
+    attribMsg = {'identifier': fx.sponsor, 'reqId': 2,
+                 'operation': attribOp, 'signature': 'x' * 88}
+    txnsData = {LAST_TXN: '100',
+                TXNS: [attribTxn(fx.users[0], seqNo, size=256)
+                       for seqNo in range(1, 101)]}
+
+    return {
+        'checkValidSovrinOperation[NYM]':
+            lambda: node.checkValidSovrinOperation(
+                fx.steward, 1, {TXN_TYPE: NYM, TARGET_NYM: next(newNyms)}),
+        'checkValidSovrinOperation[ATTRIB]':
+            lambda: node.checkValidSovrinOperation(fx.sponsor, 1, attribOp),
+        'nymExists[unknown]':
+            lambda: node.nymExists(next(newNyms)),
+        'getVerkey[unknown]':
+            lambda: fx.unknownVerkey(next(newNyms)),
+        'checkRequestAuthorized[NYM]':
+            lambda: node.checkRequestAuthorized(nymReq),
+        'checkRequestAuthorized[ATTRIB]':
+            lambda: node.checkRequestAuthorized(attribReq),
+        'hashAttribTxn':
+            lambda: Node.hashAttribTxn(attribResult),
+        'storeTxnInGraph[NYM]':
+            lambda: node.storeTxnInGraph(next(graphNyms)),
+        'storeTxnInGraph[ATTRIB]':
+            lambda: node.storeTxnInGraph(next(graphAttribs)),
+        'encodeJson[GET_TXNS]':
+            lambda: encodeJson(txnsData),
+        'generateReply':
+            lambda: node.generateReply(time.time(), attribReq),
+        'serializeForSig[NYM]':
+            lambda: fx.authNr.serializeForSig(nymMsg),
+        'serializeForSig[ATTRIB]':
+            lambda: fx.authNr.serializeForSig(attribMsg),
+    }
+
+
+def timeCall(fn, number, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        perOp = (time.perf_counter() - start) / number
+        best = perOp if best is None else min(best, perOp)
+    return best * 1e9
+
+
+def memoryOfCall(fn, samples):
+    peaks = []
+    blocks = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            tracemalloc.clear_traces()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak)
+            blocks.append(len(tracemalloc.take_snapshot().traces))
+    finally:
+        tracemalloc.stop()
+    return statistics.median(peaks), statistics.median(blocks)
+
+
+def runBenchmark(number, repeat, samples, nameFilter=None):
+    fx = Fixture()
+    results = {}
+    for name, fn in sorted(benchmarks(fx).items()):
+        if nameFilter and nameFilter not in name:
+            continue
+        fn()
+        nsPerOp = timeCall(fn, number, repeat)
+        peakBytes, liveBlocks = memoryOfCall(fn, samples)
+        results[name] = {
+            "nsPerOp": round(nsPerOp, 1),
+            "allocPeakBytesPerOp": peakBytes,
+            "liveBlocksPerOp": liveBlocks
+        }
+    return {
+        "benchmark": "micro",
+        "env": benchEnvironment(),
+        "params": {"number": number, "repeat": repeat, "samples": samples,
+                   "identities": Identities},
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmarks of node hot functions")
+    parser.add_argument('--number', type=int, default=10000,
+                        help='calls per timing round')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timing rounds, the best one is reported')
+    parser.add_argument('--samples', type=int, default=50,
+                        help='calls traced for memory allocation')
+    parser.add_argument('--filter', help='only run benchmarks whose name '
+                                         'contains this')
+    parser.add_argument('--out', help='file to write the JSON report to, '
+                                      'printed if not given')
+    args = parser.parse_args()
+    writeReport(runBenchmark(args.number, args.repeat, args.samples,
+                             args.filter), args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#! /usr/bin/env python3
+"""
+Pool scaling benchmark. Runs the same NYM write workload on in-process pools
+of growing size and, at several domain ledger sizes, measures how long a view
+change takes and how long a fresh node needs to catch up.
+
+Usage:
+python -m sovrin_node.test.benchmarks.pool_scaling --pools 4,7,10,13,25 \
+    --ledgerSizes 100,1000,5000 --rate 20 --duration 20 --out scaling.json
+"""
+import argparse
+import time
+from hashlib import sha256
+from tempfile import TemporaryDirectory
+
+from plenum.common.eventually import eventually
+from plenum.common.log import getlogger
+from plenum.common.signer_simple import SimpleSigner
+from plenum.common.txn import VERKEY
+from plenum.test.test_node import checkNodesConnected
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, NYM
+from sovrin_node.test.benchmarks.helper import BenchPool, driveLoad, \
+    loadReport, benchEnvironment, writeReport
+
+logger = getlogger()
+
+
+class NymOps:
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.counter = 0
+
+    def __call__(self, client=None):
+        self.counter += 1
+        seed = sha256('{}{}'.format(self.prefix, self.counter).encode())
+        signer = SimpleSigner(seed=seed.digest())
+        return {TXN_TYPE: NYM, TARGET_NYM: signer.identifier,
+                VERKEY: signer.verkey}
+
+
+def fillLedger(pool: BenchPool, clients, ops, size, chunk=100):
+    """
+    Write NYMs until the domain ledger of every node has at least `size`
+    transactions
+    """
+    nodes = list(pool.nodes)
+    while min(n.domainLedger.size for n in nodes) < size:
+        missing = size - min(n.domainLedger.size for n in nodes)
+        for client in clients:
+            reqs = [client.submit(ops(client))
+                    for _ in range(min(chunk, missing))]
+            pool.looper.run(client.waitFor(*reqs, timeout=10 + len(reqs)))
+            missing -= len(reqs)
+            if missing <= 0:
+                break
+        for client in clients:
+            client.completed.clear()
+
+
+def measureViewChange(pool: BenchPool, timeout):
+    nodes = list(pool.nodes)
+    viewNo = max(n.viewNo for n in nodes) + 1
+
+    def chk():
+        for node in nodes:
+            assert node.viewNo == viewNo
+            assert all(r.primaryName is not None for r in node.replicas)
+
+    start = time.perf_counter()
+    for node in nodes:
+        node.startViewChange(viewNo)
+    pool.looper.run(eventually(chk, retryWait=.05, timeout=timeout))
+    return time.perf_counter() - start
+
+
+def measureCatchup(pool: BenchPool, timeout):
+    """
+    Replace the last node of the pool with a node having empty storage and
+    time how long it takes until its domain ledger matches the others
+    """
+    nodeSet = pool.nodes
+    old = list(nodeSet)[-1]
+    name = old.name
+    pool.looper.removeProdable(old)
+    nodeSet.removeNode(name, shouldClean=False)
+    old.cleanupDataLocation()
+    others = list(nodeSet)
+    targetSize = others[0].domainLedger.size
+
+    start = time.perf_counter()
+    new = nodeSet.addNode(name)
+    pool.looper.add(new)
+
+    def chk():
+        assert new.domainLedger.size == targetSize
+
+    pool.looper.run(eventually(chk, retryWait=.05, timeout=timeout))
+    elapsed = time.perf_counter() - start
+    pool.looper.run(checkNodesConnected(list(nodeSet)))
+    return elapsed
+
+
+def benchPool(nodeCount, ledgerSizes, clients, rate, duration, timeout):
+    result = {"nodes": nodeCount}
+    with TemporaryDirectory() as tmpdir:
+        with BenchPool(nodeCount, tmpdir) as pool:
+            loadClients = pool.newSponsorClients(clients)
+            ops = NymOps('scale{}-'.format(nodeCount))
+            sent, start = pool.looper.run(driveLoad(loadClients, ops, rate,
+                                                    duration))
+            result["write"] = loadReport(loadClients, sent, start, duration)
+            for client in loadClients:
+                client.completed.clear()
+
+            result["byLedgerSize"] = []
+            for size in sorted(ledgerSizes):
+                fillLedger(pool, loadClients, ops, size)
+                actualSize = list(pool.nodes)[0].domainLedger.size
+                viewChange = measureViewChange(pool, timeout)
+                catchup = measureCatchup(pool, timeout + actualSize / 10)
+                logger.info("{} nodes, ledger of {}: view change took {:.3f}s,"
+                            " catch-up took {:.3f}s".
+                            format(nodeCount, actualSize, viewChange, catchup))
+                result["byLedgerSize"].append({
+                    "ledgerSize": actualSize,
+                    "viewChangeSeconds": round(viewChange, 3),
+                    "catchupSeconds": round(catchup, 3)
+                })
+    return result
+
+
+def runBenchmark(pools, ledgerSizes, clients, rate, duration, timeout):
+    report = {
+        "benchmark": "pool_scaling",
+        "env": benchEnvironment(),
+        "params": {
+            "pools": pools,
+            "ledgerSizes": ledgerSizes,
+            "clients": clients,
+            "rate": rate,
+            "duration": duration
+        },
+        "results": []
+    }
+    for nodeCount in pools:
+        report["results"].append(benchPool(nodeCount, ledgerSizes, clients,
+                                           rate, duration, timeout))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Consensus throughput, view change and catch-up time "
+                    "against pool size and ledger size")
+    parser.add_argument('--pools', default='4,7,10,13,25',
+                        help='comma separated node counts')
+    parser.add_argument('--ledgerSizes', default='100,1000',
+                        help='comma separated domain ledger sizes at which '
+                             'view change and catch-up are measured')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=20,
+                        help='requests per second of the write workload')
+    parser.add_argument('--duration', type=float, default=20,
+                        help='seconds the write workload runs for')
+    parser.add_argument('--timeout', type=float, default=60,
+                        help='seconds to wait for a view change or catch-up')
+    parser.add_argument('--out', help='file to write the JSON report to, '
+                                      'printed if not given')
+    args = parser.parse_args()
+    pools = [int(p) for p in args.pools.split(',') if p.strip()]
+    ledgerSizes = [int(s) for s in args.ledgerSizes.split(',') if s.strip()]
+    report = runBenchmark(pools, ledgerSizes, args.clients, args.rate,
+                          args.duration, args.timeout)
+    writeReport(report, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+#! /usr/bin/env python3
+"""
+Read-path benchmark. Pre-loads a single node's ledger and identity graph with
+a growing number of identities, each with a skewed number of attributes, and
+measures GET_NYM, GET_ATTR, GET_TXNS and GET_CLAIM_DEF requests with Zipfian
+key popularity at every identity count. Requests are handed to
+`Node.processRequest` directly so the numbers are not hidden behind the
+network stack.
+
+Usage:
+python -m sovrin_node.test.benchmarks.read_path --sizes 10000,100000,1000000 \
+    --queries 20000 --backends memory,plocal --out reads.json
+"""
+import argparse
+import json
+import random
+import time
+from bisect import bisect_right
+from hashlib import sha256
+from itertools import accumulate
+from tempfile import TemporaryDirectory
+
+import base58
+from ledger.util import F
+from plenum.common.log import getlogger
+from plenum.common.txn import RAW, NAME, VERSION, VERKEY
+from plenum.common.types import f
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, TXN_ID, ROLE, NYM, \
+    ATTRIB, CLAIM_DEF, DATA, GET_NYM, GET_ATTR, GET_TXNS, GET_CLAIM_DEF, \
+    ATTR_NAMES, STEWARD
+from sovrin_common.types import Request
+from sovrin_node.server.node import Node
+from sovrin_node.test.benchmarks.helper import latencySummary, \
+    benchEnvironment, writeReport, parseMix
+from sovrin_node.test.helper import TestNode, TestNodeSet
+
+logger = getlogger()
+
+ReadTypes = (GET_NYM, GET_ATTR, GET_TXNS, GET_CLAIM_DEF)
+
+
+class PersistentGraphTestNode(TestNode):
+    """
+    Test node whose identity graph uses the node's regular (persistent)
+    OrientDB storage instead of the in-memory one
+    """
+    def _getOrientDbStore(self, name, dbType):
+        if not hasattr(self, '_orientDbStore'):
+            self._orientDbStore = Node._getOrientDbStore(self, name, dbType)
+        return self._orientDbStore
+
+
+GraphBackends = {
+    'memory': TestNode,
+    'plocal': PersistentGraphTestNode
+}
+
+
+class ZipfSampler:
+    """
+    Samples indices in [0, n) where the k-th most popular index is picked
+    with probability proportional to 1/k^s. Popularity ranks are shuffled so
+    they are not correlated with insertion order.
+    """
+    def __init__(self, n, s, rnd: random.Random):
+        self.rnd = rnd
+        self.cumWeights = list(accumulate(1.0 / (k ** s)
+                                          for k in range(1, n + 1)))
+        self.ranks = list(range(n))
+        rnd.shuffle(self.ranks)
+
+    def __call__(self):
+        x = self.rnd.random() * self.cumWeights[-1]
+        i = min(bisect_right(self.cumWeights, x), len(self.ranks) - 1)
+        return self.ranks[i]
+
+
+class IdentityLoader:
+    """
+    Writes synthetic NYM, ATTRIB and CLAIM_DEF txns to the node's ledger and
+    graph the same way `Node.storeTxnAndSendToClient` does.
+    """
+    def __init__(self, node, rnd: random.Random, attrSkew=1.2,
+                 maxAttrs=1000, issuerRatio=.01):
+        self.node = node
+        self.rnd = rnd
+        self.attrSkew = attrSkew
+        self.maxAttrs = maxAttrs
+        self.issuerRatio = issuerRatio
+        self.reqId = 0
+        self.nyms = []
+        self.attrCounts = []
+        # issuer nym -> (claim def name, version)
+        self.claimDefs = {}
+        self.steward = self._randomNym()
+        self._store({TXN_TYPE: NYM, TARGET_NYM: self.steward, ROLE: STEWARD},
+                    self.steward)
+
+    def _randomNym(self):
+        return base58.b58encode(self.rnd.getrandbits(128).to_bytes(16, 'big'))
+
+    def _store(self, op, identifier):
+        self.reqId += 1
+        txn = {
+            f.IDENTIFIER.nm: identifier,
+            f.REQ_ID.nm: self.reqId,
+            TXN_ID: sha256('{}{}'.format(identifier, self.reqId).encode())
+                .hexdigest()
+        }
+        txn.update(op)
+        merkleInfo = self.node.storeTxnInLedger(dict(txn))
+        txn[F.seqNo.name] = merkleInfo[F.seqNo.name]
+        self.node.storeTxnInGraph(txn)
+
+    def loadUpTo(self, count):
+        while len(self.nyms) < count:
+            nym = self._randomNym()
+            self._store({TXN_TYPE: NYM, TARGET_NYM: nym,
+                         VERKEY: '~' + self._randomNym()}, self.steward)
+            attrCount = min(int(self.rnd.paretovariate(self.attrSkew)) - 1,
+                            self.maxAttrs)
+            for j in range(attrCount):
+                raw = json.dumps({'attr{}'.format(j): self.rnd.getrandbits(64)})
+                self._store({TXN_TYPE: ATTRIB, TARGET_NYM: nym, RAW: raw}, nym)
+            if self.rnd.random() < self.issuerRatio:
+                name = 'claim-{}'.format(len(self.claimDefs))
+                self._store({TXN_TYPE: CLAIM_DEF,
+                             DATA: {NAME: name, VERSION: '1.0',
+                                    ATTR_NAMES: 'name,age', 'type': 'CL'}},
+                            nym)
+                self.claimDefs[nym] = (name, '1.0')
+            self.nyms.append(nym)
+            self.attrCounts.append(attrCount)
+
+
+class ReadOps:
+    def __init__(self, loader: IdentityLoader, mix, zipfS, rnd):
+        self.loader = loader
+        self.types = list(mix.keys())
+        self.cumWeights = list(accumulate(mix.values()))
+        self.rnd = rnd
+        self.sampler = ZipfSampler(len(loader.nyms), zipfS, rnd)
+        self.issuers = list(loader.claimDefs.keys())
+        self.issuerSampler = ZipfSampler(len(self.issuers), zipfS, rnd) \
+            if self.issuers else None
+        self.reqId = 0
+
+    def __call__(self):
+        self.reqId += 1
+        i = bisect_right(self.cumWeights,
+                         self.rnd.random() * self.cumWeights[-1])
+        typ = self.types[min(i, len(self.types) - 1)]
+        idx = self.sampler()
+        nym = self.loader.nyms[idx]
+        identifier = self.loader.steward
+        if typ == GET_NYM:
+            op = {TXN_TYPE: GET_NYM, TARGET_NYM: nym}
+        elif typ == GET_ATTR:
+            attrCount = self.loader.attrCounts[idx]
+            j = self.rnd.randrange(attrCount) if attrCount else 0
+            op = {TXN_TYPE: GET_ATTR, TARGET_NYM: nym,
+                  RAW: 'attr{}'.format(j)}
+        elif typ == GET_TXNS:
+            # Transactions can only be fetched by their owner
+            identifier = nym
+            op = {TXN_TYPE: GET_TXNS, TARGET_NYM: nym}
+        else:
+            if self.issuerSampler:
+                nym = self.issuers[self.issuerSampler()]
+                name, version = self.loader.claimDefs[nym]
+            else:
+                name, version = 'missing', '1.0'
+            op = {TXN_TYPE: GET_CLAIM_DEF, TARGET_NYM: nym,
+                  DATA: {NAME: name, VERSION: version}}
+        return typ, Request(identifier=identifier, reqId=self.reqId,
+                            operation=op)
+
+
+def measureReads(node, ops: ReadOps, queries):
+    replies = []
+    node.transmitToClient = lambda msg, remoteName: replies.append(msg)
+    latencies = {}
+    start = time.perf_counter()
+    for _ in range(queries):
+        typ, req = ops()
+        t = time.perf_counter()
+        node.processRequest(req, 'bench')
+        latencies.setdefault(typ, []).append(time.perf_counter() - t)
+        replies.clear()
+    elapsed = time.perf_counter() - start
+    return {
+        "queries": queries,
+        "qps": round(queries / elapsed, 3),
+        "latency": latencySummary(l for ls in latencies.values() for l in ls),
+        "latencyByType": {typ: latencySummary(ls)
+                          for typ, ls in sorted(latencies.items())}
+    }
+
+
+def benchBackend(nodeClass, sizes, queries, mix, zipfS, attrSkew, seed):
+    results = []
+    with TemporaryDirectory() as tmpdir:
+        with TestNodeSet(count=1, tmpdir=tmpdir,
+                         testNodeClass=nodeClass) as nodeSet:
+            node = next(iter(nodeSet))
+            rnd = random.Random(seed)
+            loader = IdentityLoader(node, rnd, attrSkew=attrSkew)
+            for size in sorted(sizes):
+                t = time.perf_counter()
+                loader.loadUpTo(size)
+                logger.info("loaded {} identities in {:.1f}s".
+                            format(size, time.perf_counter() - t))
+                ops = ReadOps(loader, mix, zipfS, random.Random(seed))
+                result = measureReads(node, ops, queries)
+                result.update({
+                    "identities": size,
+                    "ledgerSize": node.domainLedger.size,
+                    "attributes": sum(loader.attrCounts)
+                })
+                results.append(result)
+    return results
+
+
+def runBenchmark(sizes, queries, mix, backends, zipfS, attrSkew, seed):
+    mixWeights = parseMix(mix, ReadTypes)
+    report = {
+        "benchmark": "read_path",
+        "env": benchEnvironment(),
+        "params": {
+            "sizes": sizes,
+            "queries": queries,
+            "mix": mixWeights,
+            "zipfExponent": zipfS,
+            "attributeSkew": attrSkew,
+            "seed": seed
+        },
+        "results": {}
+    }
+    for backend in backends:
+        try:
+            report["results"][backend] = benchBackend(
+                GraphBackends[backend], sizes, queries, mixWeights, zipfS,
+                attrSkew, seed)
+        except Exception as ex:
+            logger.warning("graph backend {} not available: {}".
+                           format(backend, ex))
+            report["results"][backend] = {"error": str(ex)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="GET_* read-path benchmark against large identity sets")
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='comma separated identity counts')
+    parser.add_argument('--queries', type=int, default=20000,
+                        help='queries to send at every identity count')
+    parser.add_argument('--mix', default='GET_NYM=40,GET_ATTR=40,'
+                                         'GET_TXNS=15,GET_CLAIM_DEF=5')
+    parser.add_argument('--backends', default=','.join(GraphBackends),
+                        help='graph backends, any of {}'.
+                        format(', '.join(GraphBackends)))
+    parser.add_argument('--zipf', type=float, default=1.1,
+                        help='Zipf exponent of key popularity')
+    parser.add_argument('--attrSkew', type=float, default=1.2,
+                        help='Pareto shape of attribute counts per identity, '
+                             'smaller is more skewed')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='file to write the JSON report to, '
+                                      'printed if not given')
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+    unknown = set(backends) - set(GraphBackends)
+    if unknown:
+        parser.error('unknown backends {}'.format(', '.join(sorted(unknown))))
+    report = runBenchmark(sizes, args.queries, args.mix, backends, args.zipf,
+                          args.attrSkew, args.seed)
+    writeReport(report, args.out)
+
+
+if __name__ == '__main__':
+    main()
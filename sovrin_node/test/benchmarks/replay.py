@@ -0,0 +1,202 @@
+#! /usr/bin/env python3
+"""
+Replays a client request trace captured by a node (see the
+`ClientRequestTraceFile` setting) against a local in-process pool.
+
+Identifiers in the trace are mapped to test identities with deterministic
+keys, every request is re-signed with the key of its mapped identifier and
+sent at its original offset from the start of the trace divided by `--speed`.
+Identifiers which send requests before the trace itself creates them are
+added to the pool as sponsors first.
+
+Usage:
+python -m sovrin_node.test.benchmarks.replay ~/.sovrin/data/nodes/Node1/\
+requests.trace --nodes 4 --clients 4 --speed 2 --out replay.json
+"""
+import argparse
+import asyncio
+import time
+from hashlib import sha256
+from tempfile import TemporaryDirectory
+from typing import Dict, List
+
+from plenum.common.signer_simple import SimpleSigner
+from plenum.common.txn import VERKEY, ORIGIN
+from plenum.common.types import f, OPERATION
+
+from sovrin_client.client.wallet.wallet import Wallet
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, NYM, SPONSOR, DATA
+from sovrin_node.common.txn import NYMS
+from sovrin_node.server.request_trace import RequestTrace, ARRIVAL, CLIENT
+from sovrin_node.test.benchmarks.helper import BenchPool, LoadClient, \
+    loadReport, latencySummary, benchEnvironment, writeReport
+
+
+class TraceReplayer:
+    def __init__(self, records: List[Dict]):
+        self.records = sorted(records, key=lambda r: r[ARRIVAL])
+        self.signers = {}   # original identifier -> test signer
+        for record in self.records:
+            self._map(record[f.IDENTIFIER.nm])
+            op = record[OPERATION]
+            for key in (TARGET_NYM, ORIGIN):
+                if op.get(key):
+                    self._map(op[key])
+            if op.get(TXN_TYPE) == NYMS:
+                for nymOp in op[DATA]:
+                    self._map(nymOp[TARGET_NYM])
+        # test identifier -> test signer
+        self.testSigners = {s.identifier: s for s in self.signers.values()}
+
+    def _map(self, identifier):
+        if identifier not in self.signers:
+            seed = sha256('replay {}'.format(identifier).encode()).digest()
+            self.signers[identifier] = SimpleSigner(seed=seed)
+        return self.signers[identifier]
+
+    def mapped(self, identifier):
+        return self.signers[identifier].identifier
+
+    def rewrite(self, op: Dict) -> Dict:
+        """
+        Operation with every known identifier replaced by its test identifier
+        and the verkey of a NYM replaced by the test verkey
+        """
+        op = dict(op)
+        for key in (TARGET_NYM, ORIGIN):
+            if op.get(key) in self.signers:
+                op[key] = self.mapped(op[key])
+        if op.get(TXN_TYPE) == NYM and op.get(VERKEY) and \
+                op.get(TARGET_NYM) in self.testSigners:
+            op[VERKEY] = self.testSigners[op[TARGET_NYM]].verkey
+        if op.get(TXN_TYPE) == NYMS:
+            op[DATA] = [self.rewrite(dict(nymOp, **{TXN_TYPE: NYM}))
+                        for nymOp in op[DATA]]
+            for nymOp in op[DATA]:
+                del nymOp[TXN_TYPE]
+        return op
+
+    def preexistingSenders(self):
+        """
+        Original identifiers which send a request before any NYM of the trace
+        creates them
+        """
+        created = set()
+        senders = []
+        for record in self.records:
+            sender = record[f.IDENTIFIER.nm]
+            if sender not in created and sender not in senders:
+                senders.append(sender)
+            op = record[OPERATION]
+            if op.get(TXN_TYPE) == NYM:
+                created.add(op.get(TARGET_NYM))
+            elif op.get(TXN_TYPE) == NYMS:
+                created.update(nymOp[TARGET_NYM] for nymOp in op[DATA])
+        return senders
+
+    def assignClients(self, pool: BenchPool, count) -> Dict[str, LoadClient]:
+        """
+        Every original identifier always sends over the same client, chosen
+        by hashing the name of the client connection it used originally
+        """
+        wallets = [Wallet('replay{}'.format(i)) for i in range(count)]
+        used = set()
+        byIdentifier = {}
+        for record in self.records:
+            identifier = record[f.IDENTIFIER.nm]
+            if identifier in byIdentifier:
+                continue
+            conn = record.get(CLIENT) or identifier
+            i = int(sha256(conn.encode()).hexdigest(), 16) % count
+            wallets[i].addIdentifier(signer=self.signers[identifier])
+            byIdentifier[identifier] = i
+            used.add(i)
+        clients = [pool.newClient(w) if i in used else None
+                   for i, w in enumerate(wallets)]
+        return {idr: clients[i] for idr, i in byIdentifier.items()}
+
+    async def replay(self, clients: Dict[str, LoadClient], speed,
+                     drainTimeout=30):
+        t0 = self.records[0][ARRIVAL]
+        lags = []
+        start = time.perf_counter()
+        for record in self.records:
+            due = start + ((record[ARRIVAL] - t0) / speed if speed else 0)
+            wait = due - time.perf_counter()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            else:
+                lags.append(-wait)
+            identifier = record[f.IDENTIFIER.nm]
+            clients[identifier].submit(self.rewrite(record[OPERATION]),
+                                       identifier=self.mapped(identifier))
+        sendingTook = time.perf_counter() - start
+
+        loadClients = set(clients.values())
+        deadline = time.perf_counter() + drainTimeout
+        while any(c.pending for c in loadClients) and \
+                time.perf_counter() < deadline:
+            await asyncio.sleep(.005)
+        return start, sendingTook, lags
+
+
+def runReplay(tracePath, nodes, clients, speed, limit, drainTimeout):
+    records = list(RequestTrace.read(tracePath))
+    if limit:
+        records = records[:limit]
+    if not records:
+        raise ValueError('trace {} has no requests'.format(tracePath))
+    replayer = TraceReplayer(records)
+    report = {
+        "benchmark": "replay",
+        "env": benchEnvironment(),
+        "params": {
+            "trace": tracePath,
+            "requests": len(records),
+            "traceSeconds": round(records[-1][ARRIVAL] - records[0][ARRIVAL],
+                                  3),
+            "nodes": nodes,
+            "clients": clients,
+            "speed": speed
+        }
+    }
+    with TemporaryDirectory() as tmpdir:
+        with BenchPool(nodes, tmpdir) as pool:
+            pool.addIdentities([(replayer.mapped(idr),
+                                 replayer.signers[idr].verkey)
+                                for idr in replayer.preexistingSenders()],
+                               role=SPONSOR)
+            byIdentifier = replayer.assignClients(pool, clients)
+            start, took, lags = pool.looper.run(
+                replayer.replay(byIdentifier, speed, drainTimeout))
+            results = loadReport(list(set(byIdentifier.values())),
+                                 len(records), start, max(took, 1e-9))
+            results["sendingSeconds"] = round(took, 3)
+            results["scheduleLag"] = latencySummary(lags)
+    report["results"] = results
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a captured client request trace against a "
+                    "local pool")
+    parser.add_argument('trace', help='JSONL trace written by a node')
+    parser.add_argument('--nodes', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='2 replays twice as fast as recorded, 0 sends '
+                             'everything as fast as possible')
+    parser.add_argument('--limit', type=int,
+                        help='replay only the first LIMIT requests')
+    parser.add_argument('--drainTimeout', type=float, default=30)
+    parser.add_argument('--out', help='file to write the JSON report to, '
+                                      'printed if not given')
+    args = parser.parse_args()
+    report = runReplay(args.trace, args.nodes, args.clients, args.speed,
+                       args.limit, args.drainTimeout)
+    writeReport(report, args.out)
+
+
+if __name__ == '__main__':
+    main()
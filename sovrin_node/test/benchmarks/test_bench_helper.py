@@ -0,0 +1,42 @@
+import random
+from collections import Counter
+
+import pytest
+
+from sovrin_node.test.benchmarks.helper import percentile, latencySummary, \
+    parseMix
+from sovrin_node.test.benchmarks.read_path import ZipfSampler
+
+
+def testPercentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile(values, 0) == 1
+    assert percentile([], 50) is None
+
+
+def testLatencySummaryInMilliseconds():
+    summary = latencySummary([.003, .001, .002])
+    assert summary["count"] == 3
+    assert summary["p50"] == 2.0
+    assert summary["max"] == 3.0
+    assert latencySummary([]) == {"count": 0}
+
+
+def testParseMix():
+    mix = parseMix('NYM=3, attrib=1', ('NYM', 'ATTRIB'))
+    assert list(mix.keys()) == ['NYM', 'ATTRIB']
+    assert mix['NYM'] == .75
+    with pytest.raises(ValueError):
+        parseMix('GET_NYM=1', ('NYM', 'ATTRIB'))
+
+
+def testZipfSamplerIsSkewed():
+    sampler = ZipfSampler(1000, 1.1, random.Random(0))
+    counts = Counter(sampler() for _ in range(20000))
+    assert all(0 <= i < 1000 for i in counts)
+    mostCommon, hits = counts.most_common(1)[0]
+    assert mostCommon == sampler.ranks[0]
+    assert hits > 20000 / 1000 * 10
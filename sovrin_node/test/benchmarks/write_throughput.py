@@ -0,0 +1,179 @@
+#! /usr/bin/env python3
+"""
+End-to-end write benchmark. Starts an in-process pool, drives a mix of NYM,
+ATTRIB, CLAIM_DEF, ISSUER_KEY and NYMS (`--batchSize` NYMs in one request)
+writes from several sponsor clients at a target rate and prints latency
+percentiles and sustained throughput as JSON.
+
+Usage:
+python -m sovrin_node.test.benchmarks.write_throughput --nodes 4 \
+    --clients 4 --rate 20 --duration 30 --mix NYM=60,ATTRIB=30,CLAIM_DEF=5,\
+ISSUER_KEY=5 --out write.json
+
+Runs with the same `--seed` send the same sequence of operations so reports
+from different commits can be compared.
+"""
+import argparse
+import json
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from tempfile import TemporaryDirectory
+
+from ledger.util import F
+from plenum.common.signer_simple import SimpleSigner
+from plenum.common.txn import RAW, NAME, VERSION, VERKEY
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, NYM, ATTRIB, \
+    CLAIM_DEF, ISSUER_KEY, DATA, REF, ATTR_NAMES
+from sovrin_node.common.txn import NYMS
+from sovrin_node.test.benchmarks.helper import BenchPool, driveLoad, \
+    loadReport, benchEnvironment, writeReport, parseMix
+
+WriteTypes = (NYM, ATTRIB, CLAIM_DEF, ISSUER_KEY, NYMS)
+
+
+class WriteOps:
+    """
+    Generates write operations for a client, identifiers and values are
+    derived from a seeded random generator so runs are repeatable.
+    """
+
+    def __init__(self, mix, seed, batchSize=100):
+        self.types = list(mix.keys())
+        self.batchSize = batchSize
+        self.cumWeights = list(accumulate(mix.values()))
+        self.rnd = random.Random(seed)
+        self.counter = 0
+        # client -> seqNo of a claim def the client has written
+        self.claimDefs = {}
+
+    def __call__(self, client):
+        self.counter += 1
+        i = bisect_right(self.cumWeights,
+                         self.rnd.random() * self.cumWeights[-1])
+        typ = self.types[min(i, len(self.types) - 1)]
+        return getattr(self, 'op' + typ.title().replace('_', ''))(client)
+
+    def _seed(self):
+        return self.rnd.getrandbits(256).to_bytes(32, 'big')
+
+    def opNym(self, client):
+        signer = SimpleSigner(seed=self._seed())
+        return {
+            TXN_TYPE: NYM,
+            TARGET_NYM: signer.identifier,
+            VERKEY: signer.verkey
+        }
+
+    def opNyms(self, client):
+        nymOps = []
+        for _ in range(self.batchSize):
+            op = self.opNym(client)
+            del op[TXN_TYPE]
+            nymOps.append(op)
+        return {
+            TXN_TYPE: NYMS,
+            DATA: nymOps
+        }
+
+    def opAttrib(self, client):
+        value = {'bench{}'.format(self.counter): self.rnd.getrandbits(64)}
+        return {
+            TXN_TYPE: ATTRIB,
+            TARGET_NYM: client.wallet.defaultId,
+            RAW: json.dumps(value)
+        }
+
+    def opClaimDef(self, client):
+        return {
+            TXN_TYPE: CLAIM_DEF,
+            DATA: {
+                NAME: 'bench-claim-{}'.format(self.counter),
+                VERSION: '1.0',
+                ATTR_NAMES: 'name,age,ssn',
+                'type': 'CL'
+            }
+        }
+
+    def opIssuerKey(self, client):
+        return {
+            TXN_TYPE: ISSUER_KEY,
+            REF: self.claimDefs[client],
+            DATA: {
+                'N': str(self.rnd.getrandbits(256)),
+                'R': {'name': str(self.rnd.getrandbits(256))},
+                'S': str(self.rnd.getrandbits(256)),
+                'Z': str(self.rnd.getrandbits(256))
+            }
+        }
+
+    def prepare(self, pool, clients):
+        """
+        ISSUER_KEY needs an existing claim def, so write one per client
+        """
+        if ISSUER_KEY not in self.types:
+            return
+        for client in clients:
+            req = client.submit(self.opClaimDef(client), keepResult=True)
+            result, = pool.looper.run(client.waitFor(req))
+            self.claimDefs[client] = result[F.seqNo.name]
+            client.completed.clear()
+
+
+def runBenchmark(nodes, clients, rate, duration, mix, seed, drainTimeout,
+                 batchSize=100):
+    mixWeights = parseMix(mix, WriteTypes)
+    params = {
+        "batchSize": batchSize,
+        "nodes": nodes,
+        "clients": clients,
+        "rate": rate,
+        "duration": duration,
+        "mix": mixWeights,
+        "seed": seed
+    }
+    env = benchEnvironment()
+    with TemporaryDirectory() as tmpdir:
+        with BenchPool(nodes, tmpdir) as pool:
+            loadClients = pool.newSponsorClients(clients)
+            ops = WriteOps(mixWeights, seed, batchSize)
+            ops.prepare(pool, loadClients)
+            sent, start = pool.looper.run(driveLoad(loadClients, ops, rate,
+                                                    duration,
+                                                    drainTimeout=drainTimeout))
+            results = loadReport(loadClients, sent, start, duration)
+    return {
+        "benchmark": "write_throughput",
+        "env": env,
+        "params": params,
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="End-to-end write throughput and latency benchmark")
+    parser.add_argument('--nodes', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=20,
+                        help='requests per second over all clients')
+    parser.add_argument('--duration', type=float, default=30,
+                        help='seconds to send requests for')
+    parser.add_argument('--mix', default='NYM=60,ATTRIB=30,CLAIM_DEF=5,'
+                                         'ISSUER_KEY=5')
+    parser.add_argument('--batchSize', type=int, default=100,
+                        help='NYMs in every NYMS request')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--drainTimeout', type=float, default=30)
+    parser.add_argument('--out', help='file to write the JSON report to, '
+                                      'printed if not given')
+    args = parser.parse_args()
+    report = runBenchmark(args.nodes, args.clients, args.rate, args.duration,
+                          args.mix, args.seed, args.drainTimeout,
+                          args.batchSize)
+    writeReport(report, args.out)
+
+
+if __name__ == '__main__':
+    main()
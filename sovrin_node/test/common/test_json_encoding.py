@@ -0,0 +1,29 @@
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from sovrin_common.util import dateTimeEncoding
+from sovrin_node.common.json_encoding import encodeJson
+
+
+def encodedBefore(obj):
+    return json.dumps(obj, sort_keys=True, default=dateTimeEncoding)
+
+
+def testSameOutputAsBefore():
+    values = [
+        None,
+        {'b': 1, 'a': [1, 2.5, None, True], 'c': {'z': 'x', 'y': ''}},
+        OrderedDict([('z', 1), ('a', 2)]),
+        {'name': 'Ünïcödé ✓', 'quote': 'say "hi"\n', 'path': 'a/b\\c'},
+        {'lastTxn': '7', 'txns': [{'seqNo': i, 'txnTime': 1487000000 + i}
+                                  for i in range(100)]},
+        {'at': datetime(2017, 2, 14, 10, 30)},
+    ]
+    for value in values:
+        assert encodeJson(value) == encodedBefore(value)
+
+
+def testKeysAreSorted():
+    assert encodeJson({'b': 1, 'a': {'d': 2, 'c': 3}}) == \
+        '{"a": {"c": 3, "d": 2}, "b": 1}'
@@ -2,10 +2,16 @@ import inspect
 import json
 import os
 import shutil
+import tempfile
 from contextlib import ExitStack
+from types import SimpleNamespace
 from typing import Iterable, Union, Tuple
 
 import pyorient
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.ledger import Ledger
+from ledger.util import F
+from plenum.client.wallet import Wallet as PlenumWallet
 from plenum.common.signer_did import DidSigner
 from plenum.test.test_node import checkNodesAreReady, TestNodeCore
 from plenum.test.test_node import checkNodesConnected
@@ -14,11 +20,12 @@ from plenum.test.test_stack import StackedTester, TestStack
 from plenum.common.log import getlogger
 from plenum.common.looper import Looper
 from plenum.common.signer_simple import SimpleSigner
-from plenum.common.txn import REQACK
-from plenum.common.types import HA, Identifier
+from plenum.common.txn import REQACK, RAW, NAME, VERSION, VERKEY
+from plenum.common.types import HA, Identifier, f
 from plenum.common.util import getMaxFailures, runall
 from plenum.persistence import orientdb_store
 from plenum.persistence.orientdb_store import OrientDbStore
+from plenum.server.node import Node as PlenumNode
 from plenum.common.eventually import eventually
 from plenum.test.helper import TestNodeSet as PlenumTestNodeSet
 from plenum.test.helper import checkSufficientRepliesRecvd, \
@@ -30,7 +37,8 @@ from sovrin_client.client.client import Client
 from sovrin_client.client.wallet.attribute import LedgerStore, Attribute
 from sovrin_client.client.wallet.wallet import Wallet
 from sovrin_common.identity import Identity
-from sovrin_common.txn import ATTRIB, TARGET_NYM, TXN_TYPE, TXN_ID, GET_NYM
+from sovrin_common.txn import ATTRIB, TARGET_NYM, TXN_TYPE, TXN_ID, GET_NYM, \
+    ROLE, DATA, REF, TRUSTEE, STEWARD
 from sovrin_common.config_util import getConfig
 from sovrin_node.server.node import Node
 
@@ -264,6 +272,8 @@ class TestNode(TempStorage, TestNodeCore, Node):
         return self._orientDbStore
 
     def onStopping(self, *args, **kwargs):
+        # The node saves its indexes to the data location when stopping
+        super().onStopping(*args, **kwargs)
         self.cleanupDataLocation()
         try:
             self.graphStore.client.db_drop(self.name)
@@ -271,7 +281,6 @@ class TestNode(TempStorage, TestNodeCore, Node):
         except Exception as ex:
             logger.debug("Error while dropping db {}: {}".format(self.name,
                                                                  ex))
-        super().onStopping(*args, **kwargs)
 
 
 class TestNodeSet(PlenumTestNodeSet):
@@ -467,9 +476,235 @@ def makeAttribRequest(client, wallet, attrib):
     return client.submitReqs(*reqs)
 
 
+class GraphRecord:
+    """
+    Mimics the `oRecordData` of a record returned by pyorient
+    """
+    def __init__(self, data):
+        self.oRecordData = data
+
+
 class TestGraphStorage:
+    """
+    In-memory stand-in for `IdentityGraph` supporting the queries the node
+    and the authenticators make, for tests and benchmarks that should not
+    need OrientDB.
+    """
+    def __init__(self):
+        self.nyms = {}          # nym -> record data
+        self.txns = {}          # txnId -> txn
+        self.txnKeys = {}       # (identifier, reqId) -> txnId
+        self.nymTxnIds = {}     # nym -> txnId of the txn which added it
+        self.attrTxnIds = {}    # nym -> txnIds of its attribute txns
+        self.rawAttrs = {}      # (nym, attribute name) -> (value, seqNo)
+        self.claimDefs = {}     # (issuer, name, version) -> txn
+        self.issuerKeys = {}    # (issuer, ref) -> data
+
+    def _addTxn(self, txn):
+        self.txns[txn[TXN_ID]] = txn
+        self.txnKeys[(txn.get(f.IDENTIFIER.nm), txn.get(f.REQ_ID.nm))] = \
+            txn[TXN_ID]
+
+    def countTxns(self):
+        return len(self.txns)
+
+    def addNymTxnToGraph(self, txn):
+        nym = txn[TARGET_NYM]
+        if nym in self.nyms:
+            data = self.nyms[nym]
+            if ROLE in txn:
+                data[ROLE] = txn[ROLE]
+            if txn.get(VERKEY) is not None:
+                data[VERKEY] = txn[VERKEY]
+        else:
+            self.nyms[nym] = {
+                'nym': nym,
+                ROLE: txn.get(ROLE),
+                VERKEY: txn.get(VERKEY),
+                'sponsor': txn.get(f.IDENTIFIER.nm)
+            }
+            self.nymTxnIds[nym] = txn[TXN_ID]
+        self._addTxn(txn)
+
+    def addAttribTxnToGraph(self, txn):
+        nym = txn.get(TARGET_NYM) or txn[f.IDENTIFIER.nm]
+        self.attrTxnIds.setdefault(nym, []).append(txn[TXN_ID])
+        if RAW in txn:
+            try:
+                raw = json.loads(txn[RAW])
+            except ValueError:
+                raw = {}
+            for name, value in raw.items():
+                self.rawAttrs[(nym, name)] = (value, txn.get(F.seqNo.name))
+        self._addTxn(txn)
+
+    def addClaimDefTxnToGraph(self, txn):
+        data = txn[DATA]
+        self.claimDefs[(txn[f.IDENTIFIER.nm], data[NAME], data[VERSION])] = txn
+        self._addTxn(txn)
+
+    def addIssuerKeyTxnToGraph(self, txn):
+        self.issuerKeys[(txn[f.IDENTIFIER.nm], txn[REF])] = \
+            dict(txn[DATA], **{F.seqNo.name: txn.get(F.seqNo.name)})
+        self._addTxn(txn)
+
+    def hasNym(self, nym):
+        return nym in self.nyms
+
+    def getNym(self, nym, role=None):
+        data = self.nyms.get(nym)
+        if data is None or (role and data[ROLE] != role):
+            return None
+        return GraphRecord(data)
+
+    def getRole(self, nym):
+        if nym not in self.nyms:
+            raise ValueError("Nym {} does not exist".format(nym))
+        return self.nyms[nym][ROLE]
+
+    def getSponsorFor(self, nym):
+        data = self.nyms.get(nym)
+        return data['sponsor'] if data else None
+
+    def hasTrustee(self, nym):
+        return bool(self.getNym(nym, TRUSTEE))
+
+    def hasSteward(self, nym):
+        return bool(self.getNym(nym, STEWARD))
+
+    def getAddNymTxn(self, nym):
+        txnId = self.nymTxnIds.get(nym)
+        return dict(self.txns[txnId]) if txnId else None
+
+    def getAddNymTxns(self, *nyms):
+        return {nym: self.getAddNymTxn(nym) for nym in nyms}
+
+    def getAddAttributeTxnIds(self, nym):
+        return list(self.attrTxnIds.get(nym, []))
+
+    def getRawAttrs(self, nym, *attrNames):
+        return {name: self.rawAttrs[(nym, name)] for name in attrNames
+                if (nym, name) in self.rawAttrs}
+
+    def getClaimDef(self, issuer, name, version):
+        txn = self.claimDefs.get((issuer, name, version))
+        return dict(txn[DATA], **{F.seqNo.name: txn.get(F.seqNo.name)}) \
+            if txn else None
+
+    def getIssuerKeys(self, issuer, ref):
+        return self.issuerKeys.get((issuer, ref))
+
+    def getTxn(self, identifier, reqId, **kwargs):
+        txnId = self.txnKeys.get((identifier, reqId))
+        if txnId is None:
+            return None
+        txn = self.txns[txnId]
+        if kwargs.get('type') and txn[TXN_TYPE] != kwargs['type']:
+            return None
+        return dict(txn)
+
+    def getResultForTxnIds(self, *txnIds, seqNo=None):
+        results = {}
+        for txnId in txnIds:
+            txn = self.txns.get(txnId)
+            if txn and (not seqNo or txn[F.seqNo.name] > int(seqNo)):
+                results[txn[F.seqNo.name]] = dict(txn)
+        return results
+
+
+class StacklessPlenumNode(PlenumNode):
+    """
+    Stands in for plenum's node under `UnstartedNode`: it has a data
+    location, empty domain and pool ledgers and the client authenticator but
+    neither stacks nor replicas nor a pool manager
+    """
+    # Properties of plenum's node which are plain attributes here
+    id = None
+    domainLedger = None
+    poolLedger = None
+
+    def __init__(self, name, clientAuthNr=None, basedirpath=None,
+                 config=None, **kwargs):
+        self.name = name
+        self.config = config
+        self.basedirpath = basedirpath
+        self.dataLocation = os.path.join(basedirpath, 'data', 'nodes', name)
+        os.makedirs(self.dataLocation, exist_ok=True)
+        self.primaryStorage = Ledger(CompactMerkleTree(),
+                                     dataDir=self.dataLocation)
+        self.domainLedger = self.primaryStorage
+        self.poolLedger = Ledger(CompactMerkleTree(),
+                                 dataDir=self.dataLocation,
+                                 fileName='pool_transactions')
+        self.secondaryStorage = self.getSecondaryStorage()
+        self.clientAuthNr = clientAuthNr or self.defaultAuthNr()
+        self.ledgerManager = LedgerManagerStandIn()
+        self.nodeMsgRouter = SimpleNamespace(routes={})
+        self.clientstack = ClientStackStandIn()
+        self.requestSender = {}
+        self._stacklessWallet = PlenumWallet(name)
+        self._stacklessWallet.addIdentifier(signer=SimpleSigner())
+
+    @property
+    def wallet(self):
+        # Plenum's node takes the keys of its node stack
+        return self._stacklessWallet
+
+
+class LedgerManagerStandIn:
     def __init__(self):
-        pass
+        self.ledgers = {}
+
+    def addLedger(self, typ, ledger, **kwargs):
+        self.ledgers[typ] = ledger
+
+
+class ClientStackStandIn:
+    """
+    Keeps what the node sends to the clients which are not behind a gateway
+    """
+    def __init__(self):
+        self.sent = []
+
+    @staticmethod
+    def prepForSending(msg, signer=None):
+        return dict(msg._asdict()) if hasattr(msg, '_asdict') else msg
+
+    def transmitToClient(self, msg, remoteName):
+        self.sent.append((msg, remoteName))
+
+
+class UnstartedNode(Node, StacklessPlenumNode):
+    """
+    A `Node` built by its own `__init__` over `StacklessPlenumNode`, with
+    `graphStore` as its graph
+    """
+    def __init__(self, name, graphStore=None, **kwargs):
+        self.testGraph = graphStore or TestGraphStorage()
+        super().__init__(name, **kwargs)
+
+    def getGraphStorage(self, name):
+        return self.testGraph
+
+    def getConfigLedger(self):
+        return Ledger(CompactMerkleTree(), dataDir=self.dataLocation,
+                      fileName='config_transactions')
+
+    def getUpgrader(self):
+        # The upgrader needs the config of an installed node
+        return None
+
+
+def unstartedNode(graphStore=None, config=None, basedirpath=None) -> Node:
+    """
+    A `Node` which is never started and has neither stacks nor replicas but
+    everything else needed to validate requests, build replies to reads and
+    add transactions to its ledger and graph, `TestGraphStorage` by default.
+    Its files are under `basedirpath`, a new temporary directory if None.
+    """
+    return UnstartedNode("unstarted", graphStore=graphStore,
+                         basedirpath=basedirpath or tempfile.mkdtemp(),
+                         config=config)
 
 
 def _newWallet(name=None):
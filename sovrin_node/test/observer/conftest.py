@@ -0,0 +1,56 @@
+import pytest
+from plenum.common.eventually import eventually
+from plenum.common.port_dispenser import genHa
+from plenum.common.raet import initLocalKeep
+from plenum.common.signer_simple import SimpleSigner
+from plenum.common.txn import NODE_IP, NODE_PORT, CLIENT_IP, CLIENT_PORT, \
+    ALIAS, SERVICES
+from plenum.common.util import randomString
+from plenum.test.helper import checkSufficientRepliesForRequests
+from plenum.test.test_node import checkNodesConnected
+from sovrin_client.client.wallet.node import Node
+from sovrin_client.test.helper import getClientAddedWithRole
+
+from sovrin_common.txn import STEWARD
+
+
+@pytest.fixture("module")
+def observer(looper, nodeSet, tdirWithPoolTxns, tconf, steward,
+             stewardWallet, allPluginsPath, testNodeClass, tdir):
+    """
+    A node added to the pool ledger without the VALIDATOR service and
+    started as an observer
+    """
+    newSteward, newStewardWallet = getClientAddedWithRole(
+        nodeSet, tdir, looper, steward, stewardWallet,
+        "testClientSteward" + randomString(3), STEWARD)
+    sigseed = randomString(32).encode()
+    nodeSigner = SimpleSigner(seed=sigseed)
+    (nodeIp, nodePort), (clientIp, clientPort) = genHa(2)
+    data = {
+        NODE_IP: nodeIp,
+        NODE_PORT: nodePort,
+        CLIENT_IP: clientIp,
+        CLIENT_PORT: clientPort,
+        ALIAS: "Observer",
+        SERVICES: []
+    }
+    node = Node(nodeSigner.identifier, data, newStewardWallet.defaultId)
+    newStewardWallet.addNode(node)
+    reqs = newStewardWallet.preparePending()
+    req, = newSteward.submitReqs(*reqs)
+    checkSufficientRepliesForRequests(looper, newSteward, [req, ])
+
+    def chk():
+        assert newStewardWallet.getNode(node.id).seqNo is not None
+
+    looper.run(eventually(chk, retryWait=1, timeout=10))
+
+    initLocalKeep("Observer", tdirWithPoolTxns, sigseed, override=True)
+    observer = testNodeClass("Observer", basedirpath=tdir, config=tconf,
+                             ha=(nodeIp, nodePort),
+                             cliha=(clientIp, clientPort),
+                             pluginPaths=allPluginsPath, observer=True)
+    looper.add(observer)
+    looper.run(checkNodesConnected(nodeSet + [observer]))
+    return observer
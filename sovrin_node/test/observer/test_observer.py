@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from ledger.util import F
+from plenum.common.eventually import eventually
+from plenum.common.signer_simple import SimpleSigner
+from plenum.common.txn import NODE, ALIAS, SERVICES, VALIDATOR, RAW
+from plenum.common.types import RequestNack
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, GET_NYM, GET_ATTR, DATA
+from sovrin_common.types import Request
+from sovrin_node.server.node import ConsensusMsgs
+from sovrin_node.server.pool_manager import nodeServices
+from sovrin_node.test.helper import createNym
+
+
+@pytest.fixture("module")
+def sentByObserver(observer):
+    sent = []
+    send = observer.nodestack.send
+
+    def recordingSend(msg, *rids, **kwargs):
+        sent.append(msg)
+        return send(msg, *rids, **kwargs)
+
+    observer.nodestack.send = recordingSend
+    return sent
+
+
+@pytest.fixture("module")
+def nymAdded(looper, nodeSet, observer, steward, stewardWallet,
+             sentByObserver):
+    nym = SimpleSigner().identifier
+    createNym(looper, nym, steward, stewardWallet)
+
+    def caughtUp():
+        assert observer.domainLedger.size == nodeSet[0].domainLedger.size
+        assert observer.domainLedger.root_hash == \
+            nodeSet[0].domainLedger.root_hash
+        # Added to the graph in the background
+        assert observer.graphStore.getAddNymTxn(nym)
+
+    looper.run(eventually(caughtUp, retryWait=1,
+                          timeout=3 * observer.config.ObserverSyncInterval))
+    return nym
+
+
+def testObserverCatchesUp(observer, nymAdded):
+    assert observer.graphStore.getAddNymTxn(nymAdded)
+
+
+def testObserverAnswersReads(observer, nymAdded):
+    request = Request(identifier='client', reqId=1,
+                      operation={TXN_TYPE: GET_NYM, TARGET_NYM: nymAdded})
+    result = observer.getNymReply(request).result
+    assert json.loads(result[DATA])[TARGET_NYM] == nymAdded
+    assert result[F.rootHash.name]
+    assert result[F.auditPath.name] is not None
+
+
+def testObserverNacksGetAttr(observer, nymAdded, monkeypatch):
+    sent = []
+    monkeypatch.setattr(observer, 'transmitToClient',
+                        lambda msg, frm: sent.append((msg, frm)))
+    request = Request(identifier='client', reqId=2,
+                      operation={TXN_TYPE: GET_ATTR, TARGET_NYM: nymAdded,
+                                 RAW: 'endpoint'})
+    observer.processGetAttrsReq(request, 'client')
+    # Without the attribute values it could only answer that there is none
+    assert len(sent) == 1
+    msg, frm = sent[0]
+    assert isinstance(msg, RequestNack)
+    assert frm == 'client'
+
+
+def testObserverSendsNoConsensusMsgs(nymAdded, sentByObserver):
+    # Ledger statuses at least went out while it caught up
+    assert sentByObserver
+    assert not [msg for msg in sentByObserver
+                if isinstance(msg, ConsensusMsgs)]
+
+
+def testNodeServices():
+    txns = [{TXN_TYPE: NODE, DATA: {ALIAS: 'Alpha'}},
+            {TXN_TYPE: NODE, DATA: {ALIAS: 'Observer', SERVICES: []}},
+            {TXN_TYPE: NODE, DATA: {ALIAS: 'Beta', SERVICES: [VALIDATOR]}}]
+    assert nodeServices(txns, 'Alpha') == [VALIDATOR]
+    assert nodeServices(txns, 'Observer') == []
+    assert nodeServices(txns, 'Gamma') is None
+    txns.append({TXN_TYPE: NODE, DATA: {ALIAS: 'Observer',
+                                        SERVICES: [VALIDATOR]}})
+    assert nodeServices(txns, 'Observer') == [VALIDATOR]
@@ -0,0 +1,71 @@
+import json
+import os
+from hashlib import sha256
+
+from plenum.common.txn import RAW, ENC
+
+from sovrin_node.persistence.attribute_blobs import AttributeBlobStore, \
+    hasBlobRef, storedDigest
+from sovrin_node.persistence.attribute_index import AttributeIndex
+from sovrin_node.test.persistence.test_attribute_index import attrib
+
+
+def testPayloadsAreStoredOnceByDigest(tmpdir):
+    path = os.path.join(str(tmpdir), 'attr_blobs')
+    blobs = AttributeBlobStore(path)
+    payload = json.dumps({'photo': 'x' * 5000})
+    digest = blobs.put(payload)
+    assert digest == sha256(payload.encode()).hexdigest()
+    assert blobs.put(payload) == digest
+    assert len(blobs) == 1
+    assert bytes(blobs.get(digest)) == payload.encode()
+    assert blobs.get('00' * 32) is None
+    size = os.path.getsize(path)
+    blobs.close()
+
+    with open(path, 'ab') as file:
+        file.write(b'\x01' * 40)
+    blobs = AttributeBlobStore(path)
+    assert os.path.getsize(path) == size
+    assert blobs.getText(digest) == payload
+
+
+def testGraphAndIndexOnlyGetReferences(tmpdir):
+    blobs = AttributeBlobStore(os.path.join(str(tmpdir), 'attr_blobs'),
+                               minSize=100)
+    small = attrib(1, 'alice', {'name': 'Alice'})
+    assert blobs.stash(small) is small
+
+    photo = {'photo': 'x' * 500, 'bio': 'y' * 100}
+    txn = attrib(2, 'alice', photo)
+    stashed = blobs.stash(txn)
+    assert len(stashed[RAW]) < 200
+    assert storedDigest(stashed[RAW]) == \
+        sha256(txn[RAW].encode()).hexdigest()
+    assert blobs.restore(stashed) == txn
+    # Another identity with the same payload
+    blobs.stash(attrib(3, 'bob', photo))
+    assert len(blobs) == 1
+
+    index = AttributeIndex()
+    index.addTxn(stashed)
+    value, seqNo = index.get('alice', 'photo')
+    assert seqNo == 2
+    assert blobs.attrValue(value, 'photo') == photo['photo']
+    assert blobs.attrValue('Alice', 'name') == 'Alice'
+
+    enc = attrib(4, 'alice', **{ENC: 'z' * 300})
+    stashed = blobs.stash(enc)
+    assert storedDigest(stashed[ENC]) == sha256(enc[ENC].encode()).hexdigest()
+    assert blobs.restore(stashed) == enc
+
+
+def testClientPayloadsWithReferencesAreDetected(tmpdir):
+    blobs = AttributeBlobStore(os.path.join(str(tmpdir), 'attr_blobs'),
+                               minSize=10)
+    stashed = blobs.stash(attrib(1, 'alice', {'name': 'Alice Anderson'}))
+    assert hasBlobRef(stashed[RAW])
+    assert hasBlobRef(json.dumps({'a': 1, 'b': {'@blob': 'ab' * 32}}))
+    assert not hasBlobRef(json.dumps({'a': {'@blob': 'x', 'other': 1}}))
+    assert not hasBlobRef('@blob')
+    assert storedDigest(json.dumps({'@blob': 'x'})) == 'x'
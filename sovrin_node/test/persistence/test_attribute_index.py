@@ -0,0 +1,74 @@
+import json
+import os
+
+from ledger.util import F
+from plenum.common.txn import RAW, HASH
+from plenum.common.types import f
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, ATTRIB, NYM
+from sovrin_node.persistence.attribute_index import AttributeIndex
+
+
+def attrib(seqNo, nym, raw=None, **kwargs):
+    txn = {TXN_TYPE: ATTRIB, TARGET_NYM: nym, f.IDENTIFIER.nm: 'sponsor',
+           F.seqNo.name: seqNo}
+    if raw is not None:
+        txn[RAW] = json.dumps(raw)
+    txn.update(kwargs)
+    return txn
+
+
+def testLatestValueOfEveryAttribute(tmpdir):
+    path = os.path.join(str(tmpdir), 'attr_index')
+    index = AttributeIndex(path)
+    index.addTxn({TXN_TYPE: NYM, TARGET_NYM: 'alice', F.seqNo.name: 1})
+    index.addTxn(attrib(2, 'alice', {'name': 'Alice'}))
+    index.addTxn(attrib(3, 'alice', {'email': 'a@x.org'}))
+    index.addTxn(attrib(4, 'alice', {'name': 'Alice B'}))
+    index.addTxn(attrib(5, 'alice', **{HASH: 'ab' * 32}))
+    # Already added
+    index.addTxn(attrib(4, 'alice', {'name': 'Eve'}))
+    assert index.get('alice', 'name') == ('Alice B', 4)
+    assert index.has('alice', 'email')
+    assert not index.has('alice', 'phone')
+    assert not index.has('bob', 'name')
+    assert index.getRawAttrs('alice', 'name', 'phone') == \
+        {'name': ('Alice B', 4)}
+    assert index.lastSeqNo == 5
+    index.close()
+
+    reopened = AttributeIndex(path)
+    assert reopened.get('alice', 'name') == ('Alice B', 4)
+    assert reopened.get('alice', 'email') == ('a@x.org', 3)
+    assert reopened.lastSeqNo == 4
+
+
+def testAttributesFromLedgerAreSkipped():
+    index = AttributeIndex()
+    # The ledger has the hash of the raw attribute instead of its JSON
+    txn = attrib(1, 'alice')
+    txn[RAW] = 'ab' * 32
+    index.addTxn(txn)
+    assert not index.has('alice', 'name')
+    assert index.lastSeqNo == 1
+
+
+def testSnapshotCompactsTheJournal(tmpdir):
+    path = os.path.join(str(tmpdir), 'attr_index')
+    index = AttributeIndex(path, snapshotEvery=3)
+    for seqNo in range(1, 6):
+        index.addTxn(attrib(seqNo, 'alice', {'name': 'Alice {}'.format(seqNo),
+                                             'n{}'.format(seqNo): seqNo}))
+        index.flush('root{}'.format(seqNo))
+    assert index.checkpoint == (3, 'root3')
+    index.addTxn({TXN_TYPE: NYM, TARGET_NYM: 'bob', F.seqNo.name: 6})
+    index.close('root6')
+
+    reopened = AttributeIndex(path)
+    assert reopened.checkpoint == (6, 'root6')
+    assert reopened.lastSeqNo == 6
+    assert reopened.get('alice', 'name') == ('Alice 5', 5)
+    assert reopened.get('alice', 'n1') == (1, 1)
+    reopened.reset()
+    assert not reopened.has('alice', 'name')
+    assert reopened.lastSeqNo == 0
@@ -0,0 +1,99 @@
+import os
+from hashlib import sha256
+
+import pytest
+from ledger.serializers.compact_serializer import CompactSerializer
+from ledger.serializers.json_serializer import JsonSerializer
+from ledger.tree_hasher import TreeHasher
+from plenum.common.txn import RAW, VERKEY
+from plenum.common.types import f
+
+from sovrin_common.txn import getTxnOrderedFields, TXN_TYPE, TARGET_NYM, \
+    TXN_ID, TXN_TIME, NYM, ROLE, STEWARD, ATTRIB
+from sovrin_node.persistence.binary_ledger import BinaryFileStore, \
+    convertLedger, merkleRoot
+from sovrin_node.persistence.binary_serializer import BinarySerializer
+
+fields = getTxnOrderedFields()
+
+
+def domainTxns(count):
+    for i in range(count):
+        nym = '{:0>22}'.format(i)
+        txn = {f.IDENTIFIER.nm: 'steward', f.REQ_ID.nm: 1487000000000 + i,
+               TXN_ID: sha256(nym.encode()).hexdigest(),
+               TXN_TIME: 1487000000 + i, TARGET_NYM: nym}
+        if i % 2:
+            txn.update({TXN_TYPE: ATTRIB, RAW: sha256(b'raw').hexdigest()})
+        else:
+            txn.update({TXN_TYPE: NYM, VERKEY: '~' + nym, ROLE: STEWARD})
+        yield txn
+
+
+def writeTextLedger(path, lines):
+    with open(path, 'w') as file:
+        for line in lines:
+            file.write(line + '\n')
+
+
+def testRecordsGiveBackTheSameTxnsAndLeaves():
+    compact = CompactSerializer(fields=fields)
+    binary = BinarySerializer(fields)
+    for txn in domainTxns(20):
+        expected = compact.deserialize(compact.serialize(txn))
+        record = binary.serialize(txn)
+        assert binary.deserialize(record) == expected
+        assert compact.serialize(binary.deserialize(record)) == \
+            compact.serialize(txn)
+        assert len(record) < len(compact.serialize(txn))
+
+
+def testRecordsWithoutFields():
+    binary = BinarySerializer()
+    txn = {TXN_TYPE: '109', 'schedule': {'node1': '2017-02-14T10:00'},
+           'timeout': 10, 'force': True, 'justification': None,
+           'sha256': 'ab' * 32, 'name': 'Ünïcödé'}
+    assert binary.deserialize(binary.serialize(txn)) == txn
+
+
+def testStoreIsReopenedAndDropsPartialRecords(tmpdir):
+    store = BinaryFileStore(str(tmpdir), 'txns')
+    for i in range(1, 11):
+        store.put('record{}'.format(i).encode(), key=str(i))
+    with pytest.raises(ValueError):
+        store.put(b'out of order', key='20')
+    store.close()
+    with open(os.path.join(str(tmpdir), 'txns'), 'ab') as file:
+        file.write(b'\x00\x00\x01')
+    store = BinaryFileStore(str(tmpdir), 'txns')
+    assert store.numKeys == 10
+    assert store.get('3') == b'record3'
+    assert store.get('11') is None
+    assert list(store.iterator())[-1] == ('10', b'record10')
+    store.put(b'record11')
+    assert store.get('11') == b'record11'
+
+
+def testMerkleRootMatchesTheLedgerTree():
+    hasher = TreeHasher()
+    for count in (0, 1, 2, 3, 7, 8, 13):
+        leaves = ['leaf{}'.format(i).encode() for i in range(count)]
+        assert merkleRoot((hasher.hash_leaf(l) for l in leaves), hasher) == \
+            hasher.hash_full_tree(leaves)
+
+
+def testConversionKeepsTheMerkleRoot(tmpdir):
+    hasher = TreeHasher()
+    for name, ledgerFields, serializer in (
+            ('domain', fields, CompactSerializer(fields=fields)),
+            ('config', None, JsonSerializer())):
+        lines = [serializer.serialize(txn).decode()
+                 for txn in domainTxns(25)]
+        textPath = os.path.join(str(tmpdir), name)
+        writeTextLedger(textPath, lines)
+        root = convertLedger(textPath, textPath + '.bin', ledgerFields)
+        assert root == hasher.hash_full_tree([l.encode() for l in lines])
+        store = BinaryFileStore(str(tmpdir), name + '.bin')
+        binary = BinarySerializer(ledgerFields)
+        assert [serializer.serialize(binary.deserialize(v)).decode()
+                for _, v in store.iterator()] == lines
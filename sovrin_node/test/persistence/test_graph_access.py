@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from sovrin_node.persistence.graph_access import GraphPool, gather
+
+
+class SlowGraph:
+    """
+    Graph whose lookups take a while and which records the threads it is
+    used from
+    """
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.threads = set()
+        self.name = 'slow'
+
+    def getRole(self, nym):
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        if nym == 'unknown':
+            raise ValueError(nym)
+        return 'role of {}'.format(nym)
+
+
+def testLookupsOverlapAcrossConnections():
+    graphs = []
+
+    def newGraph():
+        graphs.append(SlowGraph())
+        return graphs[-1]
+
+    pool = GraphPool(newGraph, 4)
+    start = time.perf_counter()
+    results = pool.gather(*(("getRole", str(i)) for i in range(4)))
+    assert time.perf_counter() - start < 0.3
+    assert results == ['role of {}'.format(i) for i in range(4)]
+    # The sync face and attributes of the first graph
+    assert pool.getRole('a') == 'role of a'
+    assert pool.name == 'slow'
+    pool.close()
+    # Every connection is only used by its own thread
+    assert all(len(graph.threads) <= 1 for graph in graphs)
+    assert len(set.union(*(graph.threads for graph in graphs))) == 4
+    with pytest.raises(RuntimeError):
+        pool.submit("getRole", 'a')
+
+
+def testFailedLookups():
+    pool = GraphPool(lambda: SlowGraph(0), 2)
+    with pytest.raises(ValueError):
+        pool.gather(("getRole", 'a'), ("getRole", 'unknown'))
+    role, failed = pool.gather(("getRole", 'a'), ("getRole", 'unknown'),
+                               returnExceptions=True)
+    assert role == 'role of a'
+    assert isinstance(failed, ValueError)
+    pool.close()
+    # A plain graph gives the same results, one lookup after the other
+    role, failed = gather(SlowGraph(0), ("getRole", 'a'),
+                          ("getRole", 'unknown'), returnExceptions=True)
+    assert role == 'role of a'
+    assert isinstance(failed, ValueError)
+
+
+def testAsyncFace():
+    pool = GraphPool(lambda: SlowGraph(), 2)
+    loop = asyncio.new_event_loop()
+    try:
+        start = time.perf_counter()
+        roles = loop.run_until_complete(asyncio.gather(
+            pool.callAsync("getRole", 'a', loop=loop),
+            pool.callAsync("getRole", 'b', loop=loop)))
+        assert time.perf_counter() - start < 0.2
+        assert roles == ['role of a', 'role of b']
+    finally:
+        loop.close()
+        pool.close()
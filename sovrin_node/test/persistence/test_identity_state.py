@@ -0,0 +1,34 @@
+from hashlib import sha256
+
+from ledger.util import F
+from plenum.common.txn import RAW, ENC, HASH
+from plenum.common.types import f
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, ATTRIB, NYM
+from sovrin_node.persistence.identity_state import IdentityState
+from sovrin_node.persistence.state_trie import StateTrie, verifyProof
+
+
+def ledgerAttrib(seqNo, nym, **payload):
+    txn = {TXN_TYPE: ATTRIB, TARGET_NYM: nym, f.IDENTIFIER.nm: 'sponsor',
+           F.seqNo.name: seqNo}
+    txn.update(payload)
+    return txn
+
+
+def testEveryKindOfAttributeIsProvenByItsLedgerHash():
+    rawHash = sha256(b'{"name": "Alice"}').hexdigest()
+    encHash = sha256(b'encrypted').hexdigest()
+    state = IdentityState(StateTrie())
+    state.addTxn({TXN_TYPE: NYM, TARGET_NYM: 'alice',
+                  f.IDENTIFIER.nm: 'sponsor', F.seqNo.name: 1})
+    state.addTxn(ledgerAttrib(2, 'alice', **{RAW: rawHash}))
+    state.addTxn(ledgerAttrib(3, 'alice', **{ENC: encHash}))
+    state.addTxn(ledgerAttrib(4, 'alice', **{HASH: 'ab' * 32}))
+    for attrHash in (rawHash, encHash, 'ab' * 32):
+        proof = state.proveAttr('alice', attrHash)
+        assert proof['value'] is not None
+        assert verifyProof(proof, state.rootHash.hex())
+    assert state.proveAttr('alice', 'cd' * 32)['value'] is None
+    # Proven against the state before the last attribute
+    assert state.proveAttr('alice', 'ab' * 32, seqNo=3)['value'] is None
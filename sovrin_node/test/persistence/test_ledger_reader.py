@@ -0,0 +1,80 @@
+import os
+
+import pytest
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.ledger import Ledger
+from ledger.serializers.compact_serializer import CompactSerializer
+from ledger.stores.file_hash_store import FileHashStore
+
+from sovrin_common.txn import getTxnOrderedFields
+from sovrin_node.persistence.binary_ledger import BinaryLedger
+from sovrin_node.persistence.ledger_reader import LedgerReader, \
+    offsetsFileName
+from sovrin_node.test.persistence.test_binary_ledger import domainTxns
+
+fields = getTxnOrderedFields()
+
+
+def textLedger(dataDir):
+    return Ledger(CompactMerkleTree(hashStore=FileHashStore(
+        dataDir=dataDir)), dataDir=dataDir,
+        serializer=CompactSerializer(fields=fields))
+
+
+def binaryLedger(dataDir):
+    return BinaryLedger(CompactMerkleTree(hashStore=FileHashStore(
+        dataDir=dataDir)), dataDir=dataDir, fields=fields,
+        hashSerializer=CompactSerializer(fields=fields))
+
+
+@pytest.fixture(params=[textLedger, binaryLedger])
+def newLedger(request):
+    return request.param
+
+
+def addTxns(ledger, txns):
+    for txn in txns:
+        ledger.add(txn)
+
+
+def testTxnsAreReadOneAtATime(tmpdir, newLedger):
+    ledger = newLedger(str(tmpdir))
+    addTxns(ledger, domainTxns(50))
+    expected = ledger.getAllTxn()
+    reader = LedgerReader(ledger)
+    assert dict(reader.txns()) == expected
+    assert [s for s, _ in reader.txns(10, 20)] == list(range(10, 21))
+    assert [s for s, _ in reader.txns(reverse=True)] == \
+        list(range(50, 0, -1))
+    assert reader.getBySeqNo(7) == expected[7]
+    assert reader.getBySeqNo(51) is None
+    reader.close()
+
+
+def testOffsetsAreSavedAndExtended(tmpdir, newLedger):
+    ledger = newLedger(str(tmpdir))
+    txns = list(domainTxns(30))
+    addTxns(ledger, txns[:20])
+    reader = LedgerReader(ledger)
+    assert len(list(reader.txns())) == 20
+    reader.close()
+    addTxns(ledger, txns[20:])
+
+    reader = LedgerReader(ledger)
+    # Only the transactions added since are indexed again
+    assert reader.indexed == 20
+    assert dict(reader.txns()) == ledger.getAllTxn()
+    assert reader.indexed == 30
+    reader.close()
+
+
+def testOffsetsNotMatchingTheLedgerAreRebuilt(tmpdir, newLedger):
+    ledger = newLedger(str(tmpdir))
+    addTxns(ledger, domainTxns(10))
+    reader = LedgerReader(ledger)
+    with open(offsetsFileName(reader.path), 'wb') as file:
+        file.write(os.urandom(80))
+    reader.close()
+    reader = LedgerReader(ledger)
+    assert dict(reader.txns()) == ledger.getAllTxn()
+    reader.close()
@@ -0,0 +1,61 @@
+import os
+
+from ledger.util import F
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, NYM, ATTRIB
+from sovrin_node.persistence.nym_filter import NymBloomFilter
+
+
+def nymTxn(seqNo, nym):
+    return {TXN_TYPE: NYM, TARGET_NYM: nym, F.seqNo.name: seqNo}
+
+
+def testNoFalseNegativesAndFewFalsePositives():
+    nymFilter = NymBloomFilter(capacity=10000, errorRate=0.01)
+    for i in range(10000):
+        nymFilter.addTxn(nymTxn(i + 1, 'known{}'.format(i)))
+    assert all(nymFilter.mightHave('known{}'.format(i)) for i in range(10000))
+    falsePositives = sum(nymFilter.mightHave('unknown{}'.format(i))
+                         for i in range(10000))
+    assert falsePositives < 300
+
+
+def testOnlyNymsAreAdded():
+    nymFilter = NymBloomFilter(capacity=100)
+    nymFilter.addTxn({TXN_TYPE: ATTRIB, TARGET_NYM: 'alice',
+                      F.seqNo.name: 1})
+    assert not nymFilter.mightHave('alice')
+    assert nymFilter.lastSeqNo == 1
+
+
+def testFilterIsSavedWithItsWatermark(tmpdir):
+    path = os.path.join(str(tmpdir), 'nym_filter')
+    nymFilter = NymBloomFilter(path, capacity=1000)
+    for i in range(10):
+        nymFilter.addTxn(nymTxn(i + 1, 'nym{}'.format(i)))
+    nymFilter.close('root10')
+
+    reopened = NymBloomFilter(path, capacity=1000)
+    assert reopened.lastSeqNo == 10
+    assert reopened.ledgerCheckpoint() == (10, 'root10')
+    assert reopened.count == 10
+    assert reopened.mightHave('nym3')
+
+    # Other parameters make it start empty, to be rebuilt from the ledger
+    resized = NymBloomFilter(path, capacity=5000)
+    assert resized.lastSeqNo == 0
+    assert not resized.mightHave('nym3')
+
+
+def testResetFilterStartsEmpty(tmpdir):
+    path = os.path.join(str(tmpdir), 'nym_filter')
+    nymFilter = NymBloomFilter(path, capacity=1000)
+    nymFilter.addTxn(nymTxn(1, 'nym1'))
+    nymFilter.close()
+    # Saved without the ledger's root, only the seqNo can be checked
+    nymFilter = NymBloomFilter(path, capacity=1000)
+    assert nymFilter.ledgerCheckpoint() is None
+    nymFilter.reset()
+    assert nymFilter.lastSeqNo == 0
+    assert not nymFilter.mightHave('nym1')
+    assert not os.path.exists(path)
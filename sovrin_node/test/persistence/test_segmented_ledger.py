@@ -0,0 +1,109 @@
+import os
+
+import pytest
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.serializers.compact_serializer import CompactSerializer
+from ledger.tree_hasher import TreeHasher
+
+from sovrin_node.persistence.binary_ledger import merkleRoot
+from sovrin_node.persistence.binary_serializer import BinarySerializer
+from sovrin_node.persistence.segmented_ledger import SegmentedFileStore, \
+    SegmentedLedger, compressedFileName, manifestFileName
+from sovrin_node.test.persistence.test_binary_ledger import domainTxns, \
+    fields
+
+
+def records(count):
+    return ['record{}'.format(i).encode() for i in range(1, count + 1)]
+
+
+@pytest.fixture(params=[False, True], ids=['raw', 'compressed'])
+def compress(request):
+    return request.param
+
+
+def testRecordsAreSplitIntoSealedSegments(tmpdir, compress):
+    dataDir = str(tmpdir)
+    store = SegmentedFileStore(dataDir, 'txns', 4, compress=compress)
+    for key, record in enumerate(records(10), 1):
+        store.put(record, key=str(key))
+    with pytest.raises(ValueError):
+        store.put(b'out of order', key='20')
+    assert store.sealedCount == 2
+    assert store.numKeys == 10
+    assert os.path.exists(os.path.join(dataDir, manifestFileName('txns')))
+    first = store.segmentPath(0)
+    assert os.path.exists(compressedFileName(first)) == compress
+    assert os.path.exists(first) != compress
+
+    hasher = TreeHasher()
+    assert store.segmentRoot(1) == merkleRoot(
+        (hasher.hash_leaf(r) for r in records(8)[4:]), hasher)
+    assert store.verifySegment(0) and store.verifySegment(1)
+    store.close()
+
+    store = SegmentedFileStore(dataDir, 'txns', 4, compress=compress)
+    assert store.numKeys == 10
+    assert store.get('3') == b'record3'
+    assert store.get('10') == b'record10'
+    assert store.get('11') is None
+    assert list(store.iterator(includeKey=False)) == records(10)
+    with pytest.raises(ValueError):
+        SegmentedFileStore(dataDir, 'txns', 8)
+
+
+def testLookupsOpenOnlyTheirSegment(tmpdir):
+    store = SegmentedFileStore(str(tmpdir), 'txns', 2)
+    for record in records(20):
+        store.put(record)
+    assert store.get('7') == b'record7'
+    assert list(store._open) == [3]
+    store.get('8')
+    store.get('1')
+    assert list(store._open) == [3, 0]
+
+
+def testDamagedSegmentFailsVerification(tmpdir):
+    store = SegmentedFileStore(str(tmpdir), 'txns', 4)
+    for record in records(8):
+        store.put(record)
+    store.close()
+    with open(store.segmentPath(1), 'r+b') as file:
+        file.seek(-1, os.SEEK_END)
+        file.write(b'X')
+    store = SegmentedFileStore(str(tmpdir), 'txns', 4)
+    assert store.verifySegment(0)
+    assert not store.verifySegment(1)
+
+
+def testFullSegmentLeftBySealingCrashIsSealed(tmpdir):
+    store = SegmentedFileStore(str(tmpdir), 'txns', 4)
+    for record in records(6):
+        store.put(record)
+    store.close()
+    # As if the node stopped after writing the 4th record of a segment
+    os.remove(os.path.join(str(tmpdir), manifestFileName('txns')))
+    os.rename(store.segmentPath(1), store.segmentPath(1) + '.moved')
+    store = SegmentedFileStore(str(tmpdir), 'txns', 4)
+    assert store.sealedCount == 1
+    assert store.numKeys == 4
+    assert store.verifySegment(0)
+
+
+def testBinaryLedgerSegmentsHashTheTextLeaves(tmpdir, compress):
+    compact = CompactSerializer(fields=fields)
+    ledger = SegmentedLedger(CompactMerkleTree(), str(tmpdir),
+                             serializer=BinarySerializer(fields),
+                             hashSerializer=compact, segmentSize=8,
+                             compress=compress)
+    txns = list(domainTxns(20))
+    for txn in txns:
+        ledger.add(txn)
+    store = ledger._transactionLog
+    assert store.sealedCount == 2
+    hasher = TreeHasher()
+    assert store.segmentRoot(1) == merkleRoot(
+        (hasher.hash_leaf(compact.serialize(txn)) for txn in txns[8:16]),
+        hasher)
+    assert ledger.getBySeqNo(13) == compact.deserialize(
+        compact.serialize(txns[12]))
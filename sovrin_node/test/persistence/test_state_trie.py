@@ -0,0 +1,140 @@
+import os
+
+from sovrin_node.persistence.state_trie import StateTrie, verifyProof, \
+    EMPTY_ROOT, VALUE, PATH, ROOT_HASH
+
+
+def keys(n):
+    return [('key{}'.format(i).encode(), 'value{}'.format(i).encode())
+            for i in range(n)]
+
+
+def testEmptyTrieProvesAbsence():
+    trie = StateTrie()
+    assert trie.rootHash == EMPTY_ROOT
+    proof = trie.prove(b'missing')
+    assert proof[VALUE] is None
+    assert verifyProof(proof, EMPTY_ROOT.hex())
+
+
+def testProofsOfPresenceAndAbsence():
+    trie = StateTrie()
+    for seqNo, (k, v) in enumerate(keys(200), 1):
+        trie.set(k, v, seqNo)
+    root = trie.rootHash.hex()
+    for k, v in keys(200):
+        assert trie.get(k) == v
+        proof = trie.prove(k)
+        assert verifyProof(proof, root)
+    for i in range(200, 250):
+        k = 'key{}'.format(i).encode()
+        assert trie.get(k) is None
+        proof = trie.prove(k)
+        assert proof[VALUE] is None
+        assert verifyProof(proof, root)
+
+
+def testTamperedProofIsRejected():
+    trie = StateTrie()
+    for seqNo, (k, v) in enumerate(keys(50), 1):
+        trie.set(k, v, seqNo)
+    proof = trie.prove(b'key7')
+    proof[VALUE] = 'dmFsdWU4'   # base64 of "value8"
+    assert not verifyProof(proof)
+    proof = trie.prove(b'key7')
+    proof[PATH][0][1] = '00' * 32
+    assert not verifyProof(proof)
+
+
+def testRootDependsOnContentNotOrder():
+    a, b = StateTrie(), StateTrie()
+    for k, v in keys(100):
+        a.set(k, v)
+    for k, v in reversed(keys(100)):
+        b.set(k, v)
+    assert a.rootHash == b.rootHash
+    b.set(b'key1', b'other')
+    assert a.rootHash != b.rootHash
+    b.set(b'key1', b'value1')
+    assert a.rootHash == b.rootHash
+
+
+def testProofsAgainstEarlierRoots():
+    trie = StateTrie(rootHistory=10)
+    trie.set(b'nym', b'v1', 1)
+    firstRoot = trie.rootHash.hex()
+    trie.set(b'nym', b'v2', 2)
+    old = trie.prove(b'nym', seqNo=1)
+    assert old[ROOT_HASH] == firstRoot
+    assert old[VALUE] == 'djE='   # base64 of "v1"
+    assert verifyProof(old, firstRoot)
+    assert trie.get(b'nym') == b'v2'
+
+
+def testJournalIsReplayed(tmpdir):
+    path = os.path.join(str(tmpdir), 'state_trie')
+    trie = StateTrie(path)
+    for seqNo, (k, v) in enumerate(keys(30), 1):
+        trie.set(k, v, seqNo)
+    root = trie.rootHash
+    trie.close()
+    reopened = StateTrie(path)
+    assert reopened.rootHash == root
+    assert reopened.lastSeqNo == 30
+    assert reopened.get(b'key3') == b'value3'
+
+
+def testSnapshotCompactsTheJournal(tmpdir):
+    path = os.path.join(str(tmpdir), 'state_trie')
+    trie = StateTrie(path, snapshotEvery=20)
+    for seqNo, (k, v) in enumerate(keys(30), 1):
+        trie.set(k, v, seqNo)
+        trie.flush('root{}'.format(seqNo))
+    # A snapshot was taken after 20 updates, 10 are in the journal
+    assert trie.checkpoint == (20, 'root20')
+    with open(path) as journal:
+        assert len(journal.readlines()) == 10
+    root = trie.rootHash
+    trie.close('root30')
+    assert trie.checkpoint == (30, 'root30')
+    assert os.path.getsize(path) == 0
+
+    reopened = StateTrie(path)
+    assert reopened.rootHash == root
+    assert reopened.lastSeqNo == 30
+    assert reopened.checkpoint == (30, 'root30')
+    assert reopened.get(b'key29') == b'value29'
+    assert verifyProof(reopened.prove(b'key3'), root.hex())
+
+
+def testJournalOlderThanSnapshotIsSkipped(tmpdir):
+    path = os.path.join(str(tmpdir), 'state_trie')
+    trie = StateTrie(path)
+    for seqNo, (k, v) in enumerate(keys(10), 1):
+        trie.set(k, v, seqNo)
+    trie.flush()
+    with open(path) as journal:
+        updates = journal.read()
+    trie.set(b'key1', b'changed', 11)
+    trie.close('root11')
+    # As if the node stopped before emptying the journal
+    with open(path, 'w') as journal:
+        journal.write(updates)
+    reopened = StateTrie(path)
+    assert reopened.get(b'key1') == b'changed'
+    assert reopened.lastSeqNo == 11
+
+
+def testResetForgetsEverything(tmpdir):
+    path = os.path.join(str(tmpdir), 'state_trie')
+    trie = StateTrie(path)
+    for seqNo, (k, v) in enumerate(keys(10), 1):
+        trie.set(k, v, seqNo)
+    trie.close('root10')
+    reopened = StateTrie(path)
+    reopened.reset()
+    assert reopened.rootHash == EMPTY_ROOT
+    assert reopened.lastSeqNo == 0
+    assert reopened.checkpoint is None
+    reopened.close()
+    assert StateTrie(path).rootHash == EMPTY_ROOT
@@ -0,0 +1,72 @@
+import os
+
+from ledger.util import F
+from plenum.common.txn import RAW
+from plenum.common.types import f
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, TXN_ID, NYM, ATTRIB, \
+    ROLE, SPONSOR
+from sovrin_node.persistence.txn_history_index import TxnHistoryIndex
+
+
+def txn(seqNo, typ, identifier, nym, role=None):
+    t = {TXN_TYPE: typ, TARGET_NYM: nym, f.IDENTIFIER.nm: identifier,
+         TXN_ID: 'txn{}'.format(seqNo), F.seqNo.name: seqNo}
+    if role:
+        t[ROLE] = role
+    if typ == ATTRIB:
+        t[RAW] = '{"name": "Alice"}'
+    return t
+
+
+def testHistoryOfUserStartsWithSponsorNym():
+    index = TxnHistoryIndex()
+    for t in (txn(1, NYM, 'steward', 'sponsor', SPONSOR),
+              txn(2, NYM, 'sponsor', 'alice'),
+              txn(3, NYM, 'sponsor', 'bob'),
+              txn(4, ATTRIB, 'sponsor', 'alice'),
+              txn(5, ATTRIB, 'sponsor', 'bob'),
+              txn(6, ATTRIB, 'sponsor', 'alice')):
+        index.addTxn(t)
+    assert index.txnsAfter('alice') == \
+        ([1, 2, 4, 6], ['txn1', 'txn2', 'txn4', 'txn6'])
+    assert index.txnsAfter('alice', 2) == ([4, 6], ['txn4', 'txn6'])
+    assert index.txnsAfter('alice', 6) == ([], [])
+    # A nym with a role does not get its sponsor's NYM
+    assert index.txnsAfter('sponsor') == ([1], ['txn1'])
+    assert index.txnsAfter('unknown') == ([], [])
+
+
+def testTxnsAreAddedOnce():
+    index = TxnHistoryIndex()
+    t = txn(1, NYM, 'steward', 'sponsor', SPONSOR)
+    index.addTxn(t)
+    index.addTxn(t)
+    assert index.txnsAfter('sponsor') == ([1], ['txn1'])
+    assert index.lastSeqNo == 1
+
+
+def testHistoryIsPersisted(tmpdir):
+    path = os.path.join(str(tmpdir), 'txn_history')
+    index = TxnHistoryIndex(path, snapshotEvery=3)
+    for t in (txn(1, NYM, 'steward', 'sponsor', SPONSOR),
+              txn(2, NYM, 'sponsor', 'alice'),
+              txn(3, ATTRIB, 'sponsor', 'alice')):
+        index.addTxn(t)
+    index.flush('root3')
+    assert index.checkpoint == (3, 'root3')
+    index.addTxn(txn(4, ATTRIB, 'sponsor', 'alice'))
+    index.close()
+
+    # The snapshot and the journal written after it
+    reopened = TxnHistoryIndex(path)
+    assert not reopened.rebuiltFromLedger
+    assert reopened.checkpoint == (3, 'root3')
+    assert reopened.lastSeqNo == 4
+    assert reopened.txnsAfter('alice') == \
+        ([1, 2, 3, 4], ['txn1', 'txn2', 'txn3', 'txn4'])
+    reopened.addTxn(txn(5, NYM, 'sponsor', 'bob'))
+    assert reopened.txnsAfter('bob') == ([1, 5], ['txn1', 'txn5'])
+    reopened.reset()
+    assert reopened.txnsAfter('alice') == ([], [])
+    assert reopened.lastSeqNo == 0
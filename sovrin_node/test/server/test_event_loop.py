@@ -0,0 +1,26 @@
+import asyncio
+import sys
+import types
+
+from sovrin_node.server import event_loop
+from sovrin_node.server.event_loop import useEventLoop, DEFAULT_LOOP
+
+
+def testFallsBackToAsyncioLoop(monkeypatch):
+    monkeypatch.setitem(event_loop.loopModules, 'missing', 'no_such_loop')
+    assert useEventLoop(None) == DEFAULT_LOOP
+    assert useEventLoop('unknown') == DEFAULT_LOOP
+    assert useEventLoop('missing') == DEFAULT_LOOP
+
+
+def testInstallsPolicyOfChosenLoop(monkeypatch):
+    module = types.ModuleType('other_loop')
+    module.EventLoopPolicy = asyncio.DefaultEventLoopPolicy
+    monkeypatch.setitem(sys.modules, 'other_loop', module)
+    monkeypatch.setitem(event_loop.loopModules, 'other', 'other_loop')
+    policy = asyncio.get_event_loop_policy()
+    try:
+        assert useEventLoop('other') == 'other'
+        assert asyncio.get_event_loop_policy() is not policy
+    finally:
+        asyncio.set_event_loop_policy(policy)
@@ -0,0 +1,141 @@
+import json
+import os
+
+import pytest
+from ledger.util import F
+from plenum.common.signer_simple import SimpleSigner
+from plenum.common.txn import VERKEY
+from plenum.common.types import f, OPERATION, RequestNack, Reply
+
+from sovrin_client.client.wallet.wallet import Wallet
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, GET_NYM, TXN_ID, NYM, \
+    ROLE, STEWARD, DATA
+from sovrin_node.server.gateway import ReadCache, Gateway, \
+    gatewayKeepDir, copyStackKeys
+from sovrin_node.server.gateway_ipc import GATEWAY_CLIENT_PREFIX
+from sovrin_node.server.node import Node
+from sovrin_node.test.helper import unstartedNode, ClientStackStandIn
+from sovrin_node.test.server.test_timer_queue import FakeClock
+
+
+class Config:
+    GatewaySocket = 'gateway.sock'
+    GatewayReadCacheSeconds = 0
+    ReadWorkerCount = 0
+
+
+class UnstackedGateway(Gateway):
+    def getClientStack(self, stackParams, basedirpath):
+        return ClientStackStandIn()
+
+
+@pytest.fixture
+def steward():
+    wallet = Wallet('steward')
+    wallet.addIdentifier(signer=SimpleSigner())
+    return wallet
+
+
+@pytest.fixture
+def nodeAndGateway(tmpdir, steward):
+    node = unstartedNode(config=Config(), basedirpath=str(tmpdir))
+    node.storeTxnInGraph({TXN_TYPE: NYM, TARGET_NYM: steward.defaultId,
+                          ROLE: STEWARD, VERKEY: steward.getVerkey(),
+                          TXN_ID: 'txnsteward', F.seqNo.name: 1})
+    gateway = UnstackedGateway(node.name, None, str(tmpdir),
+                               config=Config(), graphStore=node.graphStore)
+    gateway.connectToNode()
+    assert gateway.nodeConnected
+    queued = []
+    node.postToClientInBox = lambda req, frm: queued.append((req, frm))
+    yield node, gateway, queued
+    gateway.node.close()
+    node.gatewayListener.close()
+
+
+def clientMsg(wallet, op):
+    req = wallet.signOp(op)
+    return {f.IDENTIFIER.nm: req.identifier, f.REQ_ID.nm: req.reqId,
+            OPERATION: req.operation, f.SIG.nm: req.signature}
+
+
+def testWriteGoesThroughTheGatewayAndItsReplyBack(nodeAndGateway, steward):
+    node, gateway, queued = nodeAndGateway
+    msg = clientMsg(steward, {TXN_TYPE: NYM, TARGET_NYM: 'newNym'})
+    gateway.handleClientMsg((msg, 'client1'))
+    assert node.serviceGateway() == 1
+    (request, frm), = queued
+    assert request.key == (steward.defaultId, msg[f.REQ_ID.nm])
+    assert frm == GATEWAY_CLIENT_PREFIX + 'client1'
+    # Once the pool ordered it
+    node.transmitToClient(Reply(dict(request.operation, **{
+        f.IDENTIFIER.nm: request.identifier,
+        f.REQ_ID.nm: request.reqId})), frm)
+    assert gateway.serviceNode() == 1
+    (reply, client), = gateway.clientstack.sent
+    assert client == 'client1'
+    assert reply[f.RESULT.nm][TARGET_NYM] == 'newNym'
+
+
+def testReadGoesThroughTheGatewayAndItsReplyBack(nodeAndGateway, steward):
+    node, gateway, queued = nodeAndGateway
+    msg = {f.IDENTIFIER.nm: 'reader', f.REQ_ID.nm: 1,
+           OPERATION: {TXN_TYPE: GET_NYM, TARGET_NYM: steward.defaultId}}
+    gateway.handleClientMsg((msg, 'client2'))
+    assert node.serviceGateway() == 1
+    (request, frm), = queued
+    node.processRequest(request, frm)
+    assert gateway.serviceNode() == 2
+    (ack, _), (reply, client) = gateway.clientstack.sent
+    assert client == 'client2'
+    assert ack[f.REQ_ID.nm] == 1
+    assert json.loads(reply[f.RESULT.nm][DATA])[TARGET_NYM] == \
+        steward.defaultId
+
+
+def testGatewayRejectsBadSignatures(nodeAndGateway, steward):
+    node, gateway, queued = nodeAndGateway
+    msg = clientMsg(steward, {TXN_TYPE: NYM, TARGET_NYM: 'newNym'})
+    msg[OPERATION][TARGET_NYM] = 'otherNym'
+    gateway.handleClientMsg((msg, 'client3'))
+    (nack, client), = gateway.clientstack.sent
+    assert isinstance(nack, RequestNack)
+    assert client == 'client3'
+    # The node never gets it
+    assert node.serviceGateway() == 0
+    assert not queued
+
+
+def testGatewayStackHasAKeepOfItsOwn(tmpdir):
+    basedir = str(tmpdir)
+    keys = os.path.join(basedir, 'NodeC', 'role', 'local')
+    os.makedirs(keys)
+    with open(os.path.join(keys, 'role.json'), 'w') as file:
+        file.write('{"sighex": "ab"}')
+    keepDir = gatewayKeepDir(basedir, 'Node')
+    copyStackKeys(basedir, keepDir, 'NodeC')
+    with open(os.path.join(keepDir, 'NodeC', 'role', 'local',
+                           'role.json')) as file:
+        assert json.load(file) == {"sighex": "ab"}
+    # Nothing else of the node's keep is shared
+    assert os.listdir(os.path.join(keepDir, 'NodeC')) == ['role']
+
+
+def testCachedReadsAreMadeRepliesToTheNewRequest():
+    clock = FakeClock()
+    cache = ReadCache(ttl=1, maxSize=2, clock=clock)
+    operation = {TXN_TYPE: GET_NYM, TARGET_NYM: 'nym1'}
+    assert cache.replyFor(operation, 'client1', 1) is None
+    cache.add(cache.key(operation), dict(operation, data='nymTxn', **{
+        f.IDENTIFIER.nm: 'client1', f.REQ_ID.nm: 1,
+        TXN_ID: Node.genTxnId('client1', 1)}))
+    # Key order does not matter
+    result = cache.replyFor({TARGET_NYM: 'nym1', TXN_TYPE: GET_NYM},
+                            'client2', 7)
+    assert result['data'] == 'nymTxn'
+    assert result[f.IDENTIFIER.nm] == 'client2'
+    assert result[f.REQ_ID.nm] == 7
+    assert result[TXN_ID] == Node.genTxnId('client2', 7)
+    clock.now += 1
+    assert cache.replyFor(operation, 'client2', 8) is None
+    assert (cache.hits, cache.misses) == (1, 2)
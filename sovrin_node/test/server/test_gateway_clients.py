@@ -0,0 +1,43 @@
+import os
+
+from plenum.common.types import f, RequestAck
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, GET_NYM
+from sovrin_node.server.gateway_ipc import CLIENT, MSG, \
+    GATEWAY_CLIENT_PREFIX, connect
+from sovrin_node.test.helper import unstartedNode
+
+
+class Config:
+    GatewaySocket = 'gateway.sock'
+    GatewayClientsSize = 2
+
+
+def request(reqId):
+    return {f.IDENTIFIER.nm: 'client', f.REQ_ID.nm: reqId,
+            'operation': {TXN_TYPE: GET_NYM, TARGET_NYM: 'nym1'}}
+
+
+def testRepliesGoBackOverTheGatewayOfRecentClients(tmpdir):
+    node = unstartedNode(config=Config(), basedirpath=str(tmpdir))
+    queued = []
+    node.postToClientInBox = lambda req, frm: queued.append((req, frm))
+    gateway = connect(os.path.join(node.dataLocation, Config.GatewaySocket))
+    for reqId, client in enumerate(('client1', 'client2', 'client3'), 1):
+        gateway.send({CLIENT: client, MSG: request(reqId)})
+    assert node.serviceGateway() == 3
+    assert [(req.reqId, frm) for req, frm in queued] == [
+        (i, GATEWAY_CLIENT_PREFIX + 'client{}'.format(i)) for i in (1, 2, 3)]
+    # The client which sent a request the longest ago is forgotten
+    assert list(node.gatewayClients) == [GATEWAY_CLIENT_PREFIX + 'client2',
+                                         GATEWAY_CLIENT_PREFIX + 'client3']
+
+    for req, frm in queued:
+        node.transmitToClient(RequestAck(*req.key), frm)
+    received = gateway.receive()
+    assert [(msg[CLIENT], msg[MSG][f.REQ_ID.nm]) for msg in received] == \
+        [('client2', 2), ('client3', 3)]
+    # Nor does the node send the forgotten client's reply on its own stack
+    assert node.clientstack.sent == []
+    gateway.close()
+    node.gatewayListener.close()
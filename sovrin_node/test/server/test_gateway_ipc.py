@@ -0,0 +1,50 @@
+import os
+import socket
+
+from sovrin_node.server.gateway_ipc import IpcListener, FrameConnection, \
+    CLIENT, MSG, connect, frame
+
+
+def testMessagesArriveWholeWhateverTheReads():
+    left, right = socket.socketpair()
+    receiver = FrameConnection(right)
+    msgs = [{CLIENT: 'client{}'.format(i), MSG: {'reqId': i, 'x': 'y' * i}}
+            for i in range(3)]
+    data = b''.join(frame(msg) for msg in msgs)
+    # Split across reads, even within the length prefix
+    left.sendall(data[:2])
+    assert receiver.receive() == []
+    left.sendall(data[2:40])
+    left.sendall(data[40:])
+    assert receiver.receive(limit=2) == msgs[:2]
+    assert receiver.receive() == msgs[2:]
+    left.close()
+    assert receiver.receive() == []
+    assert receiver.closed
+
+
+def testMalformedMessageClosesTheConnection():
+    left, right = socket.socketpair()
+    receiver = FrameConnection(right)
+    left.sendall(frame({MSG: 1}) + b'\x00\x00\x00\x03abc')
+    assert receiver.receive() == [{MSG: 1}]
+    assert receiver.closed
+
+
+def testListenerExchangesWithGateways(tmpdir):
+    path = os.path.join(str(tmpdir), 'gateway.sock')
+    listener = IpcListener(path)
+    assert oct(os.stat(path).st_mode & 0o777) == oct(0o600)
+    gateway = connect(path)
+    gateway.send({CLIENT: 'client1', MSG: {'reqId': 1}})
+    received = listener.service()
+    assert [msg for _, msg in received] == [
+        {CLIENT: 'client1', MSG: {'reqId': 1}}]
+    conn = received[0][0]
+    conn.send({CLIENT: 'client1', MSG: {'op': 'REPLY'}})
+    assert gateway.receive() == [{CLIENT: 'client1', MSG: {'op': 'REPLY'}}]
+    gateway.close()
+    assert listener.service() == []
+    assert listener.connections == []
+    listener.close()
+    assert not os.path.exists(path)
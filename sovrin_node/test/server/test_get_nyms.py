@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from ledger.util import F
+from plenum.common.exceptions import InvalidClientRequest
+from plenum.common.txn import VERKEY
+from plenum.common.types import f
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, TXN_ID, NYM, DATA
+from sovrin_common.types import Request
+from sovrin_node.common.txn import GET_NYMS, STATE_PROOF, \
+    SIGNED_STATE_ROOT
+from sovrin_node.persistence.journal import LEDGER_ROOT
+from sovrin_node.persistence.state_trie import verifyProof, ROOT_HASH, \
+    SEQ_NO
+from sovrin_node.test.helper import unstartedNode
+
+
+class Config:
+    StateTrieFile = 'state_trie'
+
+
+@pytest.fixture
+def node(tmpdir):
+    node = unstartedNode(config=Config(), basedirpath=str(tmpdir))
+    for reqId, nym in enumerate(('nym1', 'nym2', 'nym3'), 1):
+        txn = {TXN_TYPE: NYM, TARGET_NYM: nym, VERKEY: '~' + nym,
+               f.IDENTIFIER.nm: 'sponsor', f.REQ_ID.nm: reqId,
+               TXN_ID: 'txn' + nym}
+        txn[F.seqNo.name] = node.domainLedger.add(dict(txn))[F.seqNo.name]
+        node.storeTxnInGraph(txn)
+    node.signStateRoot()
+    return node
+
+
+def testGetNymsRepliesWithAllTxnsAndProofs(node):
+    request = Request(identifier='client', reqId=1,
+                      operation={TXN_TYPE: GET_NYMS,
+                                 DATA: ['nym2', 'unknown', 'nym1', 'nym2']})
+    result = node.getNymsReply(request).result
+    txns = json.loads(result[DATA])
+    assert list(txns) == ['nym1', 'nym2', 'unknown']
+    assert txns['nym1'][TXN_ID] == 'txnnym1'
+    assert txns['nym2'][TARGET_NYM] == 'nym2'
+    assert txns['unknown'] is None
+    signed = result[SIGNED_STATE_ROOT]
+    assert signed[SEQ_NO] == 3
+    assert signed[LEDGER_ROOT] == node.domainLedger.root_hash
+    assert node.wallet.defaultId == signed[f.IDENTIFIER.nm]
+    assert f.SIG.nm in signed
+    proofs = result[STATE_PROOF]
+    assert all(verifyProof(proof, signed[ROOT_HASH])
+               for proof in proofs.values())
+    assert proofs['unknown']['value'] is None
+
+
+def testGetNymsNeedsAListOfNyms(node):
+    for nyms in (None, [], 'nym1', [1, 2],
+                 ['nym'] * (node.config.MaxNymsPerRequest + 1)):
+        with pytest.raises(InvalidClientRequest):
+            node.checkValidSovrinOperation('client', 1,
+                                           {TXN_TYPE: GET_NYMS, DATA: nyms})
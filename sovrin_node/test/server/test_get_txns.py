@@ -0,0 +1,24 @@
+import pytest
+from plenum.common.exceptions import InvalidClientRequest
+
+from sovrin_common.txn import TXN_TYPE, GET_TXNS, DATA
+from sovrin_node.test.helper import unstartedNode
+
+
+class Config:
+    pass
+
+
+@pytest.fixture
+def node(tmpdir):
+    return unstartedNode(config=Config(), basedirpath=str(tmpdir))
+
+
+def testGetTxnsTakesOnlyASeqNo(node):
+    for data in ('abc', '-1', -1, 1.5, True, ['1'], {}):
+        with pytest.raises(InvalidClientRequest):
+            node.checkValidSovrinOperation('client', 1, {TXN_TYPE: GET_TXNS,
+                                                         DATA: data})
+    for data in (None, '', 0, '0', '12', 12):
+        node.checkValidSovrinOperation('client', 1, {TXN_TYPE: GET_TXNS,
+                                                     DATA: data})
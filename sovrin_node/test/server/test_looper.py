@@ -0,0 +1,25 @@
+from sovrin_node.server.looper import idleSleep
+from sovrin_node.server.timer_queue import TimerQueue
+from sovrin_node.test.server.test_timer_queue import FakeClock
+
+
+class Prodable:
+    def __init__(self, timers):
+        self.timers = timers
+
+    def nextDue(self):
+        return self.timers.nextDue()
+
+
+def testIdleLooperSleepsUntilTheNextTimer():
+    clock = FakeClock()
+    timers = TimerQueue(clock=clock)
+    prodables = [Prodable(timers), object()]
+    # No timers at all
+    assert idleSleep(prodables, 1) == 1
+    timers.schedule('later', lambda: None, 5)
+    assert idleSleep(prodables, 1) == 1
+    timers.schedule('soon', lambda: None, 0.25)
+    assert idleSleep(prodables, 1) == 0.25
+    clock.now += 0.5
+    assert idleSleep(prodables, 1) == 0
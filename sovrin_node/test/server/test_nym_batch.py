@@ -0,0 +1,85 @@
+import pytest
+from ledger.util import F
+from plenum.common.exceptions import InvalidClientRequest, \
+    UnauthorizedClientRequest
+from plenum.common.txn import VERKEY
+from plenum.common.types import f
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, TXN_ID, NYM, DATA, ROLE, \
+    STEWARD, SPONSOR
+from sovrin_common.types import Request
+from sovrin_node.common.txn import NYMS
+from sovrin_node.server.recent_replies import RecentReplies
+from sovrin_node.test.helper import unstartedNode
+
+
+class Config:
+    pass
+
+
+@pytest.fixture
+def node(tmpdir):
+    node = unstartedNode(config=Config(), basedirpath=str(tmpdir))
+    for seqNo, (nym, role) in enumerate((('steward', STEWARD),
+                                         ('sponsor', SPONSOR)), 1):
+        node.storeTxnInGraph({TXN_TYPE: NYM, TARGET_NYM: nym, ROLE: role,
+                              f.IDENTIFIER.nm: 'steward', f.REQ_ID.nm: seqNo,
+                              TXN_ID: 'txn' + nym, F.seqNo.name: seqNo})
+    return node
+
+
+def nymsOp(*nymOps):
+    return {TXN_TYPE: NYMS, DATA: list(nymOps)}
+
+
+def testInvalidBatchesAreRejected(node):
+    for op in (nymsOp(),
+               {TXN_TYPE: NYMS, DATA: 'user1'},
+               nymsOp({TARGET_NYM: 'user1', 'alias': 'a'}),
+               nymsOp({VERKEY: '~abc'}),
+               nymsOp({TARGET_NYM: 'user1'}, {TARGET_NYM: 'user1'}),
+               nymsOp({TARGET_NYM: 'user1'}, {TARGET_NYM: 'sponsor'})):
+        with pytest.raises(InvalidClientRequest):
+            node.checkValidSovrinOperation('sponsor', 1, op)
+    # Even for the one who could update the nym with a NYM
+    with pytest.raises(InvalidClientRequest):
+        node.checkValidSovrinOperation('steward', 1, nymsOp(
+            {TARGET_NYM: 'sponsor', VERKEY: '~abc'}))
+    node.checkValidSovrinOperation('sponsor', 1, nymsOp(
+        {TARGET_NYM: 'user1'}, {TARGET_NYM: 'user2', VERKEY: '~abc'}))
+
+
+def testBatchIsAuthorisedOnlyIfEveryNymIs(node):
+    allowed = nymsOp({TARGET_NYM: 'user1'}, {TARGET_NYM: 'user2'})
+    node.checkRequestAuthorized(Request(identifier='sponsor', reqId=1,
+                                        operation=allowed))
+    notAllowed = nymsOp({TARGET_NYM: 'user1'},
+                        {TARGET_NYM: 'user2', ROLE: STEWARD})
+    with pytest.raises(UnauthorizedClientRequest):
+        node.checkRequestAuthorized(Request(identifier='sponsor', reqId=2,
+                                            operation=notAllowed))
+
+
+def testRetriedBatchIsNotAddedAgain(node):
+    ledger = node.domainLedger
+    request = Request(identifier='sponsor', reqId=7, operation=nymsOp(
+        {TARGET_NYM: 'user1'}, {TARGET_NYM: 'user2', VERKEY: '~abc'}))
+    assert node.getReplyFor(request) is None
+    node.applyNymBatch(1000, request)
+    assert ledger.size == 2
+    seqNo = node.recentReplies.get(request.key).result[F.seqNo.name]
+
+    # The reply is found without the recent replies, e.g. after a restart
+    node.recentReplies = RecentReplies(10)
+    reply = node.getReplyFor(request)
+    assert reply.result[F.seqNo.name] == seqNo
+    assert reply.result[TXN_ID] == node.genTxnId('sponsor', 7)
+    assert reply.result[DATA] == request.operation[DATA]
+
+    # Ordered again, e.g. sent to the pool before the reply came
+    node.applyNymBatch(1001, request)
+    assert ledger.size == 2
+    # Nor does another sender add them a second time
+    node.applyNymBatch(1002, Request(identifier='steward', reqId=8,
+                                     operation=request.operation))
+    assert ledger.size == 2
@@ -0,0 +1,69 @@
+from sovrin_node.server.prod_budget import ProdBudget, NODE_MSGS, \
+    CLIENT_WRITES, CLIENT_READS, READ_REPLIES, BACKGROUND
+from sovrin_node.test.server.test_timer_queue import FakeClock
+
+shares = {CLIENT_WRITES: 0.1, CLIENT_READS: 0.1, READ_REPLIES: 0.1,
+          BACKGROUND: 0.05}
+
+
+def runCycle(budget, clock, seconds, **handled):
+    limits = budget.startCycle()
+    for kind, count in handled.items():
+        budget.record(kind, min(count, budget.limit(kind)))
+    clock.now += seconds
+    budget.endCycle()
+    return limits
+
+
+def testClientFloodDoesNotStarveNodeMsgs():
+    clock = FakeClock()
+    budget = ProdBudget(0.05, 20, 1000, shares, clock)
+    limits = runCycle(budget, clock, 0.01, nodeMsgs=10000,
+                      clientWrites=10000, clientReads=10000)
+    assert limits == {NODE_MSGS: 650, CLIENT_WRITES: 100, CLIENT_READS: 100,
+                      READ_REPLIES: 100, BACKGROUND: 50}
+    # Node messages used their whole limit, clients get no more than their
+    # share
+    limits = runCycle(budget, clock, 0.01, nodeMsgs=10000,
+                      clientWrites=10000, clientReads=10000)
+    assert limits[CLIENT_WRITES] == limits[CLIENT_READS] == 100
+    assert budget.metrics["saturatedCycles"][NODE_MSGS] == 2
+
+
+def testReadFloodDoesNotStarveWrites():
+    clock = FakeClock()
+    budget = ProdBudget(0.05, 20, 1000, shares, clock)
+    budget.startCycle()
+    budget.record(CLIENT_READS, budget.limit(CLIENT_READS))
+    assert budget.limit(CLIENT_READS) == 0
+    assert budget.limit(CLIENT_WRITES) == 100
+
+
+def testClientsGetWhatNodeMsgsLeaveUnused():
+    clock = FakeClock()
+    budget = ProdBudget(0.05, 20, 1000, shares, clock)
+    runCycle(budget, clock, 0.01, nodeMsgs=50, clientWrites=10000)
+    limits = budget.startCycle(hasBackground=False, hasReadWorkers=False)
+    assert limits[BACKGROUND] == limits[READ_REPLIES] == 0
+    assert limits[NODE_MSGS] == 800
+    # What node messages left unused is split by the clients' shares
+    assert limits[CLIENT_WRITES] == limits[CLIENT_READS] == \
+        100 + (800 - 50) // 2
+    assert budget.limit(CLIENT_WRITES, 10) == 10
+
+
+def testBudgetAdaptsToCycleTime():
+    clock = FakeClock()
+    budget = ProdBudget(0.05, 20, 1000, shares, clock)
+    runCycle(budget, clock, 0.2, nodeMsgs=10000)
+    assert budget.budget == 500
+    runCycle(budget, clock, 0.2, nodeMsgs=10000)
+    assert budget.budget == 250
+    # An idle slow cycle, e.g. a pause of the process, changes nothing
+    runCycle(budget, clock, 0.2)
+    assert budget.budget == 250
+    runCycle(budget, clock, 0.001, nodeMsgs=10000)
+    assert budget.budget == 270
+    metrics = budget.metrics
+    assert metrics["slowCycles"] == 2
+    assert metrics["cycles"] == 4
@@ -0,0 +1,73 @@
+from sovrin_common.txn import STEWARD
+from sovrin_node.server.rate_limiter import ClientRateLimiter
+from sovrin_node.test.server.test_timer_queue import FakeClock
+
+roleLimits = {"steward": (100, 10), "user": (10, 1)}
+
+
+def newLimiter(clock, connectionLimits=(None, None), **kwargs):
+    roles = {'steward1': STEWARD}
+    return ClientRateLimiter(roleLimits, connectionLimits, burstSeconds=2,
+                             roleOf=roles.get, clock=clock, **kwargs)
+
+
+def check(limiter, identifier, frm, write):
+    return limiter.checkConnection(frm, write) or \
+        limiter.checkIdentifier(identifier, write)
+
+
+def testIdentifiersGetTheRatesOfTheirRoles():
+    clock = FakeClock()
+    limiter = newLimiter(clock)
+    # A burst of 2 seconds worth of writes
+    assert check(limiter, 'user1', 'conn1', True) is None
+    assert check(limiter, 'user1', 'conn1', True) is None
+    assert 'too many writes' in check(limiter, 'user1', 'conn1', True)
+    # Reads have their own budget
+    assert check(limiter, 'user1', 'conn1', False) is None
+    for _ in range(20):
+        assert check(limiter, 'steward1', 'conn1', True) is None
+    assert check(limiter, 'steward1', 'conn1', True)
+    clock.now += 1
+    assert check(limiter, 'user1', 'conn1', True) is None
+    assert check(limiter, 'user1', 'conn1', True)
+    assert limiter.refused == {"identifier": 3, "connection": 0}
+
+
+def testConnectionLimitCatchesRotatingIdentifiers():
+    clock = FakeClock()
+    limiter = newLimiter(clock, connectionLimits=(5, None))
+    refused = [check(limiter, 'user{}'.format(i), 'conn1', False)
+               for i in range(20)]
+    assert refused.count(None) == 10
+    assert check(limiter, 'user99', 'conn2', False) is None
+    assert limiter.refused["connection"] == 10
+
+
+def testOnlyRecentKeysAreTracked():
+    clock = FakeClock()
+    looked = []
+
+    def roleOf(identifier):
+        looked.append(identifier)
+
+    limiter = ClientRateLimiter(roleLimits, (None, None), 1, roleOf,
+                                clock=clock, maxKeys=2)
+    for identifier in ('a', 'b', 'a', 'c', 'a', 'b'):
+        check(limiter, identifier, 'conn', False)
+    assert looked == ['a', 'b', 'c', 'b']
+
+
+def testForgottenIdentifierGetsItsNewRole():
+    clock = FakeClock()
+    roles = {}
+    limiter = ClientRateLimiter(roleLimits, (None, None), 1, roles.get,
+                                clock=clock)
+    assert limiter.checkIdentifier('user1', True) is None
+    assert limiter.checkIdentifier('user1', True)
+    roles['user1'] = STEWARD
+    # The role is looked up once only
+    assert limiter.checkIdentifier('user1', True)
+    limiter.forget('user1')
+    for _ in range(10):
+        assert limiter.checkIdentifier('user1', True) is None
@@ -0,0 +1,49 @@
+import time
+
+from plenum.common.types import Reply
+
+from sovrin_common.txn import TXN_TYPE, GET_NYM
+from sovrin_common.types import Request
+from sovrin_node.server.read_worker_pool import ReadWorkerPool
+
+
+def serviceUntilDone(pool, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while pool.pending and time.perf_counter() < deadline:
+        pool.service()
+        time.sleep(.01)
+
+
+def testRepliesAreTransmittedOnlyFromService():
+    sent = []
+    pool = ReadWorkerPool(2, lambda reply, frm: sent.append((reply, frm)),
+                          None)
+    reqs = [Request(identifier='a', reqId=i, operation={TXN_TYPE: GET_NYM})
+            for i in range(10)]
+    for req in reqs:
+        pool.submit(lambda r: Reply({'reqId': r.reqId}), req, 'client1')
+    time.sleep(.1)
+    # Workers only queue replies, nothing is sent before `service`
+    assert not sent
+    serviceUntilDone(pool)
+    pool.stop()
+    assert sorted(reply.result['reqId'] for reply, _ in sent) == \
+        list(range(10))
+    assert all(frm == 'client1' for _, frm in sent)
+
+
+def testFailedBuildIsReported():
+    failed = []
+
+    def builder(request):
+        raise ValueError('no graph')
+
+    pool = ReadWorkerPool(1, None,
+                          lambda req, ex, frm: failed.append((req, ex, frm)))
+    req = Request(identifier='a', reqId=1, operation={TXN_TYPE: GET_NYM})
+    pool.submit(builder, req, 'client1')
+    serviceUntilDone(pool)
+    pool.stop()
+    assert len(failed) == 1
+    assert failed[0][0] is req
+    assert isinstance(failed[0][1], ValueError)
@@ -0,0 +1,20 @@
+from plenum.common.types import Reply
+
+from sovrin_node.server.recent_replies import RecentReplies
+
+
+def testOldestRepliesAreDropped():
+    replies = RecentReplies(3)
+    for reqId in range(5):
+        replies.add(('client1', reqId), Reply({'reqId': reqId}))
+    assert len(replies) == 3
+    assert replies.get(('client1', 0)) is None
+    assert replies.get(('client1', 1)) is None
+    assert replies.get(('client1', 4)).result == {'reqId': 4}
+    assert replies.get(('client2', 4)) is None
+
+
+def testNothingIsKeptWithSizeZero():
+    replies = RecentReplies(0)
+    replies.add(('client1', 1), Reply({'reqId': 1}))
+    assert replies.get(('client1', 1)) is None
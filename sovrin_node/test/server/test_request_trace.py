@@ -0,0 +1,39 @@
+import os
+
+from plenum.common.types import f, OPERATION
+
+from sovrin_common.txn import TXN_TYPE, TARGET_NYM, NYM
+from sovrin_node.server.request_trace import RequestTrace, ARRIVAL, CLIENT
+
+
+def testTraceRecordsAcceptedRequests(tmpdir):
+    path = os.path.join(str(tmpdir), 'traces', 'requests.trace')
+    trace = RequestTrace(path, flushEvery=1)
+    msg = {
+        OPERATION: {TXN_TYPE: NYM, TARGET_NYM: 'newNym'},
+        f.IDENTIFIER.nm: 'sponsor',
+        f.REQ_ID.nm: 1,
+        f.SIG.nm: 'sig'
+    }
+    trace.record(msg, 'client1', arrival=10.5)
+    trace.record(dict(msg, **{f.REQ_ID.nm: 2}), 'client1')
+    trace.close()
+
+    first, second = RequestTrace.read(path)
+    assert first[OPERATION] == msg[OPERATION]
+    assert first[f.IDENTIFIER.nm] == 'sponsor'
+    assert first[f.SIG.nm] == 'sig'
+    assert first[CLIENT] == 'client1'
+    assert first[ARRIVAL] == 10.5
+    assert second[f.REQ_ID.nm] == 2
+    assert second[ARRIVAL] > first[ARRIVAL]
+
+
+def testTraceAppendsToExistingFile(tmpdir):
+    path = os.path.join(str(tmpdir), 'requests.trace')
+    msg = {OPERATION: {TXN_TYPE: NYM}, f.IDENTIFIER.nm: 'a', f.REQ_ID.nm: 1}
+    for _ in range(2):
+        trace = RequestTrace(path)
+        trace.record(msg, 'client1')
+        trace.close()
+    assert len(list(RequestTrace.read(path))) == 2
@@ -0,0 +1,63 @@
+import time
+from threading import Thread
+
+import pytest
+
+from sovrin_node.server.rw_lock import ReadWriteLock
+
+
+def testReadsShareTheLockAWriteDoesNot():
+    lock = ReadWriteLock()
+    events = []
+
+    def write():
+        with lock.write():
+            events.append('write')
+
+    with lock.read():
+        with lock.read():
+            writer = Thread(target=write)
+            writer.start()
+            time.sleep(.05)
+            # The writer waits for the reads to end
+            assert not events
+        events.append('read')
+    writer.join(1)
+    assert events == ['read', 'write']
+
+
+def testWriterWaitsForNoNewReaders():
+    lock = ReadWriteLock()
+    events = []
+
+    def write():
+        with lock.write():
+            events.append('write')
+
+    def read():
+        with lock.read():
+            events.append('late read')
+
+    with lock.read():
+        writer = Thread(target=write)
+        writer.start()
+        time.sleep(.05)
+        reader = Thread(target=read)
+        reader.start()
+        time.sleep(.05)
+        assert not events
+    writer.join(1)
+    reader.join(1)
+    assert events == ['write', 'late read']
+
+
+def testWriterMayTakeTheLockAgain():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            with lock.write():
+                pass
@@ -0,0 +1,51 @@
+from sovrin_node.server.timer_queue import TimerQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def testDueActionsRunInDeadlineOrder():
+    clock = FakeClock()
+    timers = TimerQueue(clock)
+    ran = []
+    assert timers.nextDue() is None
+    timers.schedule('b', lambda: ran.append('b'), 20)
+    timers.schedule('a', lambda: ran.append('a'), 10)
+    timers.schedule('c', lambda: ran.append('c'), 2 * 86400)
+    assert timers.nextDue() == 10
+    assert timers.service() == 0
+    clock.now = 25
+    assert timers.service() == 2
+    assert ran == ['a', 'b']
+    assert len(timers) == 1
+    assert timers.nextDue() == 2 * 86400 - 25
+
+
+def testCancelAndRescheduleByKey():
+    clock = FakeClock()
+    timers = TimerQueue(clock)
+    ran = []
+    timers.schedule('upgrade', lambda: ran.append(1), 10)
+    timers.schedule('upgrade', lambda: ran.append(2), 30)
+    timers.schedule('sync', lambda: ran.append('sync'), 5)
+    assert timers.cancel('sync')
+    assert not timers.cancel('sync')
+    assert timers.deadline('upgrade') == 30
+    assert timers.nextDue() == 30
+    clock.now = 40
+    assert timers.service() == 1
+    assert ran == [2]
+    assert 'upgrade' not in timers
+
+
+def testHeapIsCompactedAfterManyReschedules():
+    timers = TimerQueue(FakeClock())
+    for i in range(1000):
+        timers.schedule('key', lambda: None, i)
+    assert len(timers) == 1
+    assert len(timers._heap) <= 20